@@ -9,12 +9,23 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import func, desc
 import datetime
 
-from database.models import Book, Rating, Tag, BookTag, User, UserActivity
+from database.models import Book, Rating, Tag, BookTag, User, UserActivity, BookSimilarity
 from backend.app import db
 from backend.api.utils.responses import success_response, error_response
+from backend.api.utils.pagination import paginate, InvalidCursor
+from backend.api.services.factors import get_factor_model
+from backend.api.services.ann import get_ann_index
+from backend.api.services.tag_affinity import update_tag_affinity
+from backend.api.services.fold_in import fold_in_user
+from backend.api.services.search import full_text_available, match_expression, full_text_filter, search_rank
+from backend.api.services.autocomplete import get_autocomplete_index
+from backend.api.services.fuzzy import get_trigram_index, FUZZY_FALLBACK_HITS
+from backend.api.services.result_counts import COUNT_MODES, filter_signature, result_counter
 
 books_bp = Blueprint('books', __name__)
 
+SIMILARITY_SOURCES = ('tag_tfidf', 'item_cf', 'als')
+
 @books_bp.route('/', methods=['GET'])
 def get_books():
     """Get list of books with optional filtering and pagination"""
@@ -31,6 +42,10 @@ def get_books():
         year_from = request.args.get('year_from', type=int)
         year_to = request.args.get('year_to', type=int)
         sort_by = request.args.get('sort_by', 'popularity', type=str)
+        count_mode = request.args.get('count', 'exact', type=str)
+
+        if count_mode not in COUNT_MODES:
+            return error_response(f'Unknown count mode: {count_mode}', 400)
 
         # limit page size
         per_page = min(per_page, 100)
@@ -38,12 +53,19 @@ def get_books():
         # base query
         query = Book.query
 
-        # apply filters
-        if title:
-            query = query.filter(Book.title.ilike(f'%{title}%'))
+        # apply filters - title and author words are looked up in the full-text index
+        title_match = match_expression(title, ['title', 'original_title']) if title else None
+        author_match = match_expression(author, ['authors']) if author else None
+        if (title_match or author_match) and full_text_available():
+            query = full_text_filter(query, ' AND '.join(
+                f'({match})' for match in (title_match, author_match) if match
+            ))
+        else:
+            if title:
+                query = query.filter(Book.title.ilike(f'%{title}%'))
 
-        if author:
-            query = query.filter(Book.authors.ilike(f'%{author}%'))
+            if author:
+                query = query.filter(Book.authors.ilike(f'%{author}%'))
 
         if min_rating > 0:
             query = query.filter(Book.average_rating >= min_rating)
@@ -63,25 +85,40 @@ def get_books():
                          .filter(BookTag.tag_id == tag_id)
             
         if tag_name:
-            # join with tags to filter by tag name
-            query = query.join(BookTag, Book.goodreads_book_id == BookTag.goodreads_book_id) \
-                         .join(Tag, BookTag.tag_id == Tag.tag_id) \
-                         .filter(Tag.tag_name.ilike(f'%{tag_name}%'))
+            # books with any matching tag - a join would list a book once per matching tag,
+            # inflating the count and leaving pages short once the rows are deduplicated
+            tagged = db.session.query(BookTag) \
+                               .join(Tag, BookTag.tag_id == Tag.tag_id) \
+                               .filter(BookTag.goodreads_book_id == Book.goodreads_book_id) \
+                               .filter(Tag.tag_name.ilike(f'%{tag_name}%'))
+            query = query.filter(tagged.exists())
             
         # apply sorting
         if sort_by == 'title':
-            query = query.order_by(Book.title)
+            sort_key, descending = Book.title, False
         elif sort_by == 'author':
-            query = query.order_by(Book.authors)
+            sort_key, descending = Book.authors, False
         elif sort_by == 'year':
-            query = query.order_by(Book.original_publication_year.desc())
+            sort_key, descending = Book.original_publication_year, True
         elif sort_by == 'rating':
-            query = query.order_by(Book.average_rating.desc())
+            sort_key, descending = Book.average_rating, True
         else:   # default: popularity
-            query = query.order_by(Book.ratings_count.desc())
+            sort_key, descending = Book.ratings_count, True
+
+        # the total is cached per filter set, so paging through it counts once
+        signature = filter_signature(
+            'books', title=title, author=author, tag_id=tag_id, tag_name=tag_name,
+            min_rating=min_rating if min_rating > 0 else None,
+            max_rating=max_rating if max_rating < 5 else None,
+            year_from=year_from, year_to=year_to
+        )
 
         # execute query with pagination
-        books_page = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            books, pagination = paginate(query, sort_key, Book.book_id, page, per_page, descending,
+                                         count=result_counter(signature, count_mode))
+        except InvalidCursor:
+            return error_response('Invalid pagination cursor', 400)
 
         # format response
         books_data = [{
@@ -93,18 +130,11 @@ def get_books():
             'image_url': book.image_url,
             'publication_year': book.original_publication_year,
             'language_code': book.language_code
-        } for book in books_page.items]
+        } for book in books]
 
         return success_response({
             'books': books_data,
-            'pagination': {
-                'total': books_page.total,
-                'pages': books_page.pages,
-                'current_page': books_page.page,
-                'per_page': books_page.per_page,
-                'has_next': books_page.has_next,
-                'has_prev': books_page.has_prev
-            }
+            'pagination': pagination
         })
     
     except Exception as e:
@@ -130,7 +160,7 @@ def get_tags():
 
         # apply sorting
         if sort_by == 'name':
-            query = query.order_by(Tag.tag_name)
+            sort_key, descending = Tag.tag_name, False
         else:   # default: popularity
             # subquery to count book_tags for each tag
             tag_counts = db.session.query(
@@ -138,14 +168,17 @@ def get_tags():
                 func.count(BookTag.goodreads_book_id).label('count')
             ).group_by(BookTag.tag_id).subquery()
 
-            query = query.outerjoin(tag_counts, Tag.tag_id == tag_counts.c.tag_id) \
-                         .order_by(desc(tag_counts.c.count))
+            query = query.outerjoin(tag_counts, Tag.tag_id == tag_counts.c.tag_id)
+            sort_key, descending = tag_counts.c.count, True
             
         # execute with pagination
-        tags_page = query.paginate(page=page, per_page=per_page, error_out=False)
+        try:
+            tags, pagination = paginate(query, sort_key, Tag.tag_id, page, per_page, descending)
+        except InvalidCursor:
+            return error_response('Invalid pagination cursor', 400)
 
         # get counts for each tag
-        tag_ids = [tag.tag_id for tag in tags_page.items]
+        tag_ids = [tag.tag_id for tag in tags]
         tag_counts = db.session.query(
             BookTag.tag_id,
             func.count(BookTag.goodreads_book_id).label('count')
@@ -160,60 +193,94 @@ def get_tags():
             'tag_id': tag.tag_id,
             'tag_name': tag.tag_name,
             'book_count': counts_dict.get(tag.tag_id, 0)
-        } for tag in tags_page.items]
+        } for tag in tags]
 
         return success_response({
             'tags': tags_data,
-            'pagination': {
-                'total': tags_page.total,
-                'pages': tags_page.pages,
-                'current_page': tags_page.page,
-                'per_page': tags_page.per_page,
-                'has_next': tags_page.has_next,
-                'has_prev': tags_page.has_prev
-            }
+            'pagination': pagination
         })
     
     except Exception as e:
         current_app.logger.error(f'Error getting tags: {str(e)}')
         return error_response('Failed to retrieve tags', 500)
     
+def shared_tag_similar_books(book, limit=10):
+    """Find similar books by counting shared tags, or by the same author if untagged"""
+    # get book tags
+    book_tag_ids = db.session.query(BookTag.tag_id) \
+                             .filter(BookTag.goodreads_book_id == book.goodreads_book_id) \
+                             .all()
+    book_tag_ids = [tag_id for (tag_id,) in book_tag_ids]
+
+    if not book_tag_ids:
+        # fallback if no tags found: get books by same author
+        return Book.query \
+                   .filter(Book.authors.ilike(f'%{book.authors}%')) \
+                   .filter(Book.book_id != book.book_id) \
+                   .order_by(Book.average_rating.desc()) \
+                   .limit(limit) \
+                   .all()
+
+    # find books with common tags
+    similar_books_query = db.session.query(
+        Book,
+        func.count(BookTag.tag_id).label('tag_count')
+    ).join(BookTag, Book.goodreads_book_id == BookTag.goodreads_book_id) \
+     .filter(BookTag.tag_id.in_(book_tag_ids)) \
+     .filter(Book.book_id != book.book_id) \
+     .group_by(Book.book_id) \
+     .order_by(desc('tag_count'), Book.average_rating.desc()) \
+     .limit(limit)
+
+    return [similar_book for similar_book, _ in similar_books_query]
+
+def factor_similar_books(book_id, limit=10):
+    """Find the books whose ALS factors have the largest inner product with the book's"""
+    model_dir = current_app.config.get('MODEL_DIR')
+    model = get_factor_model(model_dir)
+    index = get_ann_index(model_dir, model)
+    if index is None:
+        return []
+
+    book_vector = model.book_vector(book_id)
+    if book_vector is None:
+        return []
+
+    neighbours = index.search(book_vector, limit, nprobe=current_app.config.get('ANN_NPROBE'),
+                              exclude_book_ids=[book_id])
+    books = {book.book_id: book for book in
+             Book.query.filter(Book.book_id.in_([similar_id for similar_id, _ in neighbours]))}
+    return [books[similar_id] for similar_id, _ in neighbours if similar_id in books]
+
 @books_bp.route('/similar/<int:book_id>', methods=['GET'])
 def get_similar_books(book_id):
     """Get books similar to the given book_id"""
     try:
+        # tag_tfidf and item_cf are precomputed tables, als searches the ANN index
+        source = request.args.get('source', 'tag_tfidf', type=str)
+        if source not in SIMILARITY_SOURCES:
+            return error_response(f'Unknown similarity source: {source}', 400)
+
         # get the book
         book = Book.query.get(book_id)
         if not book:
             return error_response('Book not found', 404)
-        
-        # get book tags
-        book_tag_ids = db.session.query(BookTag.tag_id) \
-                                 .filter(BookTag.goodreads_book_id == book.goodreads_book_id) \
-                                 .all()
-        book_tag_ids = [tag_id for (tag_id,) in book_tag_ids]
-
-        if not book_tag_ids:
-            # fallback if no tags found: get books by same author
-            similar_books = Book.query \
-                                .filter(Book.authors.ilike(f'%{book.authors}%')) \
-                                .filter(Book.book_id != book_id) \
-                                .order_by(Book.average_rating.desc()) \
-                                .limit(10) \
-                                .all()
+
+        if source == 'als':
+            similar_books = factor_similar_books(book_id)
         else:
-            # find books with common tags
-            similar_books_query = db.session.query(
-                Book,
-                func.count(BookTag.tag_id).label('tag_count')
-            ).join(BookTag, Book.goodreads_book_id == BookTag.goodreads_book_id) \
-             .filter(BookTag.tag_id.in_(book_tag_ids)) \
-             .filter(Book.book_id != book_id) \
-             .group_by(Book.book_id) \
-             .order_by(desc('tag_count'), Book.average_rating.desc()) \
-             .limit(10)
-            
-            similar_books = [book for book, _ in similar_books_query]
+            # precomputed neighbours (built by data-processing/build_recommenders.py)
+            similar_books = db.session.query(Book) \
+                                      .join(BookSimilarity, Book.book_id == BookSimilarity.similar_book_id) \
+                                      .filter(BookSimilarity.source == source) \
+                                      .filter(BookSimilarity.book_id == book_id) \
+                                      .order_by(BookSimilarity.rank) \
+                                      .limit(10) \
+                                      .all()
+
+        if not similar_books:
+            # neighbours have not been built yet - count shared tags instead
+            similar_books = shared_tag_similar_books(book)
 
         # format response
         books_data = [{
@@ -282,6 +349,21 @@ def get_book(book_id):
         current_app.logger.error(f'Error getting book: {str(e)}')
         return error_response('Failed to retrieve book', 500)
     
+@books_bp.route('/autocomplete', methods=['GET'])
+def autocomplete_books():
+    """Complete a search-box prefix to the most rated matching books"""
+    try:
+        # get query parameters
+        prefix = request.args.get('q', '', type=str)
+        limit = request.args.get('limit', 10, type=int)
+
+        # answered from memory - no database query per keystroke
+        return success_response(get_autocomplete_index().complete(prefix, limit))
+
+    except Exception as e:
+        current_app.logger.error(f'Error autocompleting books: {str(e)}')
+        return error_response('Failed to autocomplete books', 500)
+
 @books_bp.route('/popular', methods=['GET'])
 def get_popular_books():
     """Get popular books based on ratings count"""
@@ -318,20 +400,50 @@ def search_books():
         query = request.args.get('q', '', type=str)
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        count_mode = request.args.get('count', 'exact', type=str)
 
         if not query:
             return error_response('Search query is required', 400)
+
+        if count_mode not in COUNT_MODES:
+            return error_response(f'Unknown count mode: {count_mode}', 400)
         
         # limit page size
         per_page = min(per_page, 100)
 
-        # search in title and author
-        search_results = Book.query.filter(
-            (Book.title.ilike(f'%{query}%')) |
-            (Book.authors.ilike(f'%{query}%'))
-        ).order_by(
-            Book.ratings_count.desc()
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        # search in title and author, ranked by relevance and popularity
+        expression = match_expression(query)
+        if expression and full_text_available():
+            search_query = full_text_filter(Book.query, expression)
+            sort_key, descending = search_rank(), False
+        else:
+            # no full-text index (a database from before the create_books_fts migration)
+            search_query = Book.query.filter(
+                (Book.title.ilike(f'%{query}%')) |
+                (Book.authors.ilike(f'%{query}%'))
+            )
+            sort_key, descending = Book.ratings_count, True
+        try:
+            books, pagination = paginate(search_query, sort_key, Book.book_id, page, per_page, descending,
+                                         count=result_counter(filter_signature('search', q=query), count_mode))
+        except InvalidCursor:
+            return error_response('Invalid pagination cursor', 400)
+
+        # too few exact hits - likely a typo, so add the closest trigram matches
+        first_page = page == 1 and not request.args.get('after')
+        fuzzy = False
+        if first_page and not pagination['has_next'] and len(books) < FUZZY_FALLBACK_HITS:
+            exact_ids = {book.book_id for book in books}
+            fuzzy_ids = [book_id for book_id in get_trigram_index().search(query, per_page)
+                         if book_id not in exact_ids][:per_page - len(books)]
+            found = {book.book_id: book for book in Book.query.filter(Book.book_id.in_(fuzzy_ids))}
+            fuzzy_books = [found[book_id] for book_id in fuzzy_ids if book_id in found]
+            # only flag the results (and touch the pagination) when matches were added
+            if fuzzy_books:
+                fuzzy = True
+                books = books + fuzzy_books
+                pagination.update({'total': len(books), 'has_next': False})
+                pagination.update({'pages': 1} if 'pages' in pagination else {'next_cursor': None})
 
         # format response
         books_data = [{
@@ -342,18 +454,12 @@ def search_books():
             'ratings_count': book.ratings_count,
             'image_url': book.image_url,
             'publication_year': book.original_publication_year
-        } for book in search_results.items]
+        } for book in books]
 
         return success_response({
             'books': books_data,
-            'pagination': {
-                'total': search_results.total,
-                'pages': search_results.pages,
-                'current_page': search_results.page,
-                'per_page': search_results.per_page,
-                'has_next': search_results.has_next,
-                'has_prev': search_results.has_prev
-            }
+            'fuzzy': fuzzy,
+            'pagination': pagination
         })
     
     except Exception as e:
@@ -396,7 +502,9 @@ def update_book_rating(book_id):
 
         if existing_rating:
             # update existing rating
+            update_tag_affinity(user_id, book, existing_rating.rating, rating_value)
             existing_rating.rating = rating_value
+            fold_in_user(user_id)
             # add/update review if provided
             if 'review' in data:
                 existing_rating.review = review
@@ -435,6 +543,8 @@ def update_book_rating(book_id):
 
             db.session.add(new_rating)
             db.session.add(activity)
+            update_tag_affinity(user_id, book, None, rating_value)
+            fold_in_user(user_id)
             db.session.commit()
 
             return success_response({
@@ -461,13 +571,15 @@ def get_book_reviews(book_id):
             return error_response('Book not found', 404)
         
         # get ratings with reviews
-        reviews_page = db.session.query(Rating, User) \
-                                 .join(User, Rating.user_id == User.user_id) \
-                                 .filter(Rating.book_id == book_id) \
-                                 .filter(Rating.review.isnot(None)) \
-                                 .filter(Rating.review != '') \
-                                 .order_by(Rating.timestamp.desc()) \
-                                 .paginate(page=page, per_page=per_page, error_out=False)
+        reviews_query = db.session.query(Rating, User) \
+                                  .join(User, Rating.user_id == User.user_id) \
+                                  .filter(Rating.book_id == book_id) \
+                                  .filter(Rating.review.isnot(None)) \
+                                  .filter(Rating.review != '')
+        try:
+            reviews, pagination = paginate(reviews_query, Rating.timestamp, Rating.user_id, page, per_page)
+        except InvalidCursor:
+            return error_response('Invalid pagination cursor', 400)
         
         # format response
         reviews_data = [{
@@ -476,18 +588,11 @@ def get_book_reviews(book_id):
             'rating': rating.rating,
             'review': rating.review,
             'timestamp': rating.timestamp.isoformat() if rating.timestamp else None
-        } for rating, user in reviews_page.items]
+        } for rating, user in reviews]
 
         return success_response({
             'reviews': reviews_data,
-            'pagination': {
-                'total': reviews_page.total,
-                'pages': reviews_page.pages,
-                'current_page': reviews_page.page,
-                'per_page': reviews_page.per_page,
-                'has_next': reviews_page.has_next,
-                'has_prev': reviews_page.has_prev
-            }
+            'pagination': pagination
         })
     
     except Exception as e:
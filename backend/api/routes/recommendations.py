@@ -8,6 +8,9 @@ import datetime
 from database.models import Book, Rating, Tag, BookTag, User, UserActivity, Recommendation
 from backend.app import db
 from backend.api.utils.responses import success_response, error_response
+from backend.api.services.popularity import get_popularity_ranking
+from backend.api.services.pipeline import get_recommendation_pipeline
+from backend.api.services.recommendation_log import get_recommendation_writer
 
 recommendations_bp = Blueprint('recommendations', __name__)
 
@@ -35,20 +38,16 @@ def get_popular_recommendations():
             except Exception as e:
                 current_app.logger.warning(f'Failed to decode token: {str(e)}')
 
-        # base query
-        query = db.session.query(Book) \
-                          .filter(Book.ratings_count > 100) \
-                          .order_by(Book.average_rating.desc(), Book.ratings_count.desc())
-        
         # exclude books the user has already rated if requested
+        rated_book_ids = []
         if exclude_rated and user_id:
-            rated_books = db.session.query(Rating.book_id) \
-                                    .filter(Rating.user_id == user_id) \
-                                    .subquery()
-            query = query.filter(~Book.book_id.in_(rated_books))
+            rated_book_ids = [book_id for (book_id,) in db.session.query(Rating.book_id)
+                                                                  .filter(Rating.user_id == user_id)]
 
-        # execute query
-        popular_books = query.limit(limit).all()
+        # walk the precomputed ranking instead of sorting the books table
+        book_ids = get_popularity_ranking().top(limit, exclude_book_ids=rated_book_ids)
+        books = {book.book_id: book for book in Book.query.filter(Book.book_id.in_(book_ids))}
+        popular_books = [books[book_id] for book_id in book_ids if book_id in books]
 
         # format response
         books_data = [{
@@ -68,6 +67,22 @@ def get_popular_recommendations():
         current_app.logger.error(f'Error getting popular recommendations: {str(e)}')
         return error_response('Failed to retrieve recommendations', 500)
     
+# explanation shown with each recommendation source
+RECOMMENDATION_REASONS = {
+    'als': 'Readers with similar ratings loved this',
+    'item_cf': 'Readers who liked your favorites also liked this',
+    'tag_based': 'Based on your taste in books',
+    'popular': 'Popular with readers'
+}
+
+# candidate generators run for each requested source
+RECOMMENDATION_PIPELINES = {
+    'blend': ('als', 'item_cf', 'tag_based', 'popular'),
+    'als': ('als',),
+    'item_cf': ('item_cf',),
+    'tag_based': ('tag_based',)
+}
+
 @recommendations_bp.route('/personalized', methods=['GET'])
 @jwt_required()
 def get_personalized_recommendations():
@@ -79,82 +94,56 @@ def get_personalized_recommendations():
 
         # get query parameters
         limit = request.args.get('limit', 10, type=int)
+        source = request.args.get('source', 'blend', type=str)
+
+        if source not in RECOMMENDATION_PIPELINES:
+            return error_response(f'Unknown recommendation source: {source}', 400)
 
         # check if user has ratings
-        user_ratings_count = db.session.query(func.count(Rating.book_id)) \
-                                       .filter(Rating.user_id == user_id) \
-                                       .scalar()
-        
-        if user_ratings_count == 0:
+        rated_book_ids = [book_id for (book_id,) in db.session.query(Rating.book_id)
+                                                              .filter(Rating.user_id == user_id)]
+
+        if not rated_book_ids:
             # fallback to popular recommendations if user has no ratings
             return get_popular_recommendations()
-        
-        # get the tags of books the user has rated highly (4 or 5 stars)
-        liked_tags = db.session.query(
-            Tag.tag_id,
-            Tag.tag_name,
-            func.count(Tag.tag_id).label('count')
-        ).join(BookTag, Tag.tag_id == BookTag.tag_id) \
-         .join(Book, BookTag.goodreads_book_id == Book.goodreads_book_id) \
-         .join(Rating, Rating.book_id == Book.book_id) \
-         .filter(Rating.user_id == user_id) \
-         .filter(Rating.rating >= 4) \
-         .group_by(Tag.tag_id, Tag.tag_name) \
-         .order_by(desc('count')) \
-         .limit(5) \
-         .all()
-        
-        if not liked_tags:
+
+        pipeline = get_recommendation_pipeline()
+        recommendations = pipeline.recommend(RECOMMENDATION_PIPELINES[source], user_id, limit,
+                                             rated_book_ids)
+        if not recommendations and source != 'blend':
+            # model or similarities not built, or the user joined after training
+            recommendations = pipeline.recommend(RECOMMENDATION_PIPELINES['tag_based'], user_id,
+                                                 limit, rated_book_ids)
+
+        books = {book.book_id: book for book in
+                 Book.query.filter(Book.book_id.in_([book_id for book_id, _, _, _ in recommendations]))}
+        recommendations = [recommendation for recommendation in recommendations
+                           if recommendation[0] in books]
+
+        if not recommendations:
             # fallback to popular recommendations if no liked tags found
             return get_popular_recommendations()
-        
-        # get tag IDs
-        tag_ids = [tag_id for tag_id, _, _ in liked_tags]
-
-        # get books with these tags that the user hasn't rated yet
-        rated_books = db.session.query(Rating.book_id) \
-                                .filter(Rating.user_id == user_id) \
-                                .subquery()
-        
-        recommended_books = db.session.query(
-            Book,
-            func.count(BookTag.tag_id).label('tag_count')
-        ).join(BookTag, Book.goodreads_book_id == BookTag.goodreads_book_id) \
-         .filter(BookTag.tag_id.in_(tag_ids)) \
-         .filter(~Book.book_id.in_(rated_books)) \
-         .filter(Book.average_rating >= 3.5) \
-         .filter(Book.ratings_count >= 50) \
-         .group_by(Book.book_id) \
-         .order_by(desc('tag_count'), Book.average_rating.desc()) \
-         .limit(limit) \
-         .all()
-        
+
         # format response
         books_data = [{
-            'book_id': book.book_id,
-            'title': book.title,
-            'authors': book.authors,
-            'average_rating': book.average_rating,
-            'ratings_count': book.ratings_count,
-            'image_url': book.image_url,
-            'publication_year': book.original_publication_year,
-            'language_code': book.language_code,
-            'reason': 'Based on your taste in books'
-        } for book, _ in recommended_books]
-
-        # store recommendations for tracking
-        timestamp = datetime.datetime.now()
-        for book, _ in recommended_books:
-            new_recommendation = Recommendation(
-                user_id=user_id,
-                book_id=book.book_id,
-                source='tag_based',
-                generated_at=timestamp,
-                score=book.average_rating
-            )
-            db.session.add(new_recommendation)
-
-        db.session.commit()
+            'book_id': book_id,
+            'title': books[book_id].title,
+            'authors': books[book_id].authors,
+            'average_rating': books[book_id].average_rating,
+            'ratings_count': books[book_id].ratings_count,
+            'image_url': books[book_id].image_url,
+            'publication_year': books[book_id].original_publication_year,
+            'language_code': books[book_id].language_code,
+            'reason': RECOMMENDATION_REASONS[book_source]
+        } for book_id, _, book_source, _ in recommendations]
+
+        # queue live recommendations for tracking (batch rows are already stored)
+        generated_at = datetime.datetime.now()
+        for book_source in RECOMMENDATION_REASONS:
+            logged = [(book_id, score) for book_id, score, recommendation_source, stored in recommendations
+                      if recommendation_source == book_source and not stored]
+            if logged:
+                get_recommendation_writer().record(user_id, book_source, logged, generated_at)
 
         return success_response(books_data)
     
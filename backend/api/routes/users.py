@@ -11,6 +11,7 @@ from sqlalchemy import func, desc
 from database.models import User, Rating, Book, ToRead, Tag, BookTag, UserActivity
 from backend.app import db
 from backend.api.utils.responses import success_response, error_response
+from backend.api.utils.pagination import paginate, InvalidCursor
 from backend.api.utils.auth import hash_password, check_password
 
 users_bp = Blueprint('users', __name__)
@@ -139,11 +140,13 @@ def get_user_ratings():
         per_page = min(per_page, 100)
 
         # get user's ratings with book information
-        ratings_page = db.session.query(Rating, Book) \
-                         .join(Book, Rating.book_id == Book.book_id) \
-                         .filter(Rating.user_id == user_id) \
-                         .order_by(Rating.timestamp.desc()) \
-                         .paginate(page=page, per_page=per_page, error_out=False)
+        ratings_query = db.session.query(Rating, Book) \
+                                  .join(Book, Rating.book_id == Book.book_id) \
+                                  .filter(Rating.user_id == user_id)
+        try:
+            ratings, pagination = paginate(ratings_query, Rating.timestamp, Rating.book_id, page, per_page)
+        except InvalidCursor:
+            return error_response('Invalid pagination cursor', 400)
         
         # format response
         ratings_data = [{
@@ -153,18 +156,11 @@ def get_user_ratings():
             'rating': rating.rating,
             'image_url': book.image_url,
             'timestamp': rating.timestamp.isoformat() if rating.timestamp else None
-        } for rating, book in ratings_page.items]
+        } for rating, book in ratings]
 
         return success_response({
             'ratings': ratings_data,
-            'pagination': {
-                'total': ratings_page.total,
-                'pages': ratings_page.pages,
-                'current_page': ratings_page.page,
-                'per_page': ratings_page.per_page,
-                'has_next': ratings_page.has_next,
-                'has_prev': ratings_page.has_prev
-            }
+            'pagination': pagination
         })
 
     except Exception as e:
@@ -188,11 +184,13 @@ def get_to_read_list():
         per_page = min(per_page, 100)
 
         # get user's to-read list with book information
-        to_read_page = db.session.query(ToRead, Book) \
-                         .join(Book, ToRead.book_id == Book.book_id) \
-                         .filter(ToRead.user_id == user_id) \
-                         .order_by(ToRead.added_date.desc()) \
-                         .paginate(page=page, per_page=per_page, error_out=False)
+        to_read_query = db.session.query(ToRead, Book) \
+                                  .join(Book, ToRead.book_id == Book.book_id) \
+                                  .filter(ToRead.user_id == user_id)
+        try:
+            to_read, pagination = paginate(to_read_query, ToRead.added_date, ToRead.book_id, page, per_page)
+        except InvalidCursor:
+            return error_response('Invalid pagination cursor', 400)
         
         # format response
         to_read_data = [{
@@ -202,18 +200,11 @@ def get_to_read_list():
             'average_rating': book.average_rating,
             'image_url': book.image_url,
             'added_date': to_read.added_date.isoformat() if to_read.added_date else None
-        } for to_read, book in to_read_page.items]
+        } for to_read, book in to_read]
         
         return success_response({
             'to_read': to_read_data,
-            'pagination': {
-                'total': to_read_page.total,
-                'pages': to_read_page.pages,
-                'current_page': to_read_page.page,
-                'per_page': to_read_page.per_page,
-                'has_next': to_read_page.has_next,
-                'has_prev': to_read_page.has_prev
-            }
+            'pagination': pagination
         })
         
     except Exception as e:
@@ -388,11 +379,14 @@ def get_user_activity():
         per_page = request.args.get('per_page', 20, type=int)
 
         # get user activity with book information
-        activity_page = db.session.query(UserActivity, Book) \
-                                  .join(Book, UserActivity.book_id == Book.book_id) \
-                                  .filter(UserActivity.user_id == user_id) \
-                                  .order_by(UserActivity.timestamp.desc()) \
-                                  .paginate(page=page, per_page=per_page, error_out=False)
+        activity_query = db.session.query(UserActivity, Book) \
+                                   .join(Book, UserActivity.book_id == Book.book_id) \
+                                   .filter(UserActivity.user_id == user_id)
+        try:
+            activities, pagination = paginate(activity_query, UserActivity.timestamp,
+                                              UserActivity.activity_id, page, per_page)
+        except InvalidCursor:
+            return error_response('Invalid pagination cursor', 400)
         
         # format response
         activity_data = [{
@@ -404,18 +398,11 @@ def get_user_activity():
             'book_image': book.small_image_url,
             'timestamp': activity.timestamp.isoformat() if activity.timestamp else None,
             'details': activity.details
-        } for activity, book in activity_page.items]
+        } for activity, book in activities]
 
         return success_response({
             'activities': activity_data,
-            'pagination': {
-                'total': activity_page.total,
-                'pages': activity_page.pages,
-                'current_page': activity_page.page,
-                'per_page': activity_page.per_page,
-                'has_next': activity_page.has_next,
-                'has_prev': activity_page.has_prev
-            }
+            'pagination': pagination
         })
     
     except Exception as e:
@@ -0,0 +1,99 @@
+# backend/api/services/ann.py
+
+"""
+Approximate nearest-neighbour search over the ALS book factors
+"""
+
+import json
+import os
+import numpy as np
+
+from backend.api.services.model_cache import ModelCache
+
+# file names written by data-processing/recommenders/ann.py
+ANN_FILES = {
+    'centroids': 'ann_centroids.npy',
+    'list_offsets': 'ann_list_offsets.npy',
+    'list_radii': 'ann_list_radii.npy',
+    'book_ids': 'ann_book_ids.npy',
+    'vectors': 'ann_vectors.npy'
+}
+ANN_META_FILE = 'ann_meta.json'
+
+class IVFIndex:
+    """
+    Inverted-file index mapped read-only from .npy files
+
+    Book vectors are stored grouped by k-means list, so a query reads only
+    the contiguous rows of the lists it probes. More probed lists means
+    higher recall and slower queries; the build step records the recall of
+    several nprobe values against brute force and picks a default.
+    """
+
+    def __init__(self, model_dir):
+        with open(os.path.join(model_dir, ANN_META_FILE)) as f:
+            self.meta = json.load(f)
+
+        self.centroids = np.load(os.path.join(model_dir, ANN_FILES['centroids']))
+        self.list_offsets = np.load(os.path.join(model_dir, ANN_FILES['list_offsets']))
+        self.list_radii = np.load(os.path.join(model_dir, ANN_FILES['list_radii']))
+        self.book_ids = np.load(os.path.join(model_dir, ANN_FILES['book_ids']), mmap_mode='r')
+        self.vectors = np.load(os.path.join(model_dir, ANN_FILES['vectors']), mmap_mode='r')
+        self.default_nprobe = self.meta['default_nprobe']
+
+    def search(self, query, limit, nprobe=None, exclude_book_ids=()):
+        """
+        Find the books with the largest inner product with a query vector
+
+        Args:
+            query (ndarray): User or book factor vector
+            limit (int): Number of books to return
+            nprobe (int): Lists scanned (defaults to the index's tuned value)
+            exclude_book_ids (list): Books that must not be returned
+
+        Returns:
+            list: (book_id, inner product) tuples, best first
+        """
+        query = np.asarray(query, dtype=np.float32)
+        nprobe = min(nprobe or self.default_nprobe, len(self.centroids))
+
+        # probe the lists with the highest upper bound on their members' scores
+        bounds = self.centroids @ query + np.linalg.norm(query) * self.list_radii
+        lists = np.argpartition(-bounds, nprobe - 1)[:nprobe]
+        rows = np.concatenate([np.arange(self.list_offsets[i], self.list_offsets[i + 1])
+                               for i in lists])
+
+        scores = self.vectors[rows] @ query
+        book_ids = self.book_ids[rows]
+        if len(exclude_book_ids):
+            scores[np.isin(book_ids, exclude_book_ids)] = -np.inf
+
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return list(zip(book_ids[top].tolist(), scores[top].tolist()))
+
+# index shared by all requests of this process
+ann_indexes = ModelCache(IVFIndex, ANN_META_FILE)
+
+def get_ann_index(model_dir, factor_model=None):
+    """
+    Get the ANN index, reloading it after the build step writes a new one
+
+    Args:
+        model_dir (str): Model directory
+        factor_model (FactorModel): If given, the index is only returned when
+            it was built from these factors
+
+    Returns:
+        IVFIndex: The loaded index, or None if it is missing or out of date
+    """
+    index = ann_indexes.get(model_dir)
+    if index is None:
+        return None
+    if factor_model is not None and index.meta['als_trained_at'] != factor_model.meta['trained_at']:
+        return None
+    return index
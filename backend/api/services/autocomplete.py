@@ -0,0 +1,123 @@
+# backend/api/services/autocomplete.py
+
+"""
+In-memory prefix index for search-box autocompletion
+"""
+
+from bisect import bisect_left
+import re
+import unicodedata
+import numpy as np
+
+from database.models import Book
+from backend.app import db
+from backend.api.services.catalog import get_catalog_cache
+
+# most completions returned per prefix
+TOP_N = 10
+# characters of each key that are indexed - longer prefixes are cut to this
+MAX_KEY_LENGTH = 24
+# prefixes matching more keys than this get their completions precomputed
+HEAVY_PREFIX_KEYS = 256
+# sorts after every character of a key, so prefix + KEY_END ends the prefix's range
+KEY_END = '\uffff'
+
+def normalize(text):
+    """Lowercase, strip accents and reduce punctuation to single spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(re.findall(r'\w+', text.lower()))
+
+def word_suffixes(text):
+    """Keys starting at every word of a normalized text, so 'potter' finds 'harry potter'"""
+    return [text[match.start():match.start() + MAX_KEY_LENGTH] for match in re.finditer(r'\w+', text)]
+
+class AutocompleteIndex:
+    """
+    Sorted array of normalized title and author keys
+
+    Every word of a title or author name starts a key, and each key points at
+    the book's popularity rank. Matching a prefix is a binary search for its
+    key range; the books in the range are ranked by taking the smallest
+    popularity ranks. Prefixes with large ranges (short ones like 'th') have
+    their top matches precomputed, so every lookup touches at most
+    HEAVY_PREFIX_KEYS keys. This is the array layout of a trie with top-N
+    lists on its busy nodes, without a Python object per node.
+    """
+
+    def __init__(self, books):
+        """
+        Args:
+            books (list): (book_id, title, authors, ratings_count, small_image_url) tuples
+        """
+        # popularity rank 0 is the most rated book
+        books = sorted(books, key=lambda book: -(book[3] or 0))
+        self.books = [{
+            'book_id': book_id,
+            'title': title,
+            'authors': authors,
+            'ratings_count': ratings_count,
+            'small_image_url': small_image_url
+        } for book_id, title, authors, ratings_count, small_image_url in books]
+
+        entries = set()
+        for rank, (_, title, authors, _, _) in enumerate(books):
+            texts = [title] + (authors or '').split(',')
+            for text in texts:
+                for key in word_suffixes(normalize(text)):
+                    entries.add((key, rank))
+        entries = sorted(entries)
+        self.keys = [key for key, _ in entries]
+        self.ranks = np.array([rank for _, rank in entries], dtype=np.int32)
+
+        self.heavy = {}
+        self.precompute_heavy_prefixes()
+
+    def precompute_heavy_prefixes(self):
+        """Store the top ranks of every prefix matching more than HEAVY_PREFIX_KEYS keys"""
+        stack = [('', 0, len(self.keys))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if hi - lo <= HEAVY_PREFIX_KEYS:
+                continue
+            self.heavy[prefix] = np.unique(self.ranks[lo:hi])[:TOP_N]
+
+            # split the range by the next character
+            depth = len(prefix)
+            i = lo
+            while i < hi:
+                if len(self.keys[i]) <= depth:
+                    i += 1
+                    continue
+                child = self.keys[i][:depth + 1]
+                end = bisect_left(self.keys, child + KEY_END, i, hi)
+                stack.append((child, i, end))
+                i = end
+
+    def complete(self, prefix, limit=TOP_N):
+        """
+        Get the most popular books with a title or author word starting with prefix
+
+        Returns:
+            list: Book dicts, most rated first
+        """
+        prefix = normalize(prefix)[:MAX_KEY_LENGTH]
+        if not prefix:
+            return []
+
+        ranks = self.heavy.get(prefix)
+        if ranks is None:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + KEY_END, lo)
+            ranks = np.unique(self.ranks[lo:hi])
+        return [self.books[rank] for rank in ranks[:min(limit, TOP_N)]]
+
+def build_autocomplete_index():
+    """Index every book of the loaded catalog"""
+    return AutocompleteIndex(db.session.query(
+        Book.book_id, Book.title, Book.authors, Book.ratings_count, Book.small_image_url
+    ).all())
+
+def get_autocomplete_index():
+    """Get the autocomplete index, rebuilding it after the catalog is reloaded"""
+    return get_catalog_cache().get('autocomplete_index', build_autocomplete_index)
@@ -0,0 +1,151 @@
+# backend/api/services/candidates.py
+
+"""
+Candidate generators for the personalized recommendation pipeline
+"""
+
+import datetime
+import numpy as np
+from flask import current_app
+from sqlalchemy import func, desc
+
+from database.models import Book, Rating, BookTag, Recommendation, BookSimilarity
+from backend.app import db
+from backend.api.services.factors import get_factor_model
+from backend.api.services.ann import get_ann_index
+from backend.api.services.fold_in import folded_user_vector
+from backend.api.services.tag_affinity import top_tags
+from backend.api.services.popularity import get_popularity_ranking
+
+class Candidates:
+    """Scored books proposed by one generator, best first"""
+
+    def __init__(self, source, scored_books, stored=False):
+        """
+        Args:
+            source (str): Name of the generator
+            scored_books (list): (book_id, score) tuples, best first
+            stored (bool): Whether these are batch rows already in the recommendations table
+        """
+        self.source = source
+        self.book_ids = np.array([book_id for book_id, _ in scored_books], dtype=np.int64)
+        self.scores = np.array([score for _, score in scored_books], dtype=np.float64)
+        self.stored = stored
+
+    def __len__(self):
+        return len(self.book_ids)
+
+def precomputed_recommendations(user_id, source, limit, rated_book_ids):
+    """
+    Read the user's batch-generated recommendations if they are fresh
+
+    Returns an empty list when the batch rows are older than
+    PRECOMPUTED_MAX_AGE_HOURS or cannot fill the page once books rated since
+    the batch ran are removed, so the caller computes them live instead.
+    """
+    max_age_hours = current_app.config.get('PRECOMPUTED_MAX_AGE_HOURS')
+    if not max_age_hours:
+        return []
+
+    fresh_after = datetime.datetime.now() - datetime.timedelta(hours=max_age_hours)
+
+    # one range scan of ix_recommendations_user_source_rank
+    recommendations = db.session.query(Recommendation.book_id, Recommendation.score) \
+                                .filter(Recommendation.user_id == user_id) \
+                                .filter(Recommendation.source == source) \
+                                .filter(Recommendation.rank.isnot(None)) \
+                                .filter(Recommendation.generated_at >= fresh_after) \
+                                .filter(~Recommendation.book_id.in_(rated_book_ids)) \
+                                .order_by(Recommendation.rank) \
+                                .limit(limit) \
+                                .all()
+
+    if len(recommendations) < limit:
+        return []
+    return recommendations
+
+def als_candidates(user_id, limit, rated_book_ids):
+    """Score books for the user with the matrix factorization model"""
+    model = get_factor_model(current_app.config.get('MODEL_DIR'))
+    # a vector folded in after a new rating is newer than the batch rows
+    vector = folded_user_vector(model, user_id) if model is not None else None
+
+    if vector is None:
+        # serve the batch-generated list when there is a fresh one
+        stored = precomputed_recommendations(user_id, 'als', limit, rated_book_ids)
+        if stored:
+            return Candidates('als', stored, stored=True)
+
+    if model is None:
+        return Candidates('als', [])
+    if vector is None:
+        row = model.user_row(int(user_id))
+        if row is None:
+            # the user joined after training and has not rated a trained book since
+            return Candidates('als', [])
+        vector = model.user_factors[row]
+
+    index = get_ann_index(current_app.config.get('MODEL_DIR'), model)
+    if index is not None:
+        # scan only the nearest inverted lists instead of the whole catalog
+        top_books = [(book_id, score + model.global_mean) for book_id, score in index.search(
+            vector, limit, nprobe=current_app.config.get('ANN_NPROBE'),
+            exclude_book_ids=rated_book_ids
+        )]
+    else:
+        top_books = model.top_books(model.score_books(vector), limit, exclude_book_ids=rated_book_ids)
+    return Candidates('als', top_books)
+
+def item_cf_candidates(user_id, limit, rated_book_ids):
+    """Recommend the precomputed co-rating neighbours of the user's highly rated books"""
+    liked_book_ids = db.session.query(Rating.book_id) \
+                               .filter(Rating.user_id == user_id) \
+                               .filter(Rating.rating >= 4)
+
+    # a few hundred indexed neighbour rows per liked book, summed per candidate
+    candidates = db.session.query(
+        BookSimilarity.similar_book_id,
+        func.sum(BookSimilarity.score).label('score')
+    ).filter(BookSimilarity.source == 'item_cf') \
+     .filter(BookSimilarity.book_id.in_(liked_book_ids)) \
+     .filter(~BookSimilarity.similar_book_id.in_(rated_book_ids)) \
+     .group_by(BookSimilarity.similar_book_id) \
+     .order_by(desc('score')) \
+     .limit(limit) \
+     .all()
+    return Candidates('item_cf', candidates)
+
+def tag_based_candidates(user_id, limit, rated_book_ids):
+    """Recommend unrated books that share the user's most liked tags"""
+    # the user's most liked tags, from the cached tag-affinity vector
+    tag_ids = top_tags(user_id, 5)
+    if not tag_ids:
+        return Candidates('tag_based', [])
+
+    recommended_books = db.session.query(
+        Book.book_id,
+        func.count(BookTag.tag_id).label('tag_count')
+    ).join(BookTag, Book.goodreads_book_id == BookTag.goodreads_book_id) \
+     .filter(BookTag.tag_id.in_(tag_ids)) \
+     .filter(~Book.book_id.in_(rated_book_ids)) \
+     .filter(Book.average_rating >= 3.5) \
+     .filter(Book.ratings_count >= 50) \
+     .group_by(Book.book_id) \
+     .order_by(desc('tag_count'), Book.average_rating.desc()) \
+     .limit(limit) \
+     .all()
+    return Candidates('tag_based', recommended_books)
+
+def popular_candidates(user_id, limit, rated_book_ids):
+    """Recommend the best ranked books the user has not rated"""
+    book_ids = get_popularity_ranking().top(limit, exclude_book_ids=rated_book_ids)
+    # the ranking is ordinal, so score by position
+    return Candidates('popular', [(book_id, -position) for position, book_id in enumerate(book_ids)])
+
+# generator name -> function(user_id, limit, rated_book_ids) returning Candidates
+CANDIDATE_GENERATORS = {
+    'als': als_candidates,
+    'item_cf': item_cf_candidates,
+    'tag_based': tag_based_candidates,
+    'popular': popular_candidates
+}
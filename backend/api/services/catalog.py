@@ -0,0 +1,54 @@
+# backend/api/services/catalog.py
+
+"""
+Per-app cache of values derived from the catalog tables
+"""
+
+import threading
+from flask import current_app
+from sqlalchemy import text
+
+from backend.app import db
+
+def catalog_version():
+    """Version of the loaded data, bumped by the ETL bulk loader on every table reload"""
+    return db.session.execute(text('PRAGMA user_version')).scalar()
+
+class CatalogCache:
+    """
+    Holds values computed from the books and tags tables
+
+    The catalog only changes when the ETL reloads it, so each value is kept
+    until the database's catalog version moves on.
+    """
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, key, builder):
+        """
+        Get a cached value, building it if missing or built from older data
+
+        Args:
+            key: Hashable name of the value
+            builder: Callable returning the value
+
+        Returns:
+            The cached or newly built value
+        """
+        version = catalog_version()
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is not None and entry[0] == version:
+                return entry[1]
+
+        # build outside the lock - a concurrent request may build it too
+        value = builder()
+        with self.lock:
+            self.values[key] = (version, value)
+        return value
+
+def get_catalog_cache():
+    """Get the catalog cache of the current app"""
+    return current_app.extensions.setdefault('catalog_cache', CatalogCache())
@@ -0,0 +1,125 @@
+# backend/api/services/factors.py
+
+"""
+Matrix factorization model served from memory-mapped factor files
+"""
+
+import json
+import os
+import numpy as np
+
+from backend.api.services.model_cache import ModelCache
+
+# file names written by data-processing/recommenders/als.py
+ALS_FILES = {
+    'user_factors': 'als_user_factors.npy',
+    'book_factors': 'als_book_factors.npy',
+    'user_ids': 'als_user_ids.npy',
+    'book_ids': 'als_book_ids.npy'
+}
+ALS_META_FILE = 'als_meta.json'
+
+class FactorModel:
+    """
+    User and book factors mapped read-only from .npy files
+
+    The arrays are opened with mmap_mode='r', so all worker processes share
+    one copy in the page cache and only the pages a request touches are read.
+    """
+
+    def __init__(self, model_dir):
+        with open(os.path.join(model_dir, ALS_META_FILE)) as f:
+            self.meta = json.load(f)
+
+        self.user_factors = np.load(os.path.join(model_dir, ALS_FILES['user_factors']), mmap_mode='r')
+        self.book_factors = np.load(os.path.join(model_dir, ALS_FILES['book_factors']), mmap_mode='r')
+        self.user_ids = np.load(os.path.join(model_dir, ALS_FILES['user_ids']), mmap_mode='r')
+        self.book_ids = np.load(os.path.join(model_dir, ALS_FILES['book_ids']), mmap_mode='r')
+        self.global_mean = self.meta['global_mean']
+
+    def user_row(self, user_id):
+        """Row of a user in the factor matrix, or None if the user was not trained"""
+        row = int(np.searchsorted(self.user_ids, user_id))
+        if row < len(self.user_ids) and self.user_ids[row] == user_id:
+            return row
+        return None
+
+    def book_vector(self, book_id):
+        """Factor vector of a book, or None if the book was not trained"""
+        row = int(np.searchsorted(self.book_ids, book_id))
+        if row < len(self.book_ids) and self.book_ids[row] == book_id:
+            return self.book_factors[row]
+        return None
+
+    def fold_in(self, book_ids, ratings):
+        """
+        Solve a user's factor vector against the frozen book factors
+
+        Uses the same weighted-lambda least-squares problem as training,
+        (F^T F + regularization * n * I) x = F^T (r - global_mean) over the
+        user's n ratings of trained books, so a new rating can be reflected
+        without retraining.
+
+        Args:
+            book_ids (list): Books the user rated
+            ratings (list): The ratings, aligned with book_ids
+
+        Returns:
+            ndarray: The user's factor vector, or None if no rated book was trained
+        """
+        book_ids = np.asarray(book_ids, dtype=self.book_ids.dtype)
+        ratings = np.asarray(ratings, dtype=np.float32)
+        if not len(book_ids):
+            return None
+        rows = np.minimum(np.searchsorted(self.book_ids, book_ids), len(self.book_ids) - 1)
+        trained = self.book_ids[rows] == book_ids
+        if not trained.any():
+            return None
+
+        factors = np.asarray(self.book_factors[rows[trained]], dtype=np.float64)
+        centered = ratings[trained] - self.global_mean
+        normal = factors.T @ factors
+        normal[np.diag_indices_from(normal)] += self.meta['regularization'] * len(factors)
+        return np.linalg.solve(normal, factors.T @ centered).astype(np.float32)
+
+    def score_books(self, user_vector):
+        """Predicted rating of every book for a user vector (one matrix-vector product)"""
+        return self.book_factors @ user_vector + self.global_mean
+
+    def top_books(self, scores, limit, exclude_book_ids=()):
+        """
+        Select the best scoring books without sorting the whole catalog
+
+        Args:
+            scores (ndarray): Score of every book, aligned with book_ids
+            limit (int): Number of books to return
+            exclude_book_ids (list): Books that must not be returned (e.g. already rated)
+
+        Returns:
+            list: (book_id, score) tuples, best first
+        """
+        scores = np.array(scores, dtype=np.float32)
+        if len(exclude_book_ids):
+            exclude = np.asarray(exclude_book_ids, dtype=self.book_ids.dtype)
+            rows = np.minimum(np.searchsorted(self.book_ids, exclude), len(self.book_ids) - 1)
+            scores[rows[self.book_ids[rows] == exclude]] = -np.inf
+
+        limit = min(limit, int(np.isfinite(scores).sum()))
+        if limit <= 0:
+            return []
+
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return list(zip(self.book_ids[top].tolist(), scores[top].tolist()))
+
+# model shared by all requests of this process
+factor_models = ModelCache(FactorModel, ALS_META_FILE)
+
+def get_factor_model(model_dir):
+    """
+    Get the factor model, reloading it after the trainer writes a new one
+
+    Returns:
+        FactorModel: The loaded model, or None if no model has been trained
+    """
+    return factor_models.get(model_dir)
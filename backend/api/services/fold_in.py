@@ -0,0 +1,54 @@
+# backend/api/services/fold_in.py
+
+"""
+Online fold-in of new ratings into the ALS user factors
+"""
+
+import numpy as np
+from flask import current_app
+
+from database.models import Rating, UserFactor
+from backend.app import db
+from backend.api.services.factors import get_factor_model
+
+def fold_in_user(user_id):
+    """
+    Re-solve the user's factor vector from all their ratings
+
+    Adds the session changes without committing, so the vector is saved in
+    the same transaction as the rating that triggered it. Every worker
+    process reads the stored vector, so the next request anywhere sees it.
+
+    Returns:
+        ndarray: The new vector, or None if there is no model, or if no
+            trained book was rated (the stored vector is then removed)
+    """
+    model = get_factor_model(current_app.config.get('MODEL_DIR'))
+    if model is None:
+        return None
+
+    ratings = db.session.query(Rating.book_id, Rating.rating) \
+                        .filter(Rating.user_id == user_id) \
+                        .all()
+    vector = model.fold_in([book_id for book_id, _ in ratings], [rating for _, rating in ratings])
+    user_factor = db.session.get(UserFactor, int(user_id))
+    if vector is None:
+        # an earlier vector no longer reflects the ratings, so serving falls
+        # back to the trained row or the cold-start path instead
+        if user_factor is not None:
+            db.session.delete(user_factor)
+        return None
+
+    if user_factor is None:
+        user_factor = UserFactor(user_id=int(user_id))
+        db.session.add(user_factor)
+    user_factor.factors = vector.tobytes()
+    user_factor.trained_at = model.meta['trained_at']
+    return vector
+
+def folded_user_vector(model, user_id):
+    """Get the user's folded-in vector if one was solved against this model"""
+    user_factor = db.session.get(UserFactor, int(user_id))
+    if user_factor is None or user_factor.trained_at != model.meta['trained_at']:
+        return None
+    return np.frombuffer(user_factor.factors, dtype=np.float32)
@@ -0,0 +1,83 @@
+# backend/api/services/fuzzy.py
+
+"""
+Typo-tolerant book search through a character-trigram inverted index
+"""
+
+import numpy as np
+
+from database.models import Book
+from backend.app import db
+from backend.api.services.autocomplete import normalize
+from backend.api.services.catalog import get_catalog_cache
+
+# share of the query's trigrams a book must contain to match
+MIN_SIMILARITY = 0.4
+# exact searches with fewer hits than this are topped up with fuzzy matches
+FUZZY_FALLBACK_HITS = 3
+
+def trigrams(text):
+    """Character trigrams of every word, padded so word starts and ends count ('  to', 'en ')"""
+    grams = set()
+    for word in normalize(text).split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to the books whose title or authors contain them
+
+    Postings are stored CSR-style in two arrays. A query gathers the posting
+    slices of its trigrams and counts them per book with one np.bincount, so
+    matching costs the total length of those postings rather than a pass
+    over every title.
+    """
+
+    def __init__(self, books):
+        """
+        Args:
+            books (list): (book_id, title, authors, ratings_count) tuples
+        """
+        self.book_ids = np.array([book[0] for book in books], dtype=np.int64)
+        self.ratings_counts = np.array([book[3] or 0 for book in books], dtype=np.int64)
+
+        book_grams = [trigrams(f'{title} {authors or ""}') for _, title, authors, _ in books]
+        self.vocabulary = {gram: i for i, gram in enumerate(sorted(set().union(*book_grams)))}
+
+        gram_ids = np.array([self.vocabulary[gram] for grams in book_grams for gram in grams],
+                            dtype=np.int64)
+        positions = np.repeat(np.arange(len(books)), [len(grams) for grams in book_grams])
+        order = np.argsort(gram_ids, kind='stable')
+        self.postings = positions[order].astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(gram_ids, minlength=len(self.vocabulary)))])
+
+    def search(self, query, limit):
+        """
+        Find the books sharing the most trigrams with the query
+
+        Returns:
+            list: Book ids, best first - by share of the query's trigrams
+                matched, then by ratings count
+        """
+        query_grams = trigrams(query)
+        gram_ids = [self.vocabulary[gram] for gram in query_grams if gram in self.vocabulary]
+        if not gram_ids:
+            return []
+
+        hits = np.concatenate([self.postings[self.offsets[i]:self.offsets[i + 1]] for i in gram_ids])
+        similarity = np.bincount(hits, minlength=len(self.book_ids)) / len(query_grams)
+
+        matches = np.flatnonzero(similarity >= MIN_SIMILARITY)
+        order = np.lexsort((-self.ratings_counts[matches], -similarity[matches]))
+        return self.book_ids[matches[order[:limit]]].tolist()
+
+def build_trigram_index():
+    """Index every book of the loaded catalog"""
+    return TrigramIndex(db.session.query(
+        Book.book_id, Book.title, Book.authors, Book.ratings_count
+    ).all())
+
+def get_trigram_index():
+    """Get the trigram index, rebuilding it after the catalog is reloaded"""
+    return get_catalog_cache().get('trigram_index', build_trigram_index)
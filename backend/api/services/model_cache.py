@@ -0,0 +1,48 @@
+# backend/api/services/model_cache.py
+
+"""
+Per-process cache of models loaded from the model directory
+"""
+
+import os
+import threading
+
+class ModelCache:
+    """
+    Holds one loaded model per process and reloads it when its meta file changes
+
+    The trainers write the meta file last, so a new modification time means
+    a complete new model is on disk.
+    """
+
+    def __init__(self, loader, meta_file):
+        """
+        Args:
+            loader: Callable taking the model directory and returning the model
+            meta_file (str): File name whose modification time versions the model
+        """
+        self.loader = loader
+        self.meta_file = meta_file
+        self.model = None
+        self.key = None
+        self.lock = threading.Lock()
+
+    def get(self, model_dir):
+        """
+        Get the model, loading it on first use or after it was rebuilt
+
+        Returns:
+            The loaded model, or None if no model has been built
+        """
+        if not model_dir:
+            return None
+        try:
+            version = os.stat(os.path.join(model_dir, self.meta_file)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+        with self.lock:
+            if self.key != (model_dir, version):
+                self.model = self.loader(model_dir)
+                self.key = (model_dir, version)
+            return self.model
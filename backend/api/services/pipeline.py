@@ -0,0 +1,150 @@
+# backend/api/services/pipeline.py
+
+"""
+Two-stage recommendation pipeline: concurrent candidate generation, then re-ranking
+"""
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+import threading
+import time
+import numpy as np
+from flask import current_app
+
+from backend.api.services.candidates import CANDIDATE_GENERATORS
+
+# candidates requested from each generator per requested recommendation
+CANDIDATES_PER_RESULT = 3
+
+class RecommendationPipeline:
+    """
+    Runs candidate generators concurrently and blends what finishes in time
+
+    Each generator runs in a worker thread with its own app context (and so
+    its own database session) and has its own budget from
+    RECOMMENDATION_BUDGETS_MS. A generator that misses its budget or fails
+    is left out of the ranking, so one slow source cannot hold up the
+    response. With RECOMMENDATION_PIPELINE_WORKERS = 0 the generators run
+    one after another in the request thread and budgets are not enforced.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config['RECOMMENDATION_PIPELINE_WORKERS']
+        self.budgets = app.config['RECOMMENDATION_BUDGETS_MS']
+        self.weights = app.config['RECOMMENDATION_WEIGHTS']
+        self.executor = None
+        self.lock = threading.Lock()
+
+    def get_executor(self):
+        """Create the worker threads on first use (after any server fork)"""
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers,
+                                                   thread_name_prefix='recommendation-pipeline')
+            return self.executor
+
+    def run_generator(self, name, user_id, limit, rated_book_ids):
+        """Run one generator inside a fresh app context (worker thread entry point)"""
+        with self.app.app_context():
+            return CANDIDATE_GENERATORS[name](user_id, limit, rated_book_ids)
+
+    def generate(self, generators, user_id, limit, rated_book_ids):
+        """
+        Collect the candidates of every generator that finishes within its budget
+
+        Returns:
+            list: Candidates of the generators that succeeded
+        """
+        results = []
+        if not self.workers:
+            for name in generators:
+                try:
+                    results.append(CANDIDATE_GENERATORS[name](user_id, limit, rated_book_ids))
+                except Exception as e:
+                    current_app.logger.error(f'Candidate generator {name} failed: {str(e)}')
+            return results
+
+        start = time.monotonic()
+        executor = self.get_executor()
+        futures = {name: executor.submit(self.run_generator, name, user_id, limit, rated_book_ids)
+                   for name in generators}
+
+        # wait for the shortest budgets first so every wait ends at its own deadline
+        for name in sorted(generators, key=lambda name: self.budgets[name]):
+            remaining = start + self.budgets[name] / 1000 - time.monotonic()
+            try:
+                results.append(futures[name].result(timeout=max(remaining, 0)))
+            except TimeoutError:
+                # a still-queued generator is dropped, a running one finishes unused
+                futures[name].cancel()
+                current_app.logger.warning(f'Candidate generator {name} missed its '
+                                           f'{self.budgets[name]} ms budget')
+            except Exception as e:
+                current_app.logger.error(f'Candidate generator {name} failed: {str(e)}')
+        return results
+
+    def rerank(self, candidate_sets, limit):
+        """
+        Merge the candidate sets into one ranking
+
+        Each generator's scores are min-max normalized to [0, 1] and weighted
+        by RECOMMENDATION_WEIGHTS; a book proposed by several generators gets
+        the sum. The generator contributing most is reported as its source.
+
+        Returns:
+            list: (book_id, score, source, stored) tuples, best first
+        """
+        candidate_sets = [candidates for candidates in candidate_sets if len(candidates)]
+        if not candidate_sets:
+            return []
+
+        book_ids, positions = np.unique(
+            np.concatenate([candidates.book_ids for candidates in candidate_sets]),
+            return_inverse=True
+        )
+        contributions = np.zeros((len(candidate_sets), len(book_ids)))
+
+        offset = 0
+        for i, candidates in enumerate(candidate_sets):
+            scores = candidates.scores
+            spread = scores.max() - scores.min()
+            normalized = (scores - scores.min()) / spread if spread > 0 else np.ones(len(scores))
+            contributions[i, positions[offset:offset + len(scores)]] = \
+                self.weights[candidates.source] * normalized
+            offset += len(scores)
+
+        totals = contributions.sum(axis=0)
+        limit = min(limit, len(book_ids))
+        top = np.argpartition(-totals, limit - 1)[:limit]
+        top = top[np.argsort(-totals[top], kind='stable')]
+        sources = contributions[:, top].argmax(axis=0)
+
+        return [(int(book_ids[book]), float(totals[book]), candidate_sets[source].source,
+                 candidate_sets[source].stored)
+                for book, source in zip(top, sources)]
+
+    def recommend(self, generators, user_id, limit, rated_book_ids):
+        """
+        Generate candidates with the given generators and re-rank them
+
+        Args:
+            generators (tuple): Names of the generators to run
+            user_id (int): User to recommend for
+            limit (int): Number of recommendations
+            rated_book_ids (list): Books the user has rated, never recommended
+
+        Returns:
+            list: (book_id, score, source, stored) tuples, best first
+        """
+        # one generator needs no more candidates than the page it fills
+        per_generator = limit if len(generators) == 1 else limit * CANDIDATES_PER_RESULT
+        candidate_sets = self.generate(generators, user_id, per_generator, rated_book_ids)
+        return self.rerank(candidate_sets, limit)
+
+def init_recommendation_pipeline(app):
+    """Create the app's recommendation pipeline"""
+    app.extensions['recommendation_pipeline'] = RecommendationPipeline(app)
+
+def get_recommendation_pipeline():
+    """Get the recommendation pipeline of the current app"""
+    return current_app.extensions['recommendation_pipeline']
@@ -0,0 +1,74 @@
+# backend/api/services/popularity.py
+
+"""
+Popularity ranking materialized once per catalog load
+"""
+
+import numpy as np
+
+from database.models import Book
+from backend.app import db
+from backend.api.services.catalog import get_catalog_cache
+
+# books need this many ratings to be ranked
+MIN_RATINGS_COUNT = 100
+
+class PopularityRanking:
+    """
+    Eligible book ids ordered by Bayesian-weighted average rating
+
+    score = (v * R + m * C) / (v + m) where R and v are a book's average
+    rating and ratings count, C is the mean rating of all eligible books and
+    m the median ratings count, so a high average backed by few ratings is
+    pulled towards the catalog mean.
+    """
+
+    def __init__(self, book_ids, average_ratings, ratings_counts):
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        average_ratings = np.asarray(average_ratings, dtype=np.float64)
+        ratings_counts = np.asarray(ratings_counts, dtype=np.float64)
+
+        self.book_ids = book_ids
+        # rated-book bitmaps are indexed by book id
+        self.max_book_id = int(book_ids.max()) if len(book_ids) else 0
+        if not len(book_ids):
+            return
+
+        prior_rating = average_ratings.mean()
+        prior_count = np.median(ratings_counts)
+        scores = (ratings_counts * average_ratings + prior_count * prior_rating) \
+            / (ratings_counts + prior_count)
+        # ties go to the more rated book
+        self.book_ids = book_ids[np.lexsort((-ratings_counts, -scores))]
+
+    @classmethod
+    def from_database(cls):
+        """Rank the eligible books of the loaded catalog"""
+        rows = db.session.query(Book.book_id, Book.average_rating, Book.ratings_count) \
+                         .filter(Book.ratings_count > MIN_RATINGS_COUNT) \
+                         .filter(Book.average_rating.isnot(None)) \
+                         .all()
+        book_ids, average_ratings, ratings_counts = zip(*rows) if rows else ((), (), ())
+        return cls(book_ids, average_ratings, ratings_counts)
+
+    def top(self, limit, exclude_book_ids=()):
+        """
+        Get the highest ranked book ids, skipping excluded ones
+
+        Only the first limit + len(exclude_book_ids) entries can contain the
+        answer, so that prefix is filtered against a bitmap of the excluded ids.
+
+        Returns:
+            list: Book ids, best first
+        """
+        candidates = self.book_ids[:limit + len(exclude_book_ids)]
+        if len(exclude_book_ids):
+            excluded = np.zeros(self.max_book_id + 1, dtype=bool)
+            exclude_book_ids = np.asarray(exclude_book_ids, dtype=np.int64)
+            excluded[exclude_book_ids[exclude_book_ids <= self.max_book_id]] = True
+            candidates = candidates[~excluded[candidates]]
+        return candidates[:limit].tolist()
+
+def get_popularity_ranking():
+    """Get the popularity ranking, rebuilding it after the catalog is reloaded"""
+    return get_catalog_cache().get('popularity_ranking', PopularityRanking.from_database)
@@ -0,0 +1,138 @@
+# backend/api/services/recommendation_log.py
+
+"""
+Buffered, deduplicated logging of served recommendations
+"""
+
+import atexit
+import threading
+import time
+from flask import current_app
+
+from database.models import Recommendation
+from backend.app import db
+
+class RecommendationWriter:
+    """
+    Writes Recommendation tracking rows from a background thread
+
+    Requests only append to an in-memory buffer, so serving a recommendation
+    never waits on a SQLite write lock. The buffer is committed in batches
+    every RECOMMENDATION_LOG_FLUSH_SECONDS, or sooner once
+    RECOMMENDATION_LOG_BATCH_SIZE rows are waiting, and once more when the
+    process exits. A (user, book, source) impression already logged within
+    RECOMMENDATION_LOG_DEDUP_SECONDS is dropped, so refreshing the page does
+    not grow the table.
+
+    With RECOMMENDATION_LOG_ASYNC off (tests use a per-connection in-memory
+    database) rows are written in the request's session instead.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.asynchronous = app.config['RECOMMENDATION_LOG_ASYNC']
+        self.flush_seconds = app.config['RECOMMENDATION_LOG_FLUSH_SECONDS']
+        self.batch_size = app.config['RECOMMENDATION_LOG_BATCH_SIZE']
+        self.dedup_seconds = app.config['RECOMMENDATION_LOG_DEDUP_SECONDS']
+
+        self.buffer = []
+        self.last_logged = {}   # (user_id, book_id, source) -> monotonic time logged, oldest first
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopping = False
+        self.thread = None
+
+    def record(self, user_id, source, recommendations, generated_at):
+        """
+        Queue the recommendations served to a user
+
+        Args:
+            user_id (int): User the recommendations were served to
+            source (str): Recommender that produced them
+            recommendations (list): (book_id, score) tuples
+            generated_at (datetime): When they were generated
+        """
+        now = time.monotonic()
+        rows = []
+        with self.lock:
+            self.forget_expired(now)
+            for book_id, score in recommendations:
+                key = (int(user_id), book_id, source)
+                if key in self.last_logged:
+                    continue
+                self.last_logged[key] = now
+                rows.append({
+                    'user_id': int(user_id),
+                    'book_id': book_id,
+                    'source': source,
+                    'score': score,
+                    'generated_at': generated_at
+                })
+
+            if self.asynchronous:
+                self.buffer.extend(rows)
+                full = len(self.buffer) >= self.batch_size
+                self.start()
+
+        if not self.asynchronous:
+            if rows:
+                db.session.execute(Recommendation.__table__.insert(), rows)
+                db.session.commit()
+        elif full:
+            self.wake.set()
+
+    def forget_expired(self, now):
+        """Drop impressions older than the dedup window; call with the lock held"""
+        # keys are inserted in time order, so the expired ones come first
+        while self.last_logged:
+            key = next(iter(self.last_logged))
+            if now - self.last_logged[key] < self.dedup_seconds:
+                break
+            del self.last_logged[key]
+
+    def start(self):
+        """Start the writer thread on first use (after any server fork); call with the lock held"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name='recommendation-writer', daemon=True)
+            self.thread.start()
+            atexit.register(self.stop)
+
+    def run(self):
+        """Writer thread loop"""
+        while not self.stopping:
+            self.wake.wait(self.flush_seconds)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Commit the buffered rows in one transaction"""
+        with self.lock:
+            rows, self.buffer = self.buffer, []
+
+        if not rows:
+            return
+
+        with self.app.app_context():
+            try:
+                db.session.execute(Recommendation.__table__.insert(), rows)
+                db.session.commit()
+            except Exception as e:
+                # tracking rows are not worth blocking or retrying the writer for
+                db.session.rollback()
+                self.app.logger.error(f'Error writing {len(rows)} recommendation log rows: {str(e)}')
+
+    def stop(self):
+        """Stop the writer thread and write what is left in the buffer"""
+        self.stopping = True
+        self.wake.set()
+        if self.thread is not None:
+            self.thread.join()
+        self.flush()
+
+def init_recommendation_writer(app):
+    """Create the app's recommendation writer"""
+    app.extensions['recommendation_writer'] = RecommendationWriter(app)
+
+def get_recommendation_writer():
+    """Get the recommendation writer of the current app"""
+    return current_app.extensions['recommendation_writer']
@@ -0,0 +1,120 @@
+# backend/api/services/result_counts.py
+
+"""
+Cached result counts of filtered catalog lists, keyed by filter signature
+"""
+
+from collections import OrderedDict
+import threading
+from flask import current_app
+from sqlalchemy import func
+
+from backend.app import db
+from backend.api.services.catalog import catalog_version
+
+# how a list's total is found when it is not cached yet
+COUNT_MODES = ('exact', 'approximate', 'lazy')
+# approximate totals stop counting past this many rows
+APPROXIMATE_COUNT_LIMIT = 1000
+# filter signatures remembered per catalog version, least recently used dropped first
+MAX_CACHED_COUNTS = 10000
+
+def filter_signature(endpoint, **filters):
+    """
+    Normalize a filter set into a cache key
+
+    Text filters are lowercased (every text filter matches case-insensitively)
+    and unset filters are dropped, so 'Tolkien' and 'tolkien' share an entry.
+    Sorting is not part of the key since it does not change the count.
+    """
+    normalized = []
+    for name, value in sorted(filters.items()):
+        if isinstance(value, str):
+            value = value.lower()
+        if value is not None and value != '':
+            normalized.append((name, value))
+    return (endpoint, tuple(normalized))
+
+class ResultCountCache:
+    """
+    Least recently used map of filter signatures to result counts
+
+    The catalog lists only change when the ETL reloads the catalog, so the
+    counts are dropped together when the catalog version moves on.
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_COUNTS):
+        self.max_entries = max_entries
+        self.counts = OrderedDict()
+        self.version = None
+        self.lock = threading.Lock()
+
+    def get(self, signature, version):
+        """Get the cached count of a signature, or None"""
+        with self.lock:
+            if version != self.version:
+                self.counts.clear()
+                self.version = version
+                return None
+            total = self.counts.get(signature)
+            if total is not None:
+                self.counts.move_to_end(signature)
+            return total
+
+    def set(self, signature, version, total):
+        """Cache the count of a signature, unless the catalog was reloaded meanwhile"""
+        with self.lock:
+            if version != self.version:
+                return
+            self.counts[signature] = total
+            self.counts.move_to_end(signature)
+            while len(self.counts) > self.max_entries:
+                self.counts.popitem(last=False)
+
+def get_result_count_cache():
+    """Get the result count cache of the current app"""
+    return current_app.extensions.setdefault('result_count_cache', ResultCountCache())
+
+def result_counter(signature, mode='exact'):
+    """
+    Build the count function paginate uses for a filtered catalog list
+
+    A cached count is always used. Otherwise an exact count runs COUNT(*)
+    once and caches it, an approximate count stops at APPROXIMATE_COUNT_LIMIT
+    rows, and a lazy count skips counting until a page reaches the end of
+    the results, which gives the total for free.
+
+    Args:
+        signature: Key from filter_signature
+        mode (str): One of COUNT_MODES
+
+    Returns:
+        function(query, known_total) returning (total or None, whether approximate)
+    """
+    def count(query, known_total):
+        cache = get_result_count_cache()
+        version = catalog_version()
+        total = cache.get(signature, version)
+        if total is not None:
+            return total, False
+
+        if known_total is not None:
+            cache.set(signature, version, known_total)
+            return known_total, False
+
+        if mode == 'lazy':
+            return None, False
+
+        if mode == 'approximate':
+            # count at most one row past the limit instead of every match
+            limited = query.order_by(None).limit(APPROXIMATE_COUNT_LIMIT + 1).subquery()
+            total = db.session.query(func.count()).select_from(limited).scalar()
+            if total > APPROXIMATE_COUNT_LIMIT:
+                return APPROXIMATE_COUNT_LIMIT, True
+        else:
+            total = query.order_by(None).count()
+
+        cache.set(signature, version, total)
+        return total, False
+
+    return count
@@ -0,0 +1,65 @@
+# backend/api/services/search.py
+
+"""
+Full-text book search through the books_fts index
+"""
+
+import re
+from sqlalchemy import column, func, literal_column, table, text
+
+from database.models import Book
+from backend.app import db
+from backend.api.services.catalog import get_catalog_cache
+
+# FTS5 table created by the ETL and the create_books_fts migration (not a model,
+# so db.create_all never creates it)
+books_fts = table('books_fts', column('rowid'))
+
+# bm25 weights of the title, original_title and authors columns
+COLUMN_WEIGHTS = (10.0, 5.0, 3.0)
+# relevance is multiplied by up to 1 + POPULARITY_BOOST for widely rated books
+POPULARITY_BOOST = 1.0
+# ratings count that earns half of the popularity boost
+POPULARITY_HALF_COUNT = 10000
+
+def full_text_available():
+    """Whether the database has the books_fts index (checked once per catalog load)"""
+    return get_catalog_cache().get('books_fts', lambda: db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'books_fts'")
+    ).first() is not None)
+
+def match_expression(query, columns=None):
+    """
+    Build an FTS5 MATCH expression requiring every word of the query as a prefix
+
+    Args:
+        query (str): User input
+        columns (list): Columns to search (defaults to all indexed columns)
+
+    Returns:
+        str: MATCH expression, or None if the query has no words
+    """
+    # quoting each word keeps FTS5 operators in user input from being parsed
+    terms = [f'"{word}"*' for word in re.findall(r'\w+', query)]
+    if not terms:
+        return None
+    expression = ' '.join(terms)
+    if columns:
+        return f'{{{" ".join(columns)}}} : ({expression})'
+    return expression
+
+def full_text_filter(query, expression):
+    """Restrict a Book query to the rows matching a MATCH expression"""
+    return query.join(books_fts, books_fts.c.rowid == Book.book_id) \
+                .filter(literal_column('books_fts').op('MATCH')(expression))
+
+def search_rank():
+    """
+    Order by bm25 relevance blended with popularity, best first
+
+    bm25 is negative (lower is better), so scaling it up by a saturating
+    ratings-count factor moves widely rated books ahead of equally relevant ones.
+    """
+    popularity = Book.ratings_count * 1.0 / (Book.ratings_count + POPULARITY_HALF_COUNT)
+    return func.bm25(literal_column('books_fts'), *COLUMN_WEIGHTS) \
+        * (1 + POPULARITY_BOOST * func.coalesce(popularity, 0))
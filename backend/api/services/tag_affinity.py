@@ -0,0 +1,88 @@
+# backend/api/services/tag_affinity.py
+
+"""
+Per-user tag-affinity vectors cached in the user_tag_profiles table
+"""
+
+import heapq
+import json
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+from database.models import Book, Rating, BookTag, UserTagProfile
+from backend.app import db
+
+# ratings at or above this count as liking the book
+LIKED_RATING = 4
+
+def liked_tag_weights(user_id):
+    """Count the user's liked books carrying each tag (the join the cache avoids)"""
+    weights = db.session.query(
+        BookTag.tag_id,
+        func.count(BookTag.tag_id)
+    ).join(Book, BookTag.goodreads_book_id == Book.goodreads_book_id) \
+     .join(Rating, Rating.book_id == Book.book_id) \
+     .filter(Rating.user_id == user_id) \
+     .filter(Rating.rating >= LIKED_RATING) \
+     .group_by(BookTag.tag_id) \
+     .all()
+    return {tag_id: count for tag_id, count in weights}
+
+def get_tag_affinity(user_id):
+    """
+    Get the user's tag-affinity vector, building and storing it on first use
+
+    Returns:
+        dict: tag_id -> number of liked books carrying the tag
+    """
+    profile = db.session.get(UserTagProfile, int(user_id))
+    if profile is not None:
+        return {int(tag_id): weight for tag_id, weight in json.loads(profile.tag_weights).items()}
+
+    weights = liked_tag_weights(user_id)
+    db.session.add(UserTagProfile(user_id=int(user_id), tag_weights=json.dumps(weights)))
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # a concurrent request stored the same profile first
+        db.session.rollback()
+    return weights
+
+def top_tags(user_id, limit=5):
+    """Get the ids of the user's most liked tags"""
+    weights = get_tag_affinity(user_id)
+    return heapq.nlargest(limit, weights, key=lambda tag_id: (weights[tag_id], -tag_id))
+
+def update_tag_affinity(user_id, book, old_rating, new_rating):
+    """
+    Apply a rating change to the user's stored profile
+
+    Adds the session changes without committing, so the profile is saved in
+    the same transaction as the rating. Users without a stored profile are
+    skipped; theirs is built from the ratings on first use.
+
+    Args:
+        user_id (int): User who rated the book
+        book (Book): Rated book
+        old_rating (int): Previous rating, or None for a new rating
+        new_rating (int): New rating
+    """
+    was_liked = old_rating is not None and old_rating >= LIKED_RATING
+    delta = int(new_rating >= LIKED_RATING) - int(was_liked)
+    if delta == 0:
+        return
+
+    profile = db.session.get(UserTagProfile, int(user_id))
+    if profile is None:
+        return
+
+    weights = json.loads(profile.tag_weights)
+    tag_ids = db.session.query(BookTag.tag_id) \
+                        .filter(BookTag.goodreads_book_id == book.goodreads_book_id)
+    for (tag_id,) in tag_ids:
+        weight = weights.get(str(tag_id), 0) + delta
+        if weight > 0:
+            weights[str(tag_id)] = weight
+        else:
+            weights.pop(str(tag_id), None)
+    profile.tag_weights = json.dumps(weights)
@@ -0,0 +1,179 @@
+# backend/api/utils/pagination.py
+
+"""
+Offset and keyset (cursor) pagination for list endpoints
+"""
+
+import base64
+import binascii
+import json
+import math
+from flask import request
+from sqlalchemy import DateTime, String, and_, tuple_, type_coerce
+
+class InvalidCursor(ValueError):
+    """Raised when an after token cannot be decoded"""
+
+def encode_cursor(sort_value, row_id):
+    """Encode the sort key and id of the last row on a page as an opaque token"""
+    payload = json.dumps([sort_value, row_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(token):
+    """
+    Decode an after token back into the (sort value, id) it was made from
+
+    Raises:
+        InvalidCursor: If the token was not made by encode_cursor
+    """
+    try:
+        payload = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        sort_value, row_id = json.loads(payload)
+        if not isinstance(row_id, int):
+            raise ValueError('cursor id is not an integer')
+        if not isinstance(sort_value, (str, int, float, type(None))):
+            raise ValueError('cursor sort key is not a scalar')
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor(str(e))
+    return sort_value, row_id
+
+def keyset_ranges(sort_key, id_column, descending, after):
+    """
+    Filters selecting the rows after the cursor, in page order
+
+    SQLite sorts NULL sort keys first ascending and last descending. The
+    NULL rows are kept in a range of their own, so every filter is a single
+    (sort key, id) row-value comparison that an index on the sort key can
+    seek to - OR-ing in the NULL rows would turn the seek back into a scan.
+    """
+    if after is None:
+        ranges = [sort_key.isnot(None), sort_key.is_(None)]
+        return ranges[::-1] if not descending else ranges
+
+    sort_value, row_id = after
+    if descending:
+        if sort_value is None:
+            return [and_(sort_key.is_(None), id_column < row_id)]
+        return [tuple_(sort_key, id_column) < tuple_(sort_value, row_id), sort_key.is_(None)]
+
+    if sort_value is None:
+        return [and_(sort_key.is_(None), id_column > row_id), sort_key.isnot(None)]
+    return [tuple_(sort_key, id_column) > tuple_(sort_value, row_id)]
+
+def keyset_paginate(query, sort_key, id_column, descending, per_page, after, with_total, count=None):
+    """
+    Fetch the page after a cursor by seeking past it instead of counting rows off
+
+    Returns:
+        tuple: (items, pagination dict with next_cursor for the following page)
+    """
+    if isinstance(sort_key.type, DateTime):
+        # compare timestamps as the text SQLite stores; a datetime bound back
+        # would gain microseconds the stored value may lack and never match it
+        sort_key = type_coerce(sort_key, String)
+    order = (sort_key.desc(), id_column.desc()) if descending else (sort_key, id_column)
+    keyed = query.add_columns(sort_key.label('cursor_sort_key'), id_column.label('cursor_id'))
+
+    # one extra row tells whether there is a next page
+    rows = []
+    for condition in keyset_ranges(sort_key, id_column, descending, after):
+        rows += keyed.filter(condition).order_by(*order).limit(per_page + 1 - len(rows)).all()
+        if len(rows) > per_page:
+            break
+
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    # strip the key columns, leaving what the query itself selects
+    items = [row[0] if len(row) == 3 else tuple(row[:-2]) for row in rows]
+
+    pagination = {
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': encode_cursor(rows[-1][-2], rows[-1][-1]) if has_next else None
+    }
+    if with_total and count is not None:
+        # a first page without a next one holds every result
+        known_total = len(items) if after is None and not has_next else None
+        pagination['total'], approximate = count(query, known_total)
+        if approximate:
+            pagination['total_approximate'] = True
+    elif with_total:
+        pagination['total'] = query.order_by(None).count()
+    return items, pagination
+
+def counted_paginate(query, page, per_page, count):
+    """
+    Fetch a numbered page, taking its total from a count function instead of COUNT(*)
+
+    Returns:
+        tuple: (items, pagination dict - total and pages are None when the
+            total is not known, and total_approximate is set when it is a
+            lower bound)
+    """
+    offset = (page - 1) * per_page
+    # one extra row tells whether there is a next page without the total
+    rows = query.offset(offset).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    items = rows[:per_page]
+
+    # the page holding the last result shows how many there are
+    known_total = offset + len(items) if not has_next and (items or page == 1) else None
+    total, approximate = count(query, known_total)
+
+    pagination = {
+        'total': total,
+        'pages': math.ceil(total / per_page) if total is not None and not approximate else None,
+        'current_page': page,
+        'per_page': per_page,
+        'has_next': has_next,
+        'has_prev': page > 1
+    }
+    if approximate:
+        pagination['total_approximate'] = True
+    return items, pagination
+
+def paginate(query, sort_key, id_column, page, per_page, descending=True, count=None):
+    """
+    Order a list query and fetch one page of it
+
+    Pages are numbered (page, with a total count) unless the request passes
+    an after token, which switches to keyset pagination: the page is read
+    by seeking past the (sort key, id) of the previous page's last row, so a
+    deep page costs the same as the first. An empty after starts at the
+    first page, and total=true adds the total count, which is skipped by
+    default since it reads every matching row.
+
+    Args:
+        query: Query to paginate, without an order_by
+        sort_key: Column or expression the list is sorted by
+        id_column: Unique column breaking ties in the sort key
+        page (int): Page number, ignored when paginating by cursor
+        per_page (int): Rows per page
+        descending (bool): Whether to sort largest first
+        count: Function(query, known_total) returning (total, approximate)
+            in place of a COUNT(*) on every page, e.g. a cached result_counter
+
+    Returns:
+        tuple: (items, pagination dict)
+
+    Raises:
+        InvalidCursor: If the after token is malformed
+    """
+    after = request.args.get('after', type=str)
+    if after is not None:
+        with_total = request.args.get('total', '', type=str).lower() in ('1', 'true')
+        cursor = decode_cursor(after) if after else None
+        return keyset_paginate(query, sort_key, id_column, descending, per_page, cursor, with_total, count)
+
+    order = (sort_key.desc(), id_column.desc()) if descending else (sort_key, id_column)
+    if count is not None:
+        return counted_paginate(query.order_by(*order), page, per_page, count)
+    results = query.order_by(*order).paginate(page=page, per_page=per_page, error_out=False)
+    return results.items, {
+        'total': results.total,
+        'pages': results.pages,
+        'current_page': results.page,
+        'per_page': results.per_page,
+        'has_next': results.has_next,
+        'has_prev': results.has_prev
+    }
@@ -69,6 +69,14 @@ def create_app(config_name=None):
     from backend.api.routes import register_routes
     register_routes(app)
 
+    # background writer for recommendation tracking rows
+    from backend.api.services.recommendation_log import init_recommendation_writer
+    init_recommendation_writer(app)
+
+    # concurrent candidate generation for personalized recommendations
+    from backend.api.services.pipeline import init_recommendation_pipeline
+    init_recommendation_pipeline(app)
+
     # create database tables if they don't exist
     with app.app_context():
         # ensure database directory exists
@@ -32,6 +32,26 @@ class Config:
     JWT_HEADER_TYPE = 'Bearer'
     JWT_JSON_KEY = 'user_id'
 
+    # recommender model files written by data-processing/build_recommenders.py
+    MODEL_DIR = os.environ.get('MODEL_DIR', str(BASE_DIR.parent / 'data' / 'models'))
+    # lists scanned per approximate nearest-neighbour query - higher is more
+    # accurate and slower (None = the value tuned when the index was built)
+    ANN_NPROBE = None
+    # batch-generated recommendations older than this are recomputed live
+    PRECOMPUTED_MAX_AGE_HOURS = 24
+    # personalized recommendations blend candidate generators run in parallel;
+    # a generator missing its budget (ms) is left out of the response
+    RECOMMENDATION_PIPELINE_WORKERS = 8
+    RECOMMENDATION_BUDGETS_MS = {'als': 60, 'item_cf': 80, 'tag_based': 120, 'popular': 30}
+    # weight of each generator's normalized scores in the blended ranking
+    RECOMMENDATION_WEIGHTS = {'als': 1.0, 'item_cf': 0.8, 'tag_based': 0.5, 'popular': 0.2}
+    # served recommendations are logged by a background writer in batches
+    RECOMMENDATION_LOG_ASYNC = True
+    RECOMMENDATION_LOG_FLUSH_SECONDS = 2.0
+    RECOMMENDATION_LOG_BATCH_SIZE = 500
+    # the same (user, book, source) impression is logged once per window
+    RECOMMENDATION_LOG_DEDUP_SECONDS = 3600
+
     # API settings
     API_TITLE = 'Goodbooks API'
     API_VERSION = 'v1'
@@ -47,6 +67,11 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # tests never read trained models
+    MODEL_DIR = None
+    # the in-memory database only exists on the request's connection
+    RECOMMENDATION_LOG_ASYNC = False
+    RECOMMENDATION_PIPELINE_WORKERS = 0
 
 class ProductionConfig(Config):
     """Production configuration"""
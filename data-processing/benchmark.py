@@ -0,0 +1,135 @@
+# data-processing/benchmark.py
+
+"""
+Benchmark the ETL pipeline on a dataset directory
+
+Points the ETL at a directory of source CSV files (e.g. one written by
+generate_synthetic.py), runs it in each requested mode against a scratch
+database with the profiler enabled, and writes the per-stage timings to
+config.BENCHMARK_REPORT_FILE.
+"""
+
+import argparse
+from datetime import datetime
+import json
+import logging
+import os
+import sys
+import time
+
+import config
+from etl.profiler import profiler
+from main import run_etl_pipeline
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# keyword arguments passed to run_etl_pipeline for each mode
+MODES = {
+    'sequential': {},
+    'parallel_extract': {'workers': 5},
+    'single_pass': {'single_pass': True},
+    'streaming': {'stream': True},
+    'pipelined': {'pipelined': True, 'single_pass': True}
+}
+
+def use_data_dir(data_dir, work_dir):
+    """Point the ETL at a source directory and keep its outputs in work_dir"""
+    config.RATINGS_FILE = os.path.join(data_dir, 'ratings.csv')
+    config.TO_READ_FILE = os.path.join(data_dir, 'to_read.csv')
+    config.BOOKS_FILE = os.path.join(data_dir, 'books.csv')
+    config.BOOK_TAGS_FILE = os.path.join(data_dir, 'book_tags.csv')
+    config.TAGS_FILE = os.path.join(data_dir, 'tags.csv')
+
+    os.makedirs(work_dir, exist_ok=True)
+    config.DATABASE_URI = f'sqlite:///{os.path.join(work_dir, "benchmark.db")}'
+    config.DATA_QUALITY_REPORT_FILE = os.path.join(work_dir, 'data_quality.json')
+
+def source_sizes(data_dir):
+    """Size in MB of each source file"""
+    return {
+        name: round(os.path.getsize(os.path.join(data_dir, name)) / (1024 * 1024), 1)
+        for name in sorted(os.listdir(data_dir)) if name.endswith('.csv')
+    }
+
+def run_benchmark(data_dir, modes, repeat=1, work_dir=None):
+    """
+    Run the ETL in each mode and collect profiler reports
+
+    Args:
+        data_dir (str): Directory holding the five source CSV files
+        modes (list): Names of the modes to run (keys of MODES)
+        repeat (int): Number of runs per mode
+        work_dir (str): Scratch directory for the benchmark database
+
+    Returns:
+        dict: Benchmark results
+    """
+    work_dir = work_dir or os.path.join(data_dir, 'benchmark')
+    use_data_dir(data_dir, work_dir)
+
+    results = {
+        'started_at': datetime.now().isoformat(),
+        'data_dir': os.path.abspath(data_dir),
+        'source_mb': source_sizes(data_dir),
+        'runs': []
+    }
+
+    for mode in modes:
+        for run in range(repeat):
+            # every run starts from an empty database
+            db_path = config.DATABASE_URI.replace('sqlite:///', '')
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(db_path + suffix):
+                    os.remove(db_path + suffix)
+
+            logger.info(f'Benchmark run {run + 1}/{repeat} in {mode} mode')
+            profiler.enable()
+            start_time = time.time()
+            success = run_etl_pipeline(save_csv=False, **MODES[mode])
+            elapsed_time = time.time() - start_time
+
+            if not success:
+                raise RuntimeError(f'ETL failed in {mode} mode')
+
+            report = profiler.report()
+            results['runs'].append({
+                'mode': mode,
+                'run': run + 1,
+                'total_seconds': round(elapsed_time, 4),
+                'peak_rss_mb': report['peak_rss_mb'],
+                'stages': report['stages']
+            })
+            logger.info(f'{mode} mode finished in {elapsed_time:.2f} seconds')
+
+    return results
+
+if __name__ == '__main__':
+    # parse command line arguments
+    parser = argparse.ArgumentParser(description='Benchmark the ETL pipeline')
+    parser.add_argument('--data-dir', required=True,
+                        help='Directory holding the source CSV files')
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES),
+                        help='ETL modes to benchmark')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per mode')
+    parser.add_argument('--output', default=config.BENCHMARK_REPORT_FILE,
+                        help='Path of the JSON results file')
+    args = parser.parse_args()
+
+    try:
+        results = run_benchmark(args.data_dir, args.modes, repeat=args.repeat)
+    except Exception as e:
+        logger.error(f'Benchmark failed: {e}')
+        sys.exit(1)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    logger.info(f'Saved benchmark results to {args.output}')
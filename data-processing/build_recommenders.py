@@ -0,0 +1,107 @@
+# data-processing/build_recommenders.py
+
+"""
+Build the precomputed recommender data from the loaded database
+
+Run after main.py has loaded the cleaned data.
+"""
+
+import argparse
+import logging
+import sys
+import time
+
+from recommenders.similarity import build_tag_similarities
+from recommenders.als import build_als
+from recommenders.item_cf import build_item_cf
+from recommenders.ann import build_ann_index
+from recommenders.precompute import precompute_recommendations
+import config
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def build_recommenders(similarity=True, als=True, item_cf=True, ann=True, precompute=True,
+                       top_k=None, workers=None):
+    """
+    Build the requested recommender data
+
+    Args:
+        similarity (bool): Whether to build the tag-based book similarities
+        als (bool): Whether to train the matrix factorization model
+        item_cf (bool): Whether to build the co-rating book similarities
+        ann (bool): Whether to build the approximate nearest-neighbour index over the ALS factors
+        precompute (bool): Whether to generate every user's recommendations from the ALS model
+        top_k (int): Neighbours stored per book
+        workers (int): Worker processes for the batch recommendations
+
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    start_time = time.time()
+    logger.info('Starting recommender build')
+
+    try:
+        if similarity:
+            build_tag_similarities(top_k=top_k)
+
+        if als:
+            build_als()
+
+        if item_cf:
+            build_item_cf(top_k=top_k)
+
+        if ann:
+            build_ann_index()
+
+        if precompute:
+            precompute_recommendations(workers=workers)
+
+        elapsed_time = time.time() - start_time
+        logger.info(f'Recommender build completed in {elapsed_time:.2f} seconds')
+        return True
+
+    except Exception as e:
+        logger.error(f'Error building recommenders: {e}')
+        return False
+
+if __name__ == '__main__':
+    # parse command line arguments
+    parser = argparse.ArgumentParser(description='Build precomputed recommender data')
+    parser.add_argument('--similarity', action='store_true',
+                        help='Build tag-based book similarities (default: build everything)')
+    parser.add_argument('--als', action='store_true',
+                        help='Train the matrix factorization model')
+    parser.add_argument('--item-cf', action='store_true',
+                        help='Build co-rating (item-based collaborative filtering) book similarities')
+    parser.add_argument('--ann', action='store_true',
+                        help='Build the approximate nearest-neighbour index and check its recall')
+    parser.add_argument('--precompute', action='store_true',
+                        help="Generate every user's top recommendations from the ALS model")
+    parser.add_argument('--top-k', type=int, default=None,
+                        help=f'Neighbours stored per book (default: {config.SIMILARITY_TOP_K})')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Worker processes for the batch recommendations (default: one per CPU)')
+    args = parser.parse_args()
+
+    # with no selection, build everything
+    build_all = not (args.similarity or args.als or args.item_cf or args.ann or args.precompute)
+    success = build_recommenders(
+        similarity=args.similarity or build_all,
+        als=args.als or build_all,
+        item_cf=args.item_cf or build_all,
+        ann=args.ann or build_all,
+        precompute=args.precompute or build_all,
+        top_k=args.top_k,
+        workers=args.workers
+    )
+
+    sys.exit(0 if success else 1)
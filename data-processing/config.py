@@ -13,6 +13,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # data directories
 RAW_DATA_DIR = os.path.join(BASE_DIR, 'data', 'raw')
 PROCESSED_DATA_DIR = os.path.join(BASE_DIR, 'data', 'processed')
+SYNTHETIC_DATA_DIR = os.path.join(BASE_DIR, 'data', 'synthetic')
 
 # input files
 RATINGS_FILE = os.path.join(RAW_DATA_DIR, 'ratings.csv')
@@ -28,16 +29,86 @@ CLEAN_BOOKS_FILE = os.path.join(PROCESSED_DATA_DIR, 'books_clean.csv')
 CLEAN_BOOK_TAGS_FILE = os.path.join(PROCESSED_DATA_DIR, 'book_tags_clean.csv')
 CLEAN_TAGS_FILE = os.path.join(PROCESSED_DATA_DIR, 'tags_clean.csv')
 
+# columnar binary output - one raw array file per column plus a manifest
+BINARY_DATA_DIR = os.path.join(PROCESSED_DATA_DIR, 'binary')
+BINARY_MANIFEST_FILE = os.path.join(BINARY_DATA_DIR, 'manifest.json')
+
+# manifest of source file fingerprints used by incremental runs
+ETL_MANIFEST_FILE = os.path.join(PROCESSED_DATA_DIR, 'etl_manifest.json')
+
+# extraction settings
+# number of rows read per chunk when streaming the ratings file
+RATINGS_CHUNK_SIZE = 500000
+# compact dtypes - ids fit comfortably in int32 and ratings are 1-5
+RATINGS_DTYPES = {'user_id': 'int32', 'book_id': 'int32', 'rating': 'int8'}
+# dtypes the ratings file is parsed with - nullable and wide, so blank fields
+# and out-of-range values reach the cleaning step instead of failing the read
+# or wrapping around; cleaned chunks are cast down to RATINGS_DTYPES
+RATINGS_READ_DTYPES = {'user_id': 'Int64', 'book_id': 'Int64', 'rating': 'Int64'}
+# number of threads used to read the source files (1 = sequential)
+EXTRACT_WORKERS = 1
+# maximum number of chunks waiting between two stages of the pipelined ETL
+PIPELINE_QUEUE_SIZE = 4
+
 # database connection
 # update with actual database connection details
 DATABASE_URI = 'sqlite:///database/goodbooks.db'    # for development
 # for productions, consider using env variables:
 # DATABASE_URI = os.environ.get('DATABASE_URI', 'sqlite:///database/goodbooks.db')
 
+# bulk load settings
+# rows per executemany call - each table is still loaded in one transaction
+BULK_LOAD_BATCH_SIZE = 100000
+# pragmas applied to the loading connection only
+BULK_LOAD_PRAGMAS = {
+    'journal_mode': 'WAL',      # readers keep working while a table is loaded
+    'synchronous': 'OFF',       # the staging swap is the only commit that matters
+    'cache_size': -262144,      # 256 MB page cache (negative values are KiB)
+    'temp_store': 'MEMORY'
+}
+
+# recommender settings
+# neighbours stored per book by build_recommenders.py
+SIMILARITY_TOP_K = 50
+# maximum number of similarity scores held in memory at once (books per block x all books)
+SIMILARITY_BLOCK_CELLS = 20000000
+# trained model files, read memory-mapped by the backend
+MODEL_DIR = os.path.join(BASE_DIR, 'data', 'models')
+# matrix factorization (ALS) settings
+ALS_FACTORS = 32
+ALS_ITERATIONS = 10
+ALS_REGULARIZATION = 0.05
+# conjugate-gradient steps per least-squares solve (warm-started, so a few are enough)
+ALS_CG_STEPS = 3
+# ratings gathered per block - bounds the (ratings x factors) temporary
+ALS_BLOCK_RATINGS = 1000000
+# approximate nearest-neighbour (IVF) index over the ALS book factors
+# inverted lists (None = 4 * sqrt(books))
+ANN_LISTS = None
+ANN_KMEANS_ITERATIONS = 15
+# the smallest nprobe reaching this recall against brute force becomes the default
+ANN_TARGET_RECALL = 0.95
+# neighbours compared per query, and number of sampled users, in the recall check
+ANN_RECALL_K = 10
+ANN_RECALL_QUERIES = 1000
+# batch recommendation settings
+# recommendations stored per user
+PRECOMPUTE_TOP_N = 50
+# users per process-pool task (one contiguous user id range)
+PRECOMPUTE_USERS_PER_TASK = 5000
+# worker processes (None = one per CPU)
+PRECOMPUTE_WORKERS = None
+
 # logging configuration
 LOG_LEVEL = 'INFO'
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 LOG_FILE = os.path.join(BASE_DIR, 'logs', 'etl.log')
+# data-quality report written by the single-pass transform
+DATA_QUALITY_REPORT_FILE = os.path.join(BASE_DIR, 'logs', 'data_quality.json')
+# per-stage metrics written by --profile
+PROFILE_REPORT_FILE = os.path.join(BASE_DIR, 'logs', 'etl_profile.json')
+# results written by benchmark.py
+BENCHMARK_REPORT_FILE = os.path.join(BASE_DIR, 'logs', 'etl_benchmark.json')
 
 # ensure directories exist
 os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
@@ -0,0 +1,287 @@
+# data-processing/etl/bulk_load.py
+
+"""
+Bulk load module - Fast loading of cleaned data into SQLite
+"""
+
+import logging
+import re
+import sqlite3
+from pathlib import Path
+import sys
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateTable, CreateIndex
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+from etl.profiler import profiler
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# caches derived from a table, emptied in the same transaction that replaces it
+DERIVED_TABLES = {
+    'books': ['user_tag_profiles'],
+    'ratings': ['user_tag_profiles'],
+    'book_tags': ['user_tag_profiles']
+}
+
+# full-text index over the searchable book columns, read by the backend's search
+# (database/migrations/create_migrations.py creates the same index)
+BOOKS_FTS_STATEMENTS = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, original_title, authors,
+        content='books', content_rowid='book_id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    # triggers keep the index in sync with writes outside the bulk loader
+    """CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts (rowid, title, original_title, authors)
+        VALUES (new.book_id, new.title, new.original_title, new.authors);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, original_title, authors)
+        VALUES ('delete', old.book_id, old.title, old.original_title, old.authors);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, original_title, authors ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, original_title, authors)
+        VALUES ('delete', old.book_id, old.title, old.original_title, old.authors);
+        INSERT INTO books_fts (rowid, title, original_title, authors)
+        VALUES (new.book_id, new.title, new.original_title, new.authors);
+    END""",
+    "INSERT INTO books_fts (books_fts) VALUES ('rebuild')"
+]
+
+def sqlite_path(database_uri):
+    """Get the file path from a SQLite database URI"""
+    if not database_uri.startswith('sqlite:///'):
+        raise ValueError(f'Bulk loading is only supported for SQLite, got {database_uri}')
+    return database_uri.replace('sqlite:///', '', 1)
+
+class BulkLoader:
+    """
+    Loads DataFrames into SQLite through staging tables
+
+    Each table is written to a staging copy with the declared schema inside a
+    single transaction using large executemany batches, then swapped in place
+    of the live table so readers never see a partially loaded table. Secondary
+    indexes are only built once the rows are in, which is much cheaper than
+    maintaining them during the insert.
+
+    Usage:
+        with BulkLoader(metadata) as loader:
+            loader.load_table('books', books_df)
+    """
+
+    def __init__(self, metadata, database_uri=None, batch_size=None):
+        """
+        Args:
+            metadata: SQLAlchemy MetaData holding the declared tables
+            database_uri (str): SQLite database URI (defaults to config.DATABASE_URI)
+            batch_size (int): Rows per executemany call (defaults to config.BULK_LOAD_BATCH_SIZE)
+        """
+        self.metadata = metadata
+        self.db_path = sqlite_path(database_uri or config.DATABASE_URI)
+        self.batch_size = batch_size or config.BULK_LOAD_BATCH_SIZE
+        self.conn = None
+        self.rows_loaded = {}
+
+    def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self.conn is not None and self.conn.in_transaction:
+            self.conn.rollback()
+        self.close()
+
+    def connect(self):
+        """Open the connection and apply the load-tuned pragmas"""
+        # autocommit mode - transactions are managed explicitly below
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+        for pragma, value in config.BULK_LOAD_PRAGMAS.items():
+            self.conn.execute(f'PRAGMA {pragma} = {value}')
+        # the swap drops a parent table, which must not cascade
+        self.conn.execute('PRAGMA foreign_keys = OFF')
+
+    def close(self):
+        """Close the connection"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    @staticmethod
+    def staging_name(table_name):
+        """Name of the staging table for a table"""
+        return f'{table_name}__staging'
+
+    def staging_schema(self, table_name):
+        """
+        Build the CREATE TABLE statement for a staging table
+
+        The live table's schema is reused so columns added by migrations
+        survive the load. If it has no primary key (e.g. a table written by
+        an older pandas load) the declared schema is used instead.
+        """
+        row = self.conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table_name,)
+        ).fetchone()
+        sql = row[0] if row else None
+        if sql is None or 'PRIMARY KEY' not in sql.upper():
+            sql = str(CreateTable(self.metadata.tables[table_name]).compile(dialect=sqlite.dialect()))
+
+        pattern = r'CREATE TABLE\s+(["`\[]?){}["`\]]?'.format(re.escape(table_name))
+        return re.sub(pattern, f'CREATE TABLE "{self.staging_name(table_name)}"', sql, count=1)
+
+    def table_columns(self, table_name):
+        """Get the column names of a table"""
+        return [row[1] for row in self.conn.execute(f'PRAGMA table_info("{table_name}")')]
+
+    def begin(self, table_name):
+        """Start a transaction and create an empty staging table"""
+        staging = self.staging_name(table_name)
+        self.conn.execute('BEGIN IMMEDIATE')
+        self.conn.execute(f'DROP TABLE IF EXISTS "{staging}"')
+        self.conn.execute(self.staging_schema(table_name))
+        self.rows_loaded[table_name] = 0
+
+    def keep_rows(self, table_name, where, params=()):
+        """
+        Copy the rows of the live table matching a condition into the staging table
+
+        Used when a load only replaces part of a table, e.g. one source of
+        book_similarities, so the other rows survive the swap.
+        """
+        staging = self.staging_name(table_name)
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,)
+        ).fetchone()
+        if not exists:
+            return 0
+
+        column_list = ', '.join(f'"{col}"' for col in self.table_columns(staging))
+        cursor = self.conn.execute(
+            f'INSERT INTO "{staging}" ({column_list}) SELECT {column_list} FROM "{table_name}" WHERE {where}',
+            params
+        )
+        return cursor.rowcount
+
+    def insert(self, table_name, df):
+        """Insert a DataFrame into the staging table in executemany batches"""
+        staging = self.staging_name(table_name)
+        table_columns = set(self.table_columns(staging))
+        columns = [col for col in df.columns if col in table_columns]
+
+        skipped = [col for col in df.columns if col not in table_columns]
+        if skipped:
+            logger.warning(f'Skipping columns not in {table_name} schema: {skipped}')
+
+        column_list = ', '.join(f'"{col}"' for col in columns)
+        placeholders = ', '.join('?' for _ in columns)
+        statement = f'INSERT INTO "{staging}" ({column_list}) VALUES ({placeholders})'
+
+        with profiler.measure('load', table_name, rows_in=len(df)):
+            for start in range(0, len(df), self.batch_size):
+                batch = df.iloc[start:start + self.batch_size]
+                self.conn.executemany(statement, self.batch_rows(batch, columns))
+
+        self.rows_loaded[table_name] += len(df)
+
+    @staticmethod
+    def batch_rows(batch, columns):
+        """Convert a batch to rows of Python values, with missing values as NULL"""
+        values = []
+        for col in columns:
+            series = batch[col]
+            col_values = series.tolist()
+            missing = series.isna().to_numpy()
+            if missing.any():
+                col_values = [None if m else v for v, m in zip(col_values, missing)]
+            values.append(col_values)
+        return zip(*values)
+
+    def build_indexes(self, table_name):
+        """Build the declared secondary indexes of a table"""
+        for index in sorted(self.metadata.tables[table_name].indexes, key=lambda index: index.name):
+            self.conn.execute(str(CreateIndex(index, if_not_exists=True).compile(dialect=sqlite.dialect())))
+            logger.info(f'Built index {index.name}')
+
+    def live_indexes(self, table_name):
+        """Get the (name, sql) of the explicitly created indexes of the live table"""
+        return self.conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table_name,)
+        ).fetchall()
+
+    def restore_indexes(self, table_name, indexes):
+        """
+        Re-create the old table's indexes the declared schema does not cover
+
+        Indexes added by backend migrations (e.g. the keyset pagination ones
+        on columns the ETL does not load) are not in the ETL metadata, so
+        they would otherwise be lost with the dropped table.
+        """
+        existing = {row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ?", (table_name,)
+        )}
+        for name, sql in indexes:
+            if name in existing:
+                continue
+            try:
+                self.conn.execute(sql)
+                logger.info(f'Restored index {name}')
+            except sqlite3.OperationalError as e:
+                # the staging table fell back to the declared schema without the indexed columns
+                logger.warning(f'Could not restore index {name} on {table_name}: {str(e)}')
+
+    def build_search_index(self, table_name):
+        """Rebuild the full-text index and its triggers after the books table is replaced"""
+        if table_name != 'books':
+            return
+        for statement in BOOKS_FTS_STATEMENTS:
+            self.conn.execute(statement)
+        logger.info('Built full-text index books_fts')
+
+    def clear_derived(self, table_name):
+        """Empty the existing caches derived from a table"""
+        for derived in DERIVED_TABLES.get(table_name, []):
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (derived,)
+            ).fetchone()
+            if exists:
+                self.conn.execute(f'DELETE FROM "{derived}"')
+                logger.info(f'Cleared {derived} after reloading {table_name}')
+
+    def bump_data_version(self):
+        """Increment PRAGMA user_version so the backend drops values cached from the old data"""
+        version = self.conn.execute('PRAGMA user_version').fetchone()[0]
+        self.conn.execute(f'PRAGMA user_version = {version + 1}')
+
+    def swap(self, table_name):
+        """Replace the live table with the staging table, index it and commit"""
+        with profiler.measure('load', table_name):
+            indexes = self.live_indexes(table_name)
+            self.conn.execute(f'DROP TABLE IF EXISTS "{table_name}"')
+            self.conn.execute(f'ALTER TABLE "{self.staging_name(table_name)}" RENAME TO "{table_name}"')
+            self.build_indexes(table_name)
+            self.restore_indexes(table_name, indexes)
+            self.build_search_index(table_name)
+            self.clear_derived(table_name)
+            self.bump_data_version()
+            self.conn.execute('COMMIT')
+        return self.rows_loaded.pop(table_name)
+
+    def load_table(self, table_name, df):
+        """Load a whole DataFrame into a table"""
+        self.begin(table_name)
+        self.insert(table_name, df)
+        return self.swap(table_name)
@@ -5,13 +5,19 @@ Extract module - Reads raw data from source files
 """
 
 import pandas as pd
+import numpy as np
+import json
 import logging
+import os
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 import sys
+import time
 
 # add parent directory to path to import config
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from etl.profiler import profiler, profiled_chunks
 
 # set up logging
 logging.basicConfig(
@@ -35,6 +41,33 @@ def extract_ratings():
         logger.error(f"Error extracting ratings data: {e}")
         raise
 
+def extract_ratings_chunks(chunk_size=None):
+    """
+    Stream ratings data from CSV file in chunks
+
+    Peak memory is bounded by the chunk size rather than the size of the
+    file. Columns are read as nullable integers so bad rows can be dropped
+    and counted by clean_ratings_chunks, which casts them to the compact dtypes.
+
+    Args:
+        chunk_size (int): Number of rows per chunk (defaults to config.RATINGS_CHUNK_SIZE)
+
+    Yields:
+        DataFrame: The next chunk of ratings records
+    """
+    chunk_size = chunk_size or config.RATINGS_CHUNK_SIZE
+    logger.info(f'Streaming ratings data from {config.RATINGS_FILE} in chunks of {chunk_size}')
+    try:
+        total = 0
+        reader = pd.read_csv(config.RATINGS_FILE, dtype=config.RATINGS_READ_DTYPES, chunksize=chunk_size)
+        for chunk in profiled_chunks(reader, 'extract', 'ratings'):
+            total += len(chunk)
+            yield chunk
+        logger.info(f'Successfully streamed {total} ratings records')
+    except Exception as e:
+        logger.error(f"Error streaming ratings data: {e}")
+        raise
+
 def extract_to_read():
     """Extract to-read data from CSV file"""
     logger.info(f'Extracting to-read data from {config.TO_READ_FILE}')
@@ -79,20 +112,105 @@ def extract_tags():
         logger.error(f"Error extracting tags data: {e}")
         raise
 
-def extract_all():
-    """Extract all data sources"""
+def timed_extract(table_name, extract_function):
+    """Run a single extraction and log how long it took"""
+    start_time = time.time()
+    with profiler.measure('extract', table_name) as measurement:
+        df = extract_function()
+        measurement.rows_in = len(df)
+    elapsed_time = time.time() - start_time
+    logger.info(f'Extracted {table_name} in {elapsed_time:.2f} seconds')
+    return df
+
+def extract_all(include_ratings=True, workers=1, tables=None):
+    """
+    Extract all data sources
+
+    The source files are independent, so with more than one worker they are
+    read concurrently and the total time approaches that of the slowest file.
+
+    Args:
+        include_ratings (bool): Whether to extract ratings (skipped when they are streamed)
+        workers (int): Number of threads used to read the files concurrently
+        tables (list): Only extract these tables (defaults to all of them)
+    """
+    extractors = {
+        'ratings': extract_ratings,
+        'to_read': extract_to_read,
+        'books': extract_books,
+        'book_tags': extract_book_tags,
+        'tags': extract_tags
+    }
+    if tables is not None:
+        extractors = {name: func for name, func in extractors.items() if name in tables}
+    if not include_ratings:
+        extractors.pop('ratings', None)
+
     data = {}
     try:
-        data['ratings'] = extract_ratings()
-        data['to_read'] = extract_to_read()
-        data['books'] = extract_books()
-        data['book_tags'] = extract_book_tags()
-        data['tags'] = extract_tags()
+        if workers and workers > 1:
+            # the CSV parser releases the GIL, so threads read files in parallel
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    table_name: executor.submit(timed_extract, table_name, extract_function)
+                    for table_name, extract_function in extractors.items()
+                }
+                for table_name, future in futures.items():
+                    data[table_name] = future.result()
+        else:
+            for table_name, extract_function in extractors.items():
+                data[table_name] = timed_extract(table_name, extract_function)
         return data
     except Exception as e:
         logger.error(f'Error in extract_all: {e}')
         raise
 
+def extract_processed_arrays(table_name, mmap=True):
+    """
+    Read a processed table saved in the columnar binary format
+
+    Args:
+        table_name (str): Name of the table
+        mmap (bool): Whether to memory-map the column files instead of reading them
+
+    Returns:
+        dict: Column name to NumPy array
+    """
+    with open(config.BINARY_MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    table = manifest['tables'][table_name]
+    table_dir = os.path.join(config.BINARY_DATA_DIR, table_name)
+
+    arrays = {}
+    for col, info in table['columns'].items():
+        path = os.path.join(table_dir, info['file'])
+        dtype = np.dtype(info['dtype'])
+        if table['rows'] == 0:
+            arrays[col] = np.empty(0, dtype=dtype)
+        elif mmap:
+            arrays[col] = np.memmap(path, dtype=dtype, mode='r', shape=(table['rows'],))
+        else:
+            arrays[col] = np.fromfile(path, dtype=dtype)
+    return arrays
+
+def extract_processed(table_name, mmap=True):
+    """Read a processed table saved in the columnar binary format as a DataFrame"""
+    logger.info(f'Extracting processed {table_name} data from {config.BINARY_DATA_DIR}')
+    try:
+        with profiler.measure('extract', table_name) as measurement:
+            df = pd.DataFrame(extract_processed_arrays(table_name, mmap=mmap))
+            measurement.rows_in = len(df)
+        logger.info(f'Successfully extracted {len(df)} processed {table_name} records')
+        return df
+    except Exception as e:
+        logger.error(f"Error extracting processed {table_name} data: {e}")
+        raise
+
+def extract_all_processed(mmap=True):
+    """Extract all processed tables saved in the columnar binary format"""
+    table_names = ['ratings', 'to_read', 'books', 'book_tags', 'tags']
+    return {table_name: extract_processed(table_name, mmap=mmap) for table_name in table_names}
+
 if __name__ == "__main__":
     # text extraction functionality
     extract_all()
\ No newline at end of file
@@ -5,14 +5,20 @@ Load module - Saves transformed data to files and database
 """
 
 import pandas as pd
+import numpy as np
+import json
 import logging
 import os
 from pathlib import Path
 import sys
-from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, Float, ForeignKey
+from sqlalchemy import (create_engine, MetaData, Table, Column, Integer, String, Float, DateTime,
+                        Text, ForeignKey, Index)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from etl.bulk_load import BulkLoader
+from etl.profiler import profiler
+
 # add parent directory to path to import config
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
@@ -31,6 +37,24 @@ logger = logging.getLogger(__name__)
 # setup database connection
 Base = declarative_base()
 
+# output file and log label for each table
+CSV_FILES = {
+    'ratings': (config.CLEAN_RATINGS_FILE, 'ratings'),
+    'to_read': (config.CLEAN_TO_READ_FILE, 'to-read'),
+    'books': (config.CLEAN_BOOKS_FILE, 'books'),
+    'book_tags': (config.CLEAN_BOOK_TAGS_FILE, 'book tags'),
+    'tags': (config.CLEAN_TAGS_FILE, 'tags')
+}
+
+# tables are loaded parents first so foreign keys resolve
+DB_LOAD_ORDER = [
+    ('books', 'books'),
+    ('ratings', 'ratings'),
+    ('to_read', 'to-read entries'),
+    ('tags', 'tags'),
+    ('book_tags', 'book tags')
+]
+
 def save_to_csv(data_dict):
     """Save cleaned data to CSV files"""
     logger.info('Saving cleaned data to CSV files')
@@ -39,25 +63,118 @@ def save_to_csv(data_dict):
     os.makedirs(config.PROCESSED_DATA_DIR, exist_ok=True)
 
     # save each dataframe to its respective CSV file
-    data_dict['ratings'].to_csv(config.CLEAN_RATINGS_FILE, index=False)
-    logger.info(f'Saved clean ratings to {config.CLEAN_RATINGS_FILE}')
-
-    data_dict['to_read'].to_csv(config.CLEAN_TO_READ_FILE, index=False)
-    logger.info(f'Saved clean to-read to {config.TO_READ_FILE}')
+    # tables can be absent when streamed separately or skipped by an incremental run
+    for table_name, (path, label) in CSV_FILES.items():
+        if table_name in data_dict:
+            with profiler.measure('save_csv', table_name, rows_in=len(data_dict[table_name])):
+                data_dict[table_name].to_csv(path, index=False)
+            logger.info(f'Saved clean {label} to {path}')
 
-    data_dict['books'].to_csv(config.CLEAN_BOOKS_FILE, index=False)
-    logger.info(f'Saved clean books to {config.CLEAN_BOOKS_FILE}')
-
-    data_dict['book_tags'].to_csv(config.CLEAN_BOOK_TAGS_FILE, index=False)
-    logger.info(f'Saved clean book tags to {config.CLEAN_BOOK_TAGS_FILE}')
+    return True
 
-    data_dict['tags'].to_csv(config.CLEAN_TAGS_FILE, index=False)
-    logger.info(f'Saved clean tags to {config.CLEAN_TAGS_FILE}')
+def save_chunk_to_csv(df, path, append=False):
+    """Save a chunk of cleaned data to CSV, appending after the first chunk"""
+    df.to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+
+def read_binary_manifest():
+    """Read the manifest describing the binary tables, or an empty one"""
+    if not os.path.exists(config.BINARY_MANIFEST_FILE):
+        return {'tables': {}}
+    with open(config.BINARY_MANIFEST_FILE) as f:
+        return json.load(f)
+
+def write_binary_manifest(manifest):
+    """Write the manifest describing the binary tables"""
+    os.makedirs(config.BINARY_DATA_DIR, exist_ok=True)
+    with open(config.BINARY_MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def column_to_array(series):
+    """Convert a column to a fixed-width NumPy array that can be memory-mapped"""
+    if series.dtype == object:
+        # text columns become fixed-width unicode strings
+        return series.fillna('').astype(str).to_numpy(dtype=str)
+    return series.to_numpy()
+
+def save_table_to_binary(table_name, df, append=False):
+    """
+    Save a table as one raw array file per column
+
+    Args:
+        table_name (str): Name of the table
+        df (DataFrame): Cleaned data
+        append (bool): Whether to append to an existing table (for streamed chunks)
+    """
+    with profiler.measure('save_binary', table_name, rows_in=len(df)):
+        write_binary_table(table_name, df, append)
+
+def write_binary_table(table_name, df, append):
+    """Write the column files of a table and update the manifest"""
+    table_dir = os.path.join(config.BINARY_DATA_DIR, table_name)
+    os.makedirs(table_dir, exist_ok=True)
+
+    manifest = read_binary_manifest()
+    existing = manifest['tables'].get(table_name) if append else None
+
+    columns = {}
+    for col in df.columns:
+        array = column_to_array(df[col])
+        file_name = f'{col}.bin'
+        if existing:
+            # every chunk of a column shares one dtype, widened to fit the longest text so far
+            dtype = common_dtype(table_name, col, np.dtype(existing['columns'][col]['dtype']), array.dtype)
+            if dtype != existing['columns'][col]['dtype']:
+                widen_column_file(os.path.join(table_dir, file_name), existing['rows'],
+                                  np.dtype(existing['columns'][col]['dtype']), dtype)
+            array = array.astype(dtype)
+
+        with open(os.path.join(table_dir, file_name), 'ab' if existing else 'wb') as f:
+            array.tofile(f)
+        columns[col] = {'file': file_name, 'dtype': array.dtype.str}
+
+    rows = len(df) + (existing['rows'] if existing else 0)
+    manifest['tables'][table_name] = {'rows': rows, 'columns': columns}
+    write_binary_manifest(manifest)
+
+def common_dtype(table_name, col, written, appended):
+    """
+    Dtype that holds both the rows already written and an appended chunk
+
+    Raises:
+        ValueError: If the chunk changes a column between text and numbers
+    """
+    if (written.kind == 'U') != (appended.kind == 'U'):
+        raise ValueError(f'Cannot append {appended} values to {table_name}.{col} stored as {written}')
+    return np.promote_types(written, appended)
+
+def widen_column_file(path, rows, written, dtype):
+    """Rewrite a column file with a wider dtype so longer values fit"""
+    array = np.fromfile(path, dtype=written, count=rows).astype(dtype)
+    with open(path, 'wb') as f:
+        array.tofile(f)
+
+def save_to_binary(data_dict):
+    """Save cleaned data in a columnar binary format"""
+    logger.info('Saving cleaned data to binary files')
+
+    for table_name, df in data_dict.items():
+        save_table_to_binary(table_name, df)
+        logger.info(f'Saved {len(df)} {table_name} records to {config.BINARY_DATA_DIR}')
 
     return True
 
 def create_db_tables(engine):
     """Create database tables if they don't exist"""
+    # the models are only declared once per process
+    if not Base.metadata.tables:
+        declare_models()
+
+    # create all tables
+    Base.metadata.create_all(engine)
+    logger.info('Database tables created')
+
+def declare_models():
+    """Declare the SQLAlchemy models on Base"""
     # define the SQLAlchemy models (matching ERD)
 
     # define Book model
@@ -65,19 +182,19 @@ def create_db_tables(engine):
         __tablename__ = 'books'
 
         book_id = Column(Integer, primary_key=True)
-        goodreads_book_id = Column(Integer)
+        goodreads_book_id = Column(Integer, index=True)
         best_book_id = Column(Integer)
         work_id = Column(Integer)
         books_count = Column(Integer)
         isbn = Column(String(20))
         isbn13 = Column(Float)
-        authors = Column(String(255))
-        original_publication_year = Column(Float)
+        authors = Column(String(255), index=True)
+        original_publication_year = Column(Float, index=True)
         original_title = Column(String(255))
-        title = Column(String(255))
+        title = Column(String(255), index=True)
         language_code = Column(String(10))
-        average_rating = Column(Float)
-        ratings_count = Column(Integer)
+        average_rating = Column(Float, index=True)
+        ratings_count = Column(Integer, index=True)
         work_ratings_count = Column(Integer)
         work_text_reviews_count = Column(Integer)
         ratings_1 = Column(Integer)
@@ -92,8 +209,8 @@ def create_db_tables(engine):
     class Rating(Base):
         __tablename__ = 'ratings'
 
-        user_id = Column(Integer, primary_key=True)
-        book_id = Column(Integer, ForeignKey('books.book_id'), primary_key=True)
+        user_id = Column(Integer, primary_key=True, index=True)
+        book_id = Column(Integer, ForeignKey('books.book_id'), primary_key=True, index=True)
         rating = Column(Integer)
 
     # define ToRead model
@@ -115,12 +232,42 @@ def create_db_tables(engine):
         __tablename__ = 'book_tags'
 
         goodreads_book_id = Column(Integer, primary_key=True)
-        tag_id = Column(Integer, ForeignKey('tags.tag_id'), primary_key=True)
+        tag_id = Column(Integer, ForeignKey('tags.tag_id'), primary_key=True, index=True)
         count = Column(Integer)
 
-    # create all tables
-    Base.metadata.create_all(engine)
-    logger.info('Database tables created')
+    # define BookSimilarity model (written by build_recommenders.py)
+    class BookSimilarity(Base):
+        __tablename__ = 'book_similarities'
+
+        source = Column(String(20), primary_key=True)
+        book_id = Column(Integer, ForeignKey('books.book_id'), primary_key=True)
+        rank = Column(Integer, primary_key=True)
+        similar_book_id = Column(Integer, ForeignKey('books.book_id'))
+        score = Column(Float)
+
+    # define Recommendation model (batch rows written by build_recommenders.py)
+    class Recommendation(Base):
+        __tablename__ = 'recommendations'
+
+        recommendation_id = Column(Integer, primary_key=True)
+        user_id = Column(Integer)
+        book_id = Column(Integer, ForeignKey('books.book_id'))
+        score = Column(Float)
+        source = Column(String(50))
+        generated_at = Column(DateTime)
+        rank = Column(Integer)
+
+        __table_args__ = (
+            Index('ix_recommendations_user_source_rank', 'user_id', 'source', 'rank'),
+        )
+
+    # define UserTagProfile model (written by the backend, cleared when its inputs are reloaded)
+    class UserTagProfile(Base):
+        __tablename__ = 'user_tag_profiles'
+
+        user_id = Column(Integer, primary_key=True)
+        tag_weights = Column(Text)
+        updated_at = Column(DateTime)
 
 def load_to_database(data_dict):
     """Load cleaned data to database"""
@@ -133,21 +280,13 @@ def load_to_database(data_dict):
         # create tables if they don't exist
         create_db_tables(engine)
 
-        # load data into database
-        data_dict['books'].to_sql('books', engine, if_exists='replace', index=False)
-        logger.info(f"Loaded {len(data_dict['books'])} books into database")
-
-        data_dict['ratings'].to_sql('ratings', engine, if_exists='replace', index=False)
-        logger.info(f"Loaded {len(data_dict['ratings'])} ratings into database")
-
-        data_dict['to_read'].to_sql('to_read', engine, if_exists='replace', index=False)
-        logger.info(f"Loaded {len(data_dict['to_read'])} to-read entries into database")
-
-        data_dict['tags'].to_sql('tags', engine, if_exists='replace', index=False)
-        logger.info(f"Loaded {len(data_dict['tags'])} tags into database")
-
-        data_dict['book_tags'].to_sql('book_tags', engine, if_exists='replace', index=False)
-        logger.info(f"Loaded {len(data_dict['book_tags'])} book tags into database")
+        # load data into database through staging tables
+        # tables can be absent when streamed separately or skipped by an incremental run
+        with BulkLoader(Base.metadata) as loader:
+            for table_name, label in DB_LOAD_ORDER:
+                if table_name in data_dict:
+                    rows = loader.load_table(table_name, data_dict[table_name])
+                    logger.info(f"Loaded {rows} {label} into database")
 
         return True
     
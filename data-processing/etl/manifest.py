@@ -0,0 +1,153 @@
+# data-processing/etl/manifest.py
+
+"""
+Manifest module - Tracks source files so unchanged tables can be skipped
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import sys
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# source file for each table
+SOURCE_FILES = {
+    'ratings': config.RATINGS_FILE,
+    'to_read': config.TO_READ_FILE,
+    'books': config.BOOKS_FILE,
+    'book_tags': config.BOOK_TAGS_FILE,
+    'tags': config.TAGS_FILE
+}
+
+# code that determines the cleaned output of every table
+TRANSFORM_CODE_FILES = [
+    os.path.join(Path(__file__).resolve().parent, 'transform.py')
+]
+
+# config settings that determine the cleaned output - the rest of config.py
+# (paths, workers, queue sizes, logging) can change without reprocessing
+TRANSFORM_SETTINGS = ['RATINGS_READ_DTYPES', 'RATINGS_DTYPES']
+
+def hash_file(path, block_size=1 << 20):
+    """Compute the SHA-256 hash of a file's contents"""
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+def transform_code_hash():
+    """Hash the transform code and settings so a change to them invalidates every table"""
+    sha256 = hashlib.sha256()
+    for path in TRANSFORM_CODE_FILES:
+        sha256.update(hash_file(path).encode())
+    settings = {name: getattr(config, name) for name in TRANSFORM_SETTINGS}
+    sha256.update(json.dumps(settings, sort_keys=True).encode())
+    return sha256.hexdigest()
+
+def read_manifest():
+    """Read the manifest from the last successful run, or an empty one"""
+    if not os.path.exists(config.ETL_MANIFEST_FILE):
+        return {'tables': {}}
+    with open(config.ETL_MANIFEST_FILE) as f:
+        return json.load(f)
+
+def write_manifest(manifest):
+    """Write the manifest for the current run"""
+    with open(config.ETL_MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+def fingerprint_source(table_name, previous=None):
+    """
+    Fingerprint the source file of a table
+
+    The content hash is only recomputed when the size or modification time
+    differs from the previous fingerprint, so a no-op check is cheap.
+
+    Args:
+        table_name (str): Name of the table
+        previous (dict): Fingerprint recorded by the last run, if any
+
+    Returns:
+        dict: Size, modification time and content hash of the source file
+    """
+    stat = os.stat(SOURCE_FILES[table_name])
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    if previous and previous.get('size') == stat.st_size and previous.get('mtime_ns') == stat.st_mtime_ns:
+        fingerprint['sha256'] = previous['sha256']
+    else:
+        fingerprint['sha256'] = hash_file(SOURCE_FILES[table_name])
+    return fingerprint
+
+def find_stale_tables(outputs, transform_mode):
+    """
+    Find tables whose inputs, transform code or transform mode changed since the last run
+
+    Args:
+        outputs (list): Outputs requested for this run (e.g. 'csv', 'db')
+        transform_mode (str): 'single_pass' or 'classic', since the two
+            transforms do not clean every table identically
+
+    Returns:
+        tuple: (list of stale table names, dict of current fingerprints)
+    """
+    manifest = read_manifest()
+    code_hash = transform_code_hash()
+
+    stale_tables = []
+    fingerprints = {}
+    for table_name in SOURCE_FILES:
+        previous = manifest['tables'].get(table_name)
+        fingerprint = fingerprint_source(table_name, previous)
+        fingerprint['transform_hash'] = code_hash
+        fingerprint['transform_mode'] = transform_mode
+        fingerprints[table_name] = fingerprint
+
+        if (not previous
+                or previous['sha256'] != fingerprint['sha256']
+                or previous['transform_hash'] != code_hash
+                or previous.get('transform_mode') != transform_mode
+                or not set(outputs) <= set(previous.get('outputs', []))):
+            stale_tables.append(table_name)
+        else:
+            logger.info(f'Skipping {table_name}: source, transform code and mode unchanged')
+
+    return stale_tables, fingerprints
+
+def update_manifest(table_names, fingerprints, outputs):
+    """
+    Record the tables processed by a successful run
+
+    Args:
+        table_names (list): Tables that were processed
+        fingerprints (dict): Fingerprints computed by find_stale_tables
+        outputs (list): Outputs produced for those tables
+    """
+    manifest = read_manifest()
+    for table_name in table_names:
+        manifest['tables'][table_name] = dict(fingerprints[table_name], outputs=sorted(outputs))
+
+    # unchanged tables keep their entries but pick up the new modification times
+    for table_name, fingerprint in fingerprints.items():
+        if table_name not in table_names and table_name in manifest['tables']:
+            manifest['tables'][table_name]['mtime_ns'] = fingerprint['mtime_ns']
+
+    write_manifest(manifest)
+    logger.info(f'Updated ETL manifest at {config.ETL_MANIFEST_FILE}')
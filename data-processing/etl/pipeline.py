@@ -0,0 +1,202 @@
+# data-processing/etl/pipeline.py
+
+"""
+Pipeline module - Runs extract, transform and load concurrently
+
+Chunks flow from an extract thread to a transform thread to a load thread
+through bounded queues, so reading, cleaning and writing overlap and only a
+few chunks are held in memory at any time.
+"""
+
+import logging
+import queue
+import threading
+from pathlib import Path
+import sys
+from sqlalchemy import create_engine
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+from etl.extract import (extract_ratings_chunks, extract_to_read, extract_books,
+                         extract_book_tags, extract_tags)
+from etl.transform import transform_all, clean_ratings_chunks, transform_all_single_pass
+from etl.load import (Base, create_db_tables, save_chunk_to_csv, save_table_to_binary,
+                      CSV_FILES, DB_LOAD_ORDER)
+from etl.bulk_load import BulkLoader
+from etl.profiler import profiler
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# marks the end of a table's chunks on a queue
+END_OF_TABLE = object()
+
+# how often a blocked stage checks whether another stage failed
+POLL_INTERVAL = 0.1
+
+class PipelineAborted(Exception):
+    """Raised in a stage when another stage has failed"""
+
+def put(q, item, failed):
+    """Put an item on a bounded queue, giving up if another stage failed"""
+    while True:
+        if failed.is_set():
+            raise PipelineAborted()
+        try:
+            q.put(item, timeout=POLL_INTERVAL)
+            return
+        except queue.Full:
+            continue
+
+def drain(q, failed):
+    """Yield the chunks of the current table from a queue"""
+    while True:
+        if failed.is_set():
+            raise PipelineAborted()
+        try:
+            item = q.get(timeout=POLL_INTERVAL)
+        except queue.Empty:
+            continue
+        if item is END_OF_TABLE:
+            return
+        yield item
+
+def extract_stage(tables, chunk_size, out_q, failed):
+    """Read each table and pass its chunks downstream"""
+    extractors = {
+        'to_read': extract_to_read,
+        'books': extract_books,
+        'book_tags': extract_book_tags,
+        'tags': extract_tags
+    }
+    for table_name in tables:
+        if table_name == 'ratings':
+            for chunk in extract_ratings_chunks(chunk_size):
+                put(out_q, chunk, failed)
+        else:
+            # the smaller tables travel as a single chunk
+            put(out_q, extractors[table_name](), failed)
+        put(out_q, END_OF_TABLE, failed)
+
+def transform_stage(tables, in_q, out_q, failed, single_pass, quality_report):
+    """Clean the chunks of each table and pass them downstream"""
+    for table_name in tables:
+        if table_name == 'ratings':
+            report = {} if single_pass else None
+            for chunk in clean_ratings_chunks(drain(in_q, failed), report=report):
+                put(out_q, chunk, failed)
+            if single_pass:
+                quality_report['ratings'] = report
+        else:
+            for df in drain(in_q, failed):
+                if single_pass:
+                    cleaned, report = transform_all_single_pass({table_name: df})
+                    quality_report.update(report)
+                else:
+                    cleaned = transform_all({table_name: df})
+                put(out_q, cleaned[table_name], failed)
+        put(out_q, END_OF_TABLE, failed)
+
+def load_stage(tables, in_q, failed, load_to_db, save_csv, save_binary):
+    """Write the cleaned chunks of each table to the requested outputs"""
+    # SQLite connections belong to the thread that opened them
+    loader = BulkLoader(Base.metadata) if load_to_db else None
+    labels = dict(DB_LOAD_ORDER)
+    try:
+        if loader:
+            loader.connect()
+        for table_name in tables:
+            if loader:
+                loader.begin(table_name)
+
+            for i, chunk in enumerate(drain(in_q, failed)):
+                if save_csv:
+                    with profiler.measure('save_csv', table_name, rows_in=len(chunk)):
+                        save_chunk_to_csv(chunk, CSV_FILES[table_name][0], append=i > 0)
+                if save_binary:
+                    save_table_to_binary(table_name, chunk, append=i > 0)
+                if loader:
+                    loader.insert(table_name, chunk)
+
+            if loader:
+                rows = loader.swap(table_name)
+                logger.info(f'Loaded {rows} {labels[table_name]} into database')
+    finally:
+        if loader:
+            loader.close()
+
+def run_stage(name, target, failed, errors, *args):
+    """Run a stage, recording its error and signalling the other stages on failure"""
+    try:
+        target(*args)
+    except PipelineAborted:
+        pass
+    except Exception as e:
+        logger.error(f'Pipeline {name} stage failed: {e}')
+        errors.append(e)
+        failed.set()
+
+def run_pipeline(tables=None, load_to_db=True, save_csv=True, save_binary=False,
+                 chunk_size=None, queue_size=None, single_pass=False):
+    """
+    Run extract, transform and load as concurrent stages
+
+    Args:
+        tables (list): Tables to process (defaults to all of them)
+        load_to_db (bool): Whether to load data to database
+        save_csv (bool): Whether to save cleaned data as CSV
+        save_binary (bool): Whether to save cleaned data in the columnar binary format
+        chunk_size (int): Number of ratings rows per chunk
+        queue_size (int): Maximum number of chunks waiting between two stages
+        single_pass (bool): Whether to use the single-pass transform
+
+    Returns:
+        dict: Data-quality report per table when single_pass is set, otherwise empty
+    """
+    # tables are processed parents first, like the non-pipelined load
+    order = [table_name for table_name, _ in DB_LOAD_ORDER]
+    tables = [table_name for table_name in order if tables is None or table_name in tables]
+    queue_size = queue_size or config.PIPELINE_QUEUE_SIZE
+
+    if load_to_db:
+        create_db_tables(create_engine(config.DATABASE_URI))
+
+    extracted_q = queue.Queue(maxsize=queue_size)
+    transformed_q = queue.Queue(maxsize=queue_size)
+    failed = threading.Event()
+    errors = []
+    quality_report = {}
+
+    stages = [
+        ('extract', extract_stage, (tables, chunk_size, extracted_q, failed)),
+        ('transform', transform_stage, (tables, extracted_q, transformed_q, failed,
+                                        single_pass, quality_report)),
+        ('load', load_stage, (tables, transformed_q, failed, load_to_db, save_csv, save_binary))
+    ]
+    threads = [
+        threading.Thread(target=run_stage, args=(name, target, failed, errors) + args,
+                         name=f'etl-{name}')
+        for name, target, args in stages
+    ]
+
+    logger.info(f'Starting pipelined ETL for {", ".join(tables)}')
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+
+    logger.info('Pipelined ETL completed')
+    return quality_report
@@ -0,0 +1,143 @@
+# data-processing/etl/profiler.py
+
+"""
+Profiler module - Records per-stage, per-table ETL metrics
+"""
+
+from contextlib import contextmanager
+from datetime import datetime
+import json
+import logging
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports kilobytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+class Measurement:
+    """Row counts for a single measured block"""
+
+    def __init__(self, rows_in):
+        self.rows_in = rows_in
+        self.rows_out = None
+
+class StageProfiler:
+    """
+    Accumulates wall time, row counts and peak RSS per (stage, table)
+
+    Chunked stages call measure once per chunk and their measurements are
+    summed. Peak RSS is the process high-water mark when the stage last
+    finished a block, so it only grows over the run.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.started_at = None
+        self.start_time = None
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def enable(self):
+        """Start recording measurements"""
+        self.enabled = True
+        self.started_at = datetime.now().isoformat()
+        self.start_time = time.time()
+        self.entries = {}
+
+    @contextmanager
+    def measure(self, stage, table_name, rows_in=0):
+        """
+        Measure a block of work
+
+        Usage:
+            with profiler.measure('transform', 'books', rows_in=len(df)) as measurement:
+                df = clean_books(df)
+                measurement.rows_out = len(df)
+        """
+        measurement = Measurement(rows_in)
+        if not self.enabled:
+            yield measurement
+            return
+
+        start_time = time.perf_counter()
+        yield measurement
+        elapsed_time = time.perf_counter() - start_time
+
+        rows_out = measurement.rows_in if measurement.rows_out is None else measurement.rows_out
+        self.record(stage, table_name, elapsed_time, measurement.rows_in, rows_out)
+
+    def record(self, stage, table_name, seconds, rows_in, rows_out):
+        """Add a measurement to the (stage, table) totals"""
+        with self.lock:
+            entry = self.entries.setdefault((stage, table_name), {
+                'stage': stage,
+                'table': table_name,
+                'seconds': 0.0,
+                'rows_in': 0,
+                'rows_out': 0,
+                'peak_rss_mb': 0.0
+            })
+            entry['seconds'] += seconds
+            entry['rows_in'] += int(rows_in)
+            entry['rows_out'] += int(rows_out)
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'], peak_rss_mb())
+
+    def report(self):
+        """Build the report as a JSON-serializable dict"""
+        stages = []
+        for entry in self.entries.values():
+            entry = dict(entry)
+            rows = max(entry['rows_in'], entry['rows_out'])
+            entry['rows_per_second'] = round(rows / entry['seconds'], 1) if entry['seconds'] else None
+            entry['seconds'] = round(entry['seconds'], 4)
+            entry['peak_rss_mb'] = round(entry['peak_rss_mb'], 1)
+            stages.append(entry)
+
+        return {
+            'started_at': self.started_at,
+            'total_seconds': round(time.time() - self.start_time, 4),
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'stages': stages
+        }
+
+    def save_report(self, path=None):
+        """Write the report as JSON"""
+        path = path or config.PROFILE_REPORT_FILE
+        with open(path, 'w') as f:
+            json.dump(self.report(), f, indent=2)
+        logger.info(f'Saved ETL profile to {path}')
+
+# profiler shared by all ETL modules, disabled unless --profile is given
+profiler = StageProfiler()
+
+def profiled_chunks(chunks, stage, table_name):
+    """Yield from an iterable of DataFrames, measuring the time to produce each one"""
+    iterator = iter(chunks)
+    while True:
+        with profiler.measure(stage, table_name) as measurement:
+            chunk = next(iterator, None)
+            measurement.rows_in = 0 if chunk is None else len(chunk)
+        if chunk is None:
+            return
+        yield chunk
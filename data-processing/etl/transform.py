@@ -8,11 +8,13 @@ import pandas as pd
 import numpy as np
 import logging
 from pathlib import Path
+import json
 import sys
 
 # add parent directory to path to import config
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 import config
+from etl.profiler import profiler
 
 # set up logging
 logging.basicConfig(
@@ -56,6 +58,108 @@ def clean_ratings(df):
     logger.info(f'Ratings data cleaned: {len(df_clean)} records remaining')
     return df_clean
 
+class SeenKeys:
+    """
+    Set of int64 keys kept as sorted runs of decreasing size
+
+    Each add sorts only the new keys into a run of their own, and a run is
+    merged into the one before it once it has grown as large, so every key
+    is re-sorted O(log n) times and a lookup binary-searches O(log n) runs.
+    Merging the whole set on every add would instead re-sort all the keys
+    seen so far once per chunk.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def contains(self, keys):
+        """Mask of the keys already in the set"""
+        found = np.zeros(len(keys), dtype=bool)
+        for run in self.runs:
+            positions = np.searchsorted(run, keys)
+            positions[positions == len(run)] = 0
+            found |= run[positions] == keys
+        return found
+
+    def add(self, keys):
+        """Add keys that are not in the set yet"""
+        if not len(keys):
+            return
+        self.runs.append(np.sort(keys))
+        while len(self.runs) > 1 and len(self.runs[-1]) >= len(self.runs[-2]):
+            run = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate((self.runs[-1], run)), kind='mergesort')
+
+def clean_ratings_chunks(chunks, report=None):
+    """
+    Clean a stream of ratings chunks
+
+    Applies the same rules as clean_ratings to each chunk, then casts the
+    rows that remain to the compact config.RATINGS_DTYPES. Duplicates are detected across chunks by
+    keeping the packed (user_id, book_id) keys already seen in a few sorted
+    runs (see SeenKeys), which costs about 8 bytes per distinct rating for
+    the length of the stream.
+
+    Args:
+        chunks: Iterable of ratings DataFrames
+        report (dict): Optional data-quality report filled in once the stream is exhausted
+
+    Yields:
+        DataFrame: The next cleaned chunk
+    """
+    logger.info('Cleaning ratings data in chunks')
+
+    seen_keys = SeenKeys()
+    total_rows = 0
+    total_missing = 0
+    total_duplicates = 0
+    total_invalid = 0
+    total_remaining = 0
+
+    for chunk in chunks:
+        with profiler.measure('transform', 'ratings', rows_in=len(chunk)) as measurement:
+            # drop rows with missing values first so the keys below are valid
+            rows = len(chunk)
+            chunk = chunk.dropna()
+            total_rows += rows
+            total_missing += rows - len(chunk)
+
+            # verify rating values are in the expected range (1-5)
+            valid = chunk['rating'].between(1, 5).to_numpy(bool)
+
+            # pack (user_id, book_id) into a single int64 key
+            keys = (chunk['user_id'].to_numpy(np.int64) << 32) | chunk['book_id'].to_numpy(np.int64)
+
+            # duplicates within this chunk or against previous chunks
+            duplicates = pd.Series(keys).duplicated().to_numpy()
+            duplicates |= seen_keys.contains(keys)
+            total_duplicates += int(duplicates.sum())
+            # a duplicate is only counted as such, matching the single-pass report
+            total_invalid += int((~valid & ~duplicates).sum())
+
+            seen_keys.add(keys[~duplicates])
+
+            # only cast down once every kept value is known to fit
+            chunk = chunk[valid & ~duplicates].astype(config.RATINGS_DTYPES)
+            total_remaining += len(chunk)
+            measurement.rows_out = len(chunk)
+        yield chunk
+
+    if total_duplicates:
+        logger.warning(f'Found {total_duplicates} duplicate ratings')
+    if total_invalid:
+        logger.warning(f'Found {total_invalid} invalid ratings outside the range 1-5')
+    logger.info(f'Ratings data cleaned: {total_remaining} records remaining')
+
+    if report is not None:
+        report.update(new_quality_report(total_rows))
+        report['rows_out'] = total_remaining
+        report['dropped'] = {
+            'missing_values': total_missing,
+            'duplicate_user_book': total_duplicates,
+            'rating_out_of_range': total_invalid
+        }
+
 def clean_to_read(df):
     """Clean to-read data"""
     logger.info('Cleaning to-read data')
@@ -181,13 +285,187 @@ def clean_tags(df):
     return df_clean
 
 def transform_all(data_dict):
-    """Clean all datasets"""
+    """Clean all datasets present in data_dict"""
+    cleaners = {
+        'ratings': clean_ratings,
+        'to_read': clean_to_read,
+        'books': clean_books,
+        'book_tags': clean_book_tags,
+        'tags': clean_tags
+    }
+
     transformed_data = {}
 
-    transformed_data['ratings'] = clean_ratings(data_dict['ratings'])
-    transformed_data['to_read'] = clean_to_read(data_dict['to_read'])
-    transformed_data['books'] = clean_books(data_dict['books'])
-    transformed_data['book_tags'] = clean_book_tags(data_dict['book_tags'])
-    transformed_data['tags'] = clean_tags(data_dict['tags'])
+    # tables can be absent when streamed separately or skipped by an incremental run
+    for table_name, df in data_dict.items():
+        with profiler.measure('transform', table_name, rows_in=len(df)) as measurement:
+            transformed_data[table_name] = cleaners[table_name](df)
+            measurement.rows_out = len(transformed_data[table_name])
+
+    return transformed_data
+
+# single-pass transform
+# each table is validated and coerced with one set of vectorized rule masks
+# and filtered at most once, without defensive copies of the input frames
+
+def new_quality_report(rows_in):
+    """Create an empty data-quality report for a table"""
+    return {'rows_in': int(rows_in), 'rows_out': int(rows_in), 'dropped': {}, 'fixed': {}}
+
+def count_rule(counts, rule, mask):
+    """Record how many rows a rule matched"""
+    counts[rule] = int(np.count_nonzero(mask))
+
+def keep_rows(df, keep, report):
+    """Filter a frame with a combined keep mask, only when it drops anything"""
+    report['rows_out'] = int(np.count_nonzero(keep))
+    if report['rows_out'] == len(df):
+        return df
+    # take returns a new frame rather than a view, so it can be coerced in place
+    return df.take(np.flatnonzero(keep))
+
+def duplicate_rows(df, subset, missing):
+    """
+    Mark repeated keys among the rows without missing values
+
+    Rows already dropped as missing are left out, so they are not counted
+    twice and an incomplete row never shadows a complete one with its key.
+    """
+    if not missing.any():
+        return df.duplicated(subset).to_numpy()
+    duplicate = np.zeros(len(df), dtype=bool)
+    duplicate[~missing] = df.loc[~missing, subset].duplicated().to_numpy()
+    return duplicate
+
+def coerce_columns(df, dtypes):
+    """Cast columns that do not already have the target dtype"""
+    for col, dtype in dtypes.items():
+        if df[col].dtype != dtype:
+            df[col] = df[col].astype(dtype)
+
+def validate_ratings(df, report):
+    """Validate and coerce ratings data in a single pass"""
+    missing = df.isna().any(axis=1).to_numpy()
+    duplicate = duplicate_rows(df, ['user_id', 'book_id'], missing)
+    out_of_range = ~df['rating'].between(1, 5).to_numpy() & ~missing & ~duplicate
+
+    count_rule(report['dropped'], 'missing_values', missing)
+    count_rule(report['dropped'], 'duplicate_user_book', duplicate)
+    count_rule(report['dropped'], 'rating_out_of_range', out_of_range)
+
+    df = keep_rows(df, ~(missing | duplicate | out_of_range), report)
+    coerce_columns(df, config.RATINGS_DTYPES)
+    return df
+
+def validate_to_read(df, report):
+    """Validate and coerce to-read data in a single pass"""
+    missing = df.isna().any(axis=1).to_numpy()
+    duplicate = duplicate_rows(df, ['user_id', 'book_id'], missing)
+
+    count_rule(report['dropped'], 'missing_values', missing)
+    count_rule(report['dropped'], 'duplicate_user_book', duplicate)
+
+    df = keep_rows(df, ~(missing | duplicate), report)
+    coerce_columns(df, {'user_id': 'int32', 'book_id': 'int32'})
+    return df
+
+def validate_books(df, report):
+    """Validate and coerce books data in a single pass"""
+    # convert invalid years to NaN
+    current_year = pd.Timestamp.now().year
+    years = df['original_publication_year']
+    invalid_years = years.notna().to_numpy() & ~years.between(0, current_year).to_numpy()
+    count_rule(report['fixed'], 'invalid_publication_year', invalid_years)
+    if invalid_years.any():
+        df['original_publication_year'] = years.mask(invalid_years)
+
+    # replace missing text with empty strings and strip whitespace
+    for col in ['title', 'authors', 'original_title']:
+        missing = df[col].isna().to_numpy()
+        count_rule(report['fixed'], f'missing_{col}', missing)
+        df[col] = df[col].fillna('').str.strip()
+
+    missing_isbn = df['isbn'].isna().to_numpy()
+    count_rule(report['fixed'], 'missing_isbn', missing_isbn)
+    df['isbn'] = df['isbn'].fillna('').astype(str)
+
+    # non-numeric ISBN13 values become NaN
+    isbn13 = pd.to_numeric(df['isbn13'], errors='coerce')
+    count_rule(report['fixed'], 'invalid_isbn13', isbn13.isna().to_numpy() & df['isbn13'].notna().to_numpy())
+    df['isbn13'] = isbn13
+
+    duplicate = df.duplicated('book_id').to_numpy()
+    count_rule(report['dropped'], 'duplicate_book_id', duplicate)
+
+    df = keep_rows(df, ~duplicate, report)
+    coerce_columns(df, {col: 'int64' for col in ['book_id', 'goodreads_book_id', 'best_book_id', 'work_id']})
+    return df
+
+def validate_book_tags(df, report):
+    """Validate and coerce book tags data in a single pass"""
+    missing = df.isna().any(axis=1).to_numpy()
+    duplicate = duplicate_rows(df, ['goodreads_book_id', 'tag_id'], missing)
+
+    count_rule(report['dropped'], 'missing_values', missing)
+    count_rule(report['dropped'], 'duplicate_book_tag', duplicate)
+
+    df = keep_rows(df, ~(missing | duplicate), report)
+    coerce_columns(df, {'goodreads_book_id': 'int32', 'tag_id': 'int32', 'count': 'int32'})
+    return df
+
+def validate_tags(df, report):
+    """Validate and coerce tags data in a single pass"""
+    missing = df.isna().any(axis=1).to_numpy()
+    duplicate = duplicate_rows(df, ['tag_id'], missing)
+
+    count_rule(report['dropped'], 'missing_values', missing)
+    count_rule(report['dropped'], 'duplicate_tag_id', duplicate)
+
+    df = keep_rows(df, ~(missing | duplicate), report)
+
+    # normalize tag names
+    tag_names = df['tag_name'].str.strip().str.lower()
+    count_rule(report['fixed'], 'unnormalized_tag_name', (tag_names != df['tag_name']).to_numpy())
+    df['tag_name'] = tag_names
+
+    coerce_columns(df, {'tag_id': 'int32'})
+    return df
+
+def transform_all_single_pass(data_dict):
+    """
+    Clean all datasets present in data_dict in a single pass per table
+
+    The input frames are not copied and may be modified in place. A row that
+    breaks several rules is counted under the first of them only (missing
+    values, then duplicate keys, then invalid values), so the dropped counts
+    add up to the rows removed.
+
+    Returns:
+        tuple: (dict of cleaned DataFrames, data-quality report per table)
+    """
+    validators = {
+        'ratings': validate_ratings,
+        'to_read': validate_to_read,
+        'books': validate_books,
+        'book_tags': validate_book_tags,
+        'tags': validate_tags
+    }
 
-    return transformed_data
\ No newline at end of file
+    transformed_data = {}
+    report = {}
+
+    for table_name, df in data_dict.items():
+        with profiler.measure('transform', table_name, rows_in=len(df)) as measurement:
+            report[table_name] = new_quality_report(len(df))
+            transformed_data[table_name] = validators[table_name](df, report[table_name])
+            measurement.rows_out = len(transformed_data[table_name])
+        logger.info(f'{table_name} validated: {report[table_name]["rows_out"]} of '
+                    f'{report[table_name]["rows_in"]} records kept')
+
+    return transformed_data, report
+
+def save_quality_report(report):
+    """Write the data-quality report as JSON"""
+    with open(config.DATA_QUALITY_REPORT_FILE, 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f'Saved data-quality report to {config.DATA_QUALITY_REPORT_FILE}')
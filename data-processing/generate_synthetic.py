@@ -0,0 +1,231 @@
+# data-processing/generate_synthetic.py
+
+"""
+Generate a synthetic Goodbooks-style dataset at a configurable scale
+
+Writes ratings.csv, to_read.csv, books.csv, book_tags.csv and tags.csv with
+the same columns as the goodbooks-10k files. Book and tag popularity follow a
+power law, and user activity is heavy-tailed, so the ETL and recommenders see
+data shaped like the real catalog at 10x-100x its size.
+"""
+
+import argparse
+import logging
+import os
+import time
+import numpy as np
+import pandas as pd
+
+import config
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# sizes of the goodbooks-10k dataset, multiplied by the scale factor
+BASE_COUNTS = {
+    'books': 10000,
+    'users': 53424,
+    'ratings': 5976479,
+    'to_read': 912705,
+    'tags': 34252
+}
+TAGS_PER_BOOK = 100
+
+# share of 1-5 star ratings in goodbooks-10k
+RATING_PROBABILITIES = [0.02, 0.06, 0.23, 0.36, 0.33]
+
+WORDS = [
+    'shadow', 'river', 'night', 'king', 'garden', 'secret', 'fire', 'glass', 'winter',
+    'house', 'ocean', 'star', 'silent', 'lost', 'city', 'dragon', 'heart', 'storm',
+    'crown', 'girl', 'boy', 'war', 'summer', 'dark', 'light', 'stone', 'forest', 'song',
+    'blood', 'memory', 'island', 'empire', 'witch', 'road', 'promise', 'mountain'
+]
+FIRST_NAMES = ['Anna', 'James', 'Maria', 'John', 'Elena', 'David', 'Sara', 'Peter',
+               'Laura', 'Michael', 'Nora', 'Thomas', 'Julia', 'Robert', 'Clara', 'Paul']
+LAST_NAMES = ['Smith', 'Brown', 'Garcia', 'Miller', 'Davis', 'Wilson', 'Moore', 'Clark',
+              'Lewis', 'Walker', 'Young', 'King', 'Wright', 'Hill', 'Green', 'Baker']
+
+def power_law_cdf(n, alpha):
+    """Cumulative weights where item i (1-based rank) has weight i^-alpha"""
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -alpha
+    cdf = np.cumsum(weights)
+    return cdf / cdf[-1]
+
+def sample_power_law(cdf, size, rng):
+    """Draw 1-based item ids from a power-law CDF"""
+    return np.searchsorted(cdf, rng.random(size)) + 1
+
+def activity_counts(n_users, total, max_count, rng):
+    """Heavy-tailed number of interactions per user that sums to roughly total"""
+    raw = rng.lognormal(mean=0.0, sigma=0.8, size=n_users)
+    counts = np.maximum(1, np.round(raw / raw.sum() * total)).astype(np.int64)
+    return np.minimum(counts, max_count)
+
+def random_phrases(words, size, min_words, max_words, rng):
+    """Build random capitalized phrases from a word list"""
+    lengths = rng.integers(min_words, max_words + 1, size)
+    picks = rng.integers(0, len(words), lengths.sum())
+    phrases = []
+    start = 0
+    for length in lengths:
+        phrases.append(' '.join(words[i].capitalize() for i in picks[start:start + length]))
+        start += length
+    return phrases
+
+def generate_user_book_pairs(path, n_users, n_books, total, book_cdf, rng, with_rating,
+                             block_users):
+    """Write (user_id, book_id[, rating]) rows block by block, unique per user"""
+    counts = activity_counts(n_users, total, n_books, rng)
+    rows = 0
+    for block_start in range(0, n_users, block_users):
+        block_counts = counts[block_start:block_start + block_users]
+        user_ids = np.repeat(np.arange(block_start + 1, block_start + len(block_counts) + 1),
+                             block_counts)
+        book_ids = sample_power_law(book_cdf, len(user_ids), rng)
+
+        # users never span blocks, so de-duplicating within the block is enough
+        keys = np.unique((user_ids.astype(np.int64) << 32) | book_ids)
+        block = pd.DataFrame({'user_id': keys >> 32, 'book_id': keys & 0xFFFFFFFF})
+        if with_rating:
+            block['rating'] = rng.choice(5, size=len(block), p=RATING_PROBABILITIES) + 1
+
+        block.to_csv(path, mode='a' if block_start else 'w', header=not block_start, index=False)
+        rows += len(block)
+    return rows
+
+def generate_books(path, n_books, book_cdf, rng):
+    """Write books.csv with popularity-ordered book ids"""
+    popularity = np.diff(book_cdf, prepend=0.0)
+    ratings_count = np.maximum(10, np.round(popularity / popularity[0] * 4_000_000)).astype(np.int64)
+    distribution = rng.dirichlet(np.array(RATING_PROBABILITIES) * 50, size=n_books)
+    ratings_by_star = np.round(distribution * ratings_count[:, None]).astype(np.int64)
+    average_rating = (ratings_by_star * np.arange(1, 6)).sum(axis=1) / np.maximum(1, ratings_by_star.sum(axis=1))
+
+    book_ids = np.arange(1, n_books + 1)
+    goodreads_book_ids = book_ids * 13 + rng.integers(0, 13, n_books)
+    titles = random_phrases(WORDS, n_books, 1, 4, rng)
+    authors = [f'{FIRST_NAMES[i]} {LAST_NAMES[j]}' for i, j in zip(
+        rng.integers(0, len(FIRST_NAMES), n_books), rng.integers(0, len(LAST_NAMES), n_books))]
+    years = rng.normal(1995, 25, n_books).round()
+
+    books = pd.DataFrame({
+        'book_id': book_ids,
+        'goodreads_book_id': goodreads_book_ids,
+        'best_book_id': goodreads_book_ids,
+        'work_id': book_ids * 17 + rng.integers(0, 17, n_books),
+        'books_count': rng.integers(1, 200, n_books),
+        'isbn': [f'{i:09d}X' for i in rng.integers(0, 10 ** 9, n_books)],
+        'isbn13': rng.integers(9780000000000, 9799999999999, n_books).astype(np.float64),
+        'authors': authors,
+        'original_publication_year': np.minimum(years, pd.Timestamp.now().year),
+        'original_title': titles,
+        'title': titles,
+        'language_code': rng.choice(['eng', 'en-US', 'en-GB', 'spa', 'fre'], n_books,
+                                    p=[0.7, 0.15, 0.1, 0.03, 0.02]),
+        'average_rating': average_rating.round(2),
+        'ratings_count': ratings_count,
+        'work_ratings_count': ratings_count + rng.integers(0, 1000, n_books),
+        'work_text_reviews_count': ratings_count // 30,
+        'ratings_1': ratings_by_star[:, 0],
+        'ratings_2': ratings_by_star[:, 1],
+        'ratings_3': ratings_by_star[:, 2],
+        'ratings_4': ratings_by_star[:, 3],
+        'ratings_5': ratings_by_star[:, 4],
+        'image_url': [f'https://images.example.com/books/{i}m.jpg' for i in book_ids],
+        'small_image_url': [f'https://images.example.com/books/{i}s.jpg' for i in book_ids]
+    })
+    books.to_csv(path, index=False)
+    return books['goodreads_book_id'].to_numpy()
+
+def generate_tags(path, n_tags, rng):
+    """Write tags.csv"""
+    names = random_phrases(WORDS, n_tags, 1, 3, rng)
+    tags = pd.DataFrame({
+        'tag_id': np.arange(n_tags),
+        'tag_name': [f'{name.lower().replace(" ", "-")}-{i}' for i, name in enumerate(names)]
+    })
+    tags.to_csv(path, index=False)
+
+def generate_book_tags(path, goodreads_book_ids, n_tags, alpha, rng, block_books=20000):
+    """Write book_tags.csv with power-law tag popularity and counts"""
+    tag_cdf = power_law_cdf(n_tags, alpha)
+    tags_per_book = min(TAGS_PER_BOOK, n_tags)
+    rows = 0
+    for block_start in range(0, len(goodreads_book_ids), block_books):
+        block_ids = goodreads_book_ids[block_start:block_start + block_books]
+        book_ids = np.repeat(block_ids, tags_per_book).astype(np.int64)
+        tag_ids = sample_power_law(tag_cdf, len(book_ids), rng) - 1
+
+        keys = np.unique((book_ids << 32) | tag_ids)
+        block = pd.DataFrame({'goodreads_book_id': keys >> 32, 'tag_id': keys & 0xFFFFFFFF})
+        block['count'] = np.maximum(1, rng.pareto(1.2, len(block)) * 20).astype(np.int64)
+
+        block.to_csv(path, mode='a' if block_start else 'w', header=not block_start, index=False)
+        rows += len(block)
+    return rows
+
+def generate_dataset(output_dir, scale=10, alpha=0.5, seed=42, block_users=50000):
+    """
+    Generate all five source files
+
+    Args:
+        output_dir (str): Directory to write the CSV files to
+        scale (float): Size relative to goodbooks-10k (10 = ten times larger)
+        alpha (float): Power-law exponent of book and tag popularity
+        seed (int): Random seed
+        block_users (int): Users generated per block, which bounds memory use
+    """
+    start_time = time.time()
+    rng = np.random.default_rng(seed)
+    os.makedirs(output_dir, exist_ok=True)
+
+    counts = {name: max(1, int(round(count * scale))) for name, count in BASE_COUNTS.items()}
+    logger.info(f'Generating synthetic dataset at scale {scale} in {output_dir}: {counts}')
+
+    book_cdf = power_law_cdf(counts['books'], alpha)
+
+    goodreads_book_ids = generate_books(os.path.join(output_dir, 'books.csv'), counts['books'], book_cdf, rng)
+    logger.info(f'Generated {counts["books"]} books')
+
+    generate_tags(os.path.join(output_dir, 'tags.csv'), counts['tags'], rng)
+    logger.info(f'Generated {counts["tags"]} tags')
+
+    rows = generate_book_tags(os.path.join(output_dir, 'book_tags.csv'), goodreads_book_ids,
+                              counts['tags'], alpha, rng)
+    logger.info(f'Generated {rows} book tags')
+
+    rows = generate_user_book_pairs(os.path.join(output_dir, 'ratings.csv'), counts['users'],
+                                    counts['books'], counts['ratings'], book_cdf, rng,
+                                    with_rating=True, block_users=block_users)
+    logger.info(f'Generated {rows} ratings')
+
+    rows = generate_user_book_pairs(os.path.join(output_dir, 'to_read.csv'), counts['users'],
+                                    counts['books'], counts['to_read'], book_cdf, rng,
+                                    with_rating=False, block_users=block_users)
+    logger.info(f'Generated {rows} to-read entries')
+
+    elapsed_time = time.time() - start_time
+    logger.info(f'Synthetic dataset generated in {elapsed_time:.2f} seconds')
+
+if __name__ == '__main__':
+    # parse command line arguments
+    parser = argparse.ArgumentParser(description='Generate a synthetic Goodbooks-style dataset')
+    parser.add_argument('--scale', type=float, default=10,
+                        help='Size relative to goodbooks-10k (e.g. 10 or 100)')
+    parser.add_argument('--alpha', type=float, default=0.5,
+                        help='Power-law exponent of book and tag popularity')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed')
+    parser.add_argument('--output-dir', default=None,
+                        help='Output directory (defaults to data/synthetic/scale_<scale>)')
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or os.path.join(config.SYNTHETIC_DATA_DIR, f'scale_{args.scale:g}')
+    generate_dataset(output_dir, scale=args.scale, alpha=args.alpha, seed=args.seed)
@@ -11,9 +11,15 @@ import sys
 import time
 
 # import ETL modules
-from etl.extract import extract_all
-from etl.transform import transform_all
-from etl.load import save_to_csv, load_to_database
+from etl.extract import extract_all, extract_ratings_chunks, extract_all_processed
+from etl.transform import (transform_all, clean_ratings_chunks, transform_all_single_pass,
+                           save_quality_report)
+from etl.load import (save_to_csv, load_to_database, save_chunk_to_csv, save_to_binary,
+                      save_table_to_binary, Base)
+from etl.bulk_load import BulkLoader
+from etl.manifest import find_stale_tables, update_manifest
+from etl.pipeline import run_pipeline
+from etl.profiler import profiler
 import config
 
 # set up logging
@@ -27,29 +33,129 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def run_etl_pipeline(load_to_db=True, save_csv=True):
+def stream_ratings(load_to_db=True, save_csv=True, save_binary=False, chunk_size=None,
+                   report=None):
+    """
+    Extract, transform and load the ratings table chunk by chunk
+
+    Args:
+        load_to_db (bool): Whether to load data to database
+        save_csv (bool): Whether to save cleaned data as CSV
+        save_binary (bool): Whether to save cleaned data in the columnar binary format
+        chunk_size (int): Number of rows per chunk
+        report (dict): Optional data-quality report to fill in for the ratings table
+    """
+    # chunks go to a staging table that replaces ratings once all are loaded
+    loader = BulkLoader(Base.metadata) if load_to_db else None
+    try:
+        if loader:
+            loader.connect()
+            loader.begin('ratings')
+
+        chunks = clean_ratings_chunks(extract_ratings_chunks(chunk_size), report=report)
+        for i, chunk in enumerate(chunks):
+            if save_csv:
+                with profiler.measure('save_csv', 'ratings', rows_in=len(chunk)):
+                    save_chunk_to_csv(chunk, config.CLEAN_RATINGS_FILE, append=i > 0)
+            if save_binary:
+                save_table_to_binary('ratings', chunk, append=i > 0)
+            if loader:
+                loader.insert('ratings', chunk)
+
+        if loader:
+            rows = loader.swap('ratings')
+            logger.info(f'Loaded {rows} streamed ratings into database')
+    finally:
+        if loader:
+            loader.close()
+
+    if save_csv:
+        logger.info(f'Saved clean ratings to {config.CLEAN_RATINGS_FILE}')
+
+def run_etl_pipeline(load_to_db=True, save_csv=True, stream=False, chunk_size=None,
+                     workers=1, save_binary=False, from_binary=False, incremental=False,
+                     single_pass=False, pipelined=False, profile=False):
     """
     Run the complete ETL pipeline
 
     Args:
         load_to_db (bool): Whether to load data to database
         save_csv (bool): Whether to save cleaned data as CSV
+        stream (bool): Whether to stream the ratings table in chunks
+        chunk_size (int): Number of ratings rows per chunk when streaming
+        workers (int): Number of threads used to extract the source files
+        save_binary (bool): Whether to save cleaned data in the columnar binary format
+        from_binary (bool): Whether to reuse previously processed binary data
+            instead of extracting and transforming the raw files
+        incremental (bool): Whether to skip tables whose source files and
+            transform code, settings and mode are unchanged since the last successful run
+        single_pass (bool): Whether to validate each table in one pass without
+            copies and write a data-quality report
+        pipelined (bool): Whether to run extract, transform and load as
+            concurrent stages connected by bounded queues
+        profile (bool): Whether to record per-stage, per-table metrics and
+            write them to config.PROFILE_REPORT_FILE
     """
     start_time = time.time()
     logger.info('Starting ETL pipeline')
 
+    if profile:
+        profiler.enable()
+
     try:
-        # extract
-        logger.info('Starting data extraction')
-        raw_data = extract_all()
-        logger.info('Data extraction completed')
+        if from_binary:
+            # processed data is already clean, so skip extract and transform
+            logger.info('Extracting processed binary data')
+            transformed_data = extract_all_processed()
+            stream = False
+            logger.info('Processed binary data extracted')
+        else:
+            tables = None
+            if incremental:
+                outputs = [name for name, enabled in
+                           (('db', load_to_db), ('csv', save_csv), ('binary', save_binary)) if enabled]
+                transform_mode = 'single_pass' if single_pass else 'classic'
+                tables, fingerprints = find_stale_tables(outputs, transform_mode)
+                if not tables:
+                    logger.info('All tables are up to date, nothing to do')
+                    return True
+                logger.info(f'Tables to process: {", ".join(tables)}')
+                stream = stream and 'ratings' in tables
+
+            if pipelined:
+                quality_report = run_pipeline(tables=tables, load_to_db=load_to_db,
+                                              save_csv=save_csv, save_binary=save_binary,
+                                              chunk_size=chunk_size, single_pass=single_pass)
+                if single_pass:
+                    save_quality_report(quality_report)
+                if incremental:
+                    update_manifest(tables, fingerprints, outputs)
+                if profile:
+                    profiler.save_report()
+
+                elapsed_time = time.time() - start_time
+                logger.info(f'ETL pipeline completed successfully in {elapsed_time:.2f} seconds')
+                return True
+
+            # extract
+            logger.info('Starting data extraction')
+            raw_data = extract_all(include_ratings=not stream, workers=workers, tables=tables)
+            logger.info('Data extraction completed')
 
-        # transform
-        logger.info('Starting data transformation')
-        transformed_data = transform_all(raw_data)
-        logger.info('Data transformation completed')
+            # transform
+            logger.info('Starting data transformation')
+            if single_pass:
+                transformed_data, quality_report = transform_all_single_pass(raw_data)
+            else:
+                transformed_data = transform_all(raw_data)
+            logger.info('Data transformation completed')
 
         # load
+        if save_binary and not from_binary:
+            logger.info('Saving data to binary files')
+            save_to_binary(transformed_data)
+            logger.info('Data saved to binary files')
+
         if save_csv:
             logger.info('Saving data to CSV')
             save_to_csv(transformed_data)
@@ -57,15 +163,37 @@ def run_etl_pipeline(load_to_db=True, save_csv=True):
 
         if load_to_db:
             logger.info('Loading data to database')
-            load_to_database(transformed_data)
+            if not load_to_database(transformed_data):
+                raise RuntimeError('Loading data to database failed')
             logger.info('Data loaded to database')
 
+        # ratings are streamed once the other tables are loaded and the models declared
+        if stream:
+            logger.info('Streaming ratings data')
+            ratings_report = {} if single_pass else None
+            stream_ratings(load_to_db=load_to_db, save_csv=save_csv, save_binary=save_binary,
+                           chunk_size=chunk_size, report=ratings_report)
+            if single_pass:
+                quality_report['ratings'] = ratings_report
+            logger.info('Ratings data streamed')
+
+        if single_pass and not from_binary:
+            save_quality_report(quality_report)
+
+        if incremental and not from_binary:
+            update_manifest(tables, fingerprints, outputs)
+
+        if profile:
+            profiler.save_report()
+
         elapsed_time = time.time() - start_time
         logger.info(f'ETL pipeline completed successfully in {elapsed_time:.2f} seconds')
         return True
     
     except Exception as e:
         logger.error(f'ETL pipeline failed: {e}')
+        if profile:
+            profiler.save_report()
         elapsed_time = time.time() - start_time
         logger.info(f'ETL pipeline failed after {elapsed_time:.2f} seconds')
         return False
@@ -77,10 +205,33 @@ if __name__ == '__main__':
                         help='Skip loading data to database')
     parser.add_argument('--no-csv', action='store_false', dest='save_csv',
                         help='Skip saving data as CSV')
+    parser.add_argument('--stream', action='store_true',
+                        help='Stream the ratings table in chunks to bound memory')
+    parser.add_argument('--chunk-size', type=int, default=config.RATINGS_CHUNK_SIZE,
+                        help='Number of ratings rows per chunk when streaming')
+    parser.add_argument('--workers', type=int, default=config.EXTRACT_WORKERS,
+                        help='Number of threads used to extract the source files')
+    parser.add_argument('--binary', action='store_true', dest='save_binary',
+                        help='Also save cleaned data in the columnar binary format')
+    parser.add_argument('--from-binary', action='store_true',
+                        help='Reuse processed binary data instead of the raw CSV files')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only process tables whose source files or transform code changed')
+    parser.add_argument('--single-pass', action='store_true',
+                        help='Validate each table in one pass and write a data-quality report')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='Run extract, transform and load concurrently on streamed chunks')
+    parser.add_argument('--profile', action='store_true',
+                        help='Write per-stage, per-table metrics to a JSON report')
     args = parser.parse_args()
 
     # run the ETL pipeline
-    success = run_etl_pipeline(load_to_db=args.load_to_db, save_csv=args.save_csv)
+    success = run_etl_pipeline(load_to_db=args.load_to_db, save_csv=args.save_csv,
+                               stream=args.stream, chunk_size=args.chunk_size,
+                               workers=args.workers, save_binary=args.save_binary,
+                               from_binary=args.from_binary, incremental=args.incremental,
+                               single_pass=args.single_pass, pipelined=args.pipelined,
+                               profile=args.profile)
 
     # exit with appropriate status code
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -0,0 +1,228 @@
+# data-processing/recommenders/als.py
+
+"""
+ALS module - Trains user and book factor matrices from the ratings
+"""
+
+from datetime import datetime
+import json
+import logging
+import os
+import time
+from pathlib import Path
+import sys
+import numpy as np
+from scipy import sparse
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+from recommenders.ratings import read_ratings, ratings_matrix
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# file names inside config.MODEL_DIR - the backend reads the same names
+ALS_FILES = {
+    'user_factors': 'als_user_factors.npy',
+    'book_factors': 'als_book_factors.npy',
+    'user_ids': 'als_user_ids.npy',
+    'book_ids': 'als_book_ids.npy'
+}
+ALS_META_FILE = 'als_meta.json'
+
+def normal_product(matrix, row_ids, fixed, x, regularization, counts, block_ratings):
+    """
+    Multiply every row's normal-equation matrix by that row's vector
+
+    Computes (F_I^T F_I + regularization * |I_u| * I) x_u for all rows u at
+    once without forming the factors x factors matrices: one dot product per
+    rating, then a sparse-dense product back onto the fixed factors.
+    """
+    dots = np.empty(matrix.nnz, dtype=np.float32)
+    for start in range(0, matrix.nnz, block_ratings):
+        stop = start + block_ratings
+        dots[start:stop] = np.einsum('ij,ij->i', x[row_ids[start:stop]],
+                                     fixed[matrix.indices[start:stop]])
+    weighted = sparse.csr_matrix((dots, matrix.indices, matrix.indptr), shape=matrix.shape)
+    return weighted @ fixed + regularization * counts[:, None] * x
+
+def solve_rows(matrix, fixed, initial, regularization, cg_steps=None, block_ratings=None):
+    """
+    Solve the regularized least-squares problem of every row of a CSR matrix
+
+    For row u with rated columns I_u, solves
+    (F_I^T F_I + regularization * |I_u| * I) x_u = F_I^T r_u
+    where F is the fixed factor matrix, with a few conjugate-gradient steps
+    run on all rows in parallel and warm-started from the previous sweep.
+
+    Args:
+        matrix (csr_matrix): Ratings with one row per entity being solved
+        fixed (ndarray): Factors of the columns (n_columns x factors)
+        initial (ndarray): Starting factors of the rows (n_rows x factors)
+        regularization (float): Weighted-lambda regularization
+        cg_steps (int): Conjugate-gradient steps per solve
+        block_ratings (int): Ratings gathered per block
+
+    Returns:
+        ndarray: Factors of the rows (n_rows x factors)
+    """
+    cg_steps = cg_steps or config.ALS_CG_STEPS
+    block_ratings = block_ratings or config.ALS_BLOCK_RATINGS
+    counts = np.diff(matrix.indptr).astype(np.float32)
+    row_ids = np.repeat(np.arange(matrix.shape[0]), np.diff(matrix.indptr))
+
+    x = initial.copy()
+    residual = (matrix @ fixed) - normal_product(matrix, row_ids, fixed, x, regularization,
+                                                  counts, block_ratings)
+    direction = residual.copy()
+    residual_norm = (residual * residual).sum(axis=1)
+
+    for _ in range(cg_steps):
+        product = normal_product(matrix, row_ids, fixed, direction, regularization,
+                                 counts, block_ratings)
+        curvature = (direction * product).sum(axis=1)
+        # converged rows and rows without ratings stop moving
+        step = np.divide(residual_norm, curvature, out=np.zeros_like(curvature),
+                         where=curvature > 1e-12)
+        x += step[:, None] * direction
+        residual -= step[:, None] * product
+
+        new_residual_norm = (residual * residual).sum(axis=1)
+        beta = np.divide(new_residual_norm, residual_norm, out=np.zeros_like(residual_norm),
+                         where=residual_norm > 1e-12)
+        direction = residual + beta[:, None] * direction
+        residual_norm = new_residual_norm
+
+    return x
+
+def train_als(matrix, factors=None, iterations=None, regularization=None, seed=42):
+    """
+    Factorize a ratings matrix with alternating least squares
+
+    Args:
+        matrix (csr_matrix): Users x books ratings
+        factors (int): Number of latent factors
+        iterations (int): Number of alternating sweeps
+        regularization (float): Weighted-lambda regularization
+        seed (int): Random seed for the initial factors
+
+    Returns:
+        tuple: (user_factors, book_factors, global_mean, rmse)
+    """
+    factors = factors or config.ALS_FACTORS
+    iterations = iterations or config.ALS_ITERATIONS
+    regularization = regularization if regularization is not None else config.ALS_REGULARIZATION
+
+    # factorize the deviations from the global mean
+    global_mean = float(matrix.data.mean())
+    centered = matrix.copy()
+    centered.data -= global_mean
+    centered_t = centered.T.tocsr()
+
+    rng = np.random.default_rng(seed)
+    user_factors = rng.normal(0, 0.1, (matrix.shape[0], factors)).astype(np.float32)
+    book_factors = rng.normal(0, 0.1, (matrix.shape[1], factors)).astype(np.float32)
+
+    for iteration in range(iterations):
+        user_factors = solve_rows(centered, book_factors, user_factors, regularization)
+        book_factors = solve_rows(centered_t, user_factors, book_factors, regularization)
+        rmse = training_rmse(centered, user_factors, book_factors)
+        logger.info(f'ALS iteration {iteration + 1}/{iterations}: training RMSE {rmse:.4f}')
+
+    return user_factors, book_factors, global_mean, rmse
+
+def training_rmse(centered, user_factors, book_factors, block_ratings=1000000):
+    """Root mean squared error on the observed ratings"""
+    coo = centered.tocoo()
+    squared_error = 0.0
+    for start in range(0, coo.nnz, block_ratings):
+        rows = coo.row[start:start + block_ratings]
+        cols = coo.col[start:start + block_ratings]
+        predicted = np.einsum('ij,ij->i', user_factors[rows], book_factors[cols])
+        squared_error += float(((coo.data[start:start + block_ratings] - predicted) ** 2).sum())
+    return (squared_error / max(coo.nnz, 1)) ** 0.5
+
+def save_model_files(files, arrays, meta_file, meta, model_dir=None):
+    """
+    Save model arrays as .npy files the backend can memory-map
+
+    Each file is written under a temporary name and renamed into place, and
+    the meta file goes last, so the backend never maps a half-written file.
+
+    Args:
+        files (dict): Array name -> file name
+        arrays (dict): Array name -> ndarray
+        meta_file (str): File name of the JSON metadata
+        meta (dict): Model metadata
+        model_dir (str): Output directory (defaults to config.MODEL_DIR)
+    """
+    model_dir = model_dir or config.MODEL_DIR
+    os.makedirs(model_dir, exist_ok=True)
+
+    for name, file_name in files.items():
+        path = os.path.join(model_dir, file_name)
+        with open(path + '.tmp', 'wb') as f:
+            np.save(f, arrays[name])
+        os.replace(path + '.tmp', path)
+
+    meta_path = os.path.join(model_dir, meta_file)
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def load_factors(model_dir=None):
+    """Map the saved ALS arrays read-only"""
+    model_dir = model_dir or config.MODEL_DIR
+    return {
+        name: np.load(os.path.join(model_dir, file_name), mmap_mode='r')
+        for name, file_name in ALS_FILES.items()
+    }
+
+def build_als(factors=None, iterations=None, regularization=None):
+    """
+    Train the ALS model on the loaded ratings and save its factors
+
+    Returns:
+        dict: Model metadata
+    """
+    start_time = time.time()
+
+    matrix, user_ids, book_ids = ratings_matrix(read_ratings())
+    if matrix.nnz == 0:
+        logger.warning('No ratings found, skipping ALS')
+        return None
+
+    user_factors, book_factors, global_mean, rmse = train_als(
+        matrix, factors=factors, iterations=iterations, regularization=regularization
+    )
+
+    meta = {
+        'trained_at': datetime.now().isoformat(),
+        'factors': int(user_factors.shape[1]),
+        'users': len(user_ids),
+        'books': len(book_ids),
+        'ratings': int(matrix.nnz),
+        'global_mean': global_mean,
+        'regularization': regularization if regularization is not None else config.ALS_REGULARIZATION,
+        'training_rmse': rmse
+    }
+    save_model_files(ALS_FILES, {
+        'user_factors': user_factors,
+        'book_factors': book_factors,
+        'user_ids': user_ids.astype(np.int64),
+        'book_ids': book_ids.astype(np.int64)
+    }, ALS_META_FILE, meta)
+
+    elapsed_time = time.time() - start_time
+    logger.info(f'Saved ALS factors to {config.MODEL_DIR} in {elapsed_time:.2f} seconds')
+    return meta
@@ -0,0 +1,215 @@
+# data-processing/recommenders/ann.py
+
+"""
+ANN module - Builds an inverted-file (IVF) index over the ALS book factors
+"""
+
+from datetime import datetime
+import json
+import logging
+import os
+import time
+from pathlib import Path
+import sys
+import numpy as np
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+from recommenders.als import ALS_META_FILE, load_factors, save_model_files
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# file names inside config.MODEL_DIR - the backend reads the same names
+ANN_FILES = {
+    'centroids': 'ann_centroids.npy',
+    'list_offsets': 'ann_list_offsets.npy',
+    'list_radii': 'ann_list_radii.npy',
+    'book_ids': 'ann_book_ids.npy',
+    'vectors': 'ann_vectors.npy'
+}
+ANN_META_FILE = 'ann_meta.json'
+
+def nearest_centroids(vectors, centroids, block_cells=None):
+    """Index of the nearest centroid (Euclidean) of every vector, scored in blocks"""
+    block_cells = block_cells or config.SIMILARITY_BLOCK_CELLS
+    block_rows = max(1, block_cells // len(centroids))
+    # argmin |x - c|^2 == argmax (x.c - |c|^2 / 2)
+    half_norms = 0.5 * (centroids * centroids).sum(axis=1)
+
+    assignments = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), block_rows):
+        scores = vectors[start:start + block_rows] @ centroids.T - half_norms
+        assignments[start:start + block_rows] = scores.argmax(axis=1)
+    return assignments
+
+def kmeans(vectors, n_lists, iterations=None, seed=42):
+    """
+    Cluster vectors with Lloyd's k-means
+
+    Returns:
+        tuple: (centroids, assignments)
+    """
+    iterations = iterations or config.ANN_KMEANS_ITERATIONS
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)].copy()
+
+    for _ in range(iterations):
+        assignments = nearest_centroids(vectors, centroids)
+        counts = np.bincount(assignments, minlength=n_lists)
+
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+
+        # restart empty lists from random vectors
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = vectors[rng.choice(len(vectors), len(empty), replace=False)]
+
+    return centroids, nearest_centroids(vectors, centroids)
+
+def build_ivf(book_ids, vectors, n_lists):
+    """
+    Group the vectors into inverted lists stored contiguously
+
+    Returns:
+        dict: centroids, list_offsets (list i is rows offsets[i]:offsets[i+1]),
+            list_radii (largest member distance from the centroid), book_ids
+            and vectors in list order
+    """
+    centroids, assignments = kmeans(vectors, n_lists)
+    order = np.argsort(assignments, kind='stable')
+    counts = np.bincount(assignments, minlength=n_lists)
+
+    radii = np.zeros(n_lists, dtype=np.float32)
+    np.maximum.at(radii, assignments, np.linalg.norm(vectors - centroids[assignments], axis=1))
+
+    return {
+        'centroids': centroids.astype(np.float32),
+        'list_offsets': np.concatenate([[0], np.cumsum(counts)]).astype(np.int64),
+        'list_radii': radii,
+        'book_ids': book_ids[order].astype(np.int64),
+        'vectors': vectors[order].astype(np.float32)
+    }
+
+def ivf_search(index, query, k, nprobe):
+    """
+    Find the k books with the largest inner product with query
+
+    Only the nprobe lists with the highest upper bound q.c + |q| * radius
+    on their members' scores are scanned. The backend runs the same search
+    on the memory-mapped files.
+
+    Returns:
+        ndarray: Book ids, best first
+    """
+    centroids, offsets = index['centroids'], index['list_offsets']
+    nprobe = min(nprobe, len(centroids))
+    bounds = centroids @ query + np.linalg.norm(query) * index['list_radii']
+    lists = np.argpartition(-bounds, nprobe - 1)[:nprobe]
+    rows = np.concatenate([np.arange(offsets[i], offsets[i + 1]) for i in lists])
+
+    scores = index['vectors'][rows] @ query
+    k = min(k, len(rows))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return index['book_ids'][rows[top[np.argsort(-scores[top])]]]
+
+def measure_recall(index, book_ids, vectors, queries, k, nprobes):
+    """
+    Compare IVF search with brute-force scoring for several nprobe values
+
+    Args:
+        index (dict): Arrays returned by build_ivf
+        book_ids (ndarray): Book id of every row of vectors
+        vectors (ndarray): All book vectors
+        queries (ndarray): Query vectors (e.g. a sample of user factors)
+        k (int): Neighbours compared per query
+        nprobes (list): nprobe values to measure
+
+    Returns:
+        list: {'nprobe', 'recall', 'ms_per_query'} per nprobe value
+    """
+    exact_scores = queries @ vectors.T
+    exact = book_ids[np.argpartition(-exact_scores, k - 1, axis=1)[:, :k]]
+
+    results = []
+    for nprobe in nprobes:
+        start_time = time.perf_counter()
+        found = [ivf_search(index, query, k, nprobe) for query in queries]
+        elapsed_time = time.perf_counter() - start_time
+
+        hits = sum(len(np.intersect1d(approx, truth)) for approx, truth in zip(found, exact))
+        results.append({
+            'nprobe': int(nprobe),
+            'recall': round(hits / (k * len(queries)), 4),
+            'ms_per_query': round(elapsed_time * 1000 / len(queries), 4)
+        })
+        logger.info(f'nprobe {nprobe}: recall@{k} {results[-1]["recall"]:.3f}, '
+                    f'{results[-1]["ms_per_query"]:.3f} ms per query')
+    return results
+
+def build_ann_index(n_lists=None):
+    """
+    Build the IVF index over the ALS book factors and check its recall
+
+    The smallest nprobe reaching config.ANN_TARGET_RECALL against brute-force
+    scoring of sampled users is saved as the index's default.
+
+    Returns:
+        dict: Index metadata
+    """
+    start_time = time.time()
+    if not os.path.exists(os.path.join(config.MODEL_DIR, ALS_META_FILE)):
+        logger.warning('No ALS model found, skipping ANN index')
+        return None
+
+    factors = load_factors()
+    book_ids = np.asarray(factors['book_ids'])
+    vectors = np.asarray(factors['book_factors'], dtype=np.float32)
+    n_lists = n_lists or config.ANN_LISTS or max(1, int(4 * np.sqrt(len(book_ids))))
+    n_lists = min(n_lists, len(book_ids))
+
+    index = build_ivf(book_ids, vectors, n_lists)
+    logger.info(f'Built IVF index of {len(book_ids)} books in {n_lists} lists')
+
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(factors['user_ids']), min(config.ANN_RECALL_QUERIES, len(factors['user_ids'])),
+                        replace=False)
+    queries = np.asarray(factors['user_factors'][np.sort(sample)], dtype=np.float32)
+    k = min(config.ANN_RECALL_K, len(book_ids))
+    nprobes = sorted({max(1, int(n_lists * share)) for share in (0.01, 0.02, 0.05, 0.1, 0.2, 0.5)} | {n_lists})
+    recall = measure_recall(index, book_ids, vectors, queries, k, nprobes)
+
+    reaching = [result['nprobe'] for result in recall if result['recall'] >= config.ANN_TARGET_RECALL]
+    default_nprobe = reaching[0] if reaching else n_lists
+
+    with open(os.path.join(config.MODEL_DIR, ALS_META_FILE)) as f:
+        als_meta = json.load(f)
+    meta = {
+        'built_at': datetime.now().isoformat(),
+        'vectors': 'als_book_factors',
+        'als_trained_at': als_meta['trained_at'],
+        'metric': 'inner_product',
+        'books': len(book_ids),
+        'lists': n_lists,
+        'default_nprobe': default_nprobe,
+        'recall_k': k,
+        'recall': recall
+    }
+    save_model_files(ANN_FILES, index, ANN_META_FILE, meta)
+
+    elapsed_time = time.time() - start_time
+    logger.info(f'Saved ANN index (default nprobe {default_nprobe}) in {elapsed_time:.2f} seconds')
+    return meta
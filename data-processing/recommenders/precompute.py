@@ -0,0 +1,197 @@
+# data-processing/recommenders/precompute.py
+
+"""
+Precompute module - Generates top-N recommendations for every user in batch
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+import sys
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+from etl.bulk_load import BulkLoader, sqlite_path
+from etl.load import Base, create_db_tables
+from recommenders.als import ALS_META_FILE, load_factors
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# factor arrays of the worker process, mapped once by load_worker_model
+worker_model = {}
+
+def load_worker_model(model_dir, global_mean, database_uri):
+    """Process pool initializer - every worker maps the same factor files"""
+    worker_model.update(load_factors(model_dir))
+    worker_model['global_mean'] = global_mean
+    worker_model['db_path'] = sqlite_path(database_uri)
+
+def rated_books(db_path, first_user_id, last_user_id):
+    """Read the (user_id, book_id) pairs rated by a range of users"""
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        return pd.read_sql_query(
+            'SELECT user_id, book_id FROM ratings WHERE user_id BETWEEN ? AND ?',
+            conn, params=(first_user_id, last_user_id)
+        )
+    finally:
+        conn.close()
+
+def recommend_user_range(first_row, last_row, top_n):
+    """
+    Score every book for a contiguous range of trained users
+
+    Runs in a worker process. Users are scored in blocks of
+    config.SIMILARITY_BLOCK_CELLS scores with one matrix product per block;
+    rated books are masked and the top N taken with argpartition.
+
+    Args:
+        first_row (int): First row of the user factor matrix
+        last_row (int): Row after the last user of the range
+        top_n (int): Recommendations per user
+
+    Returns:
+        DataFrame: user_id, book_id, score and rank columns
+    """
+    user_ids = worker_model['user_ids'][first_row:last_row]
+    book_ids = worker_model['book_ids']
+    book_factors = worker_model['book_factors']
+    top_n = min(top_n, len(book_ids))
+
+    rated = rated_books(worker_model['db_path'], int(user_ids[0]), int(user_ids[-1]))
+    rated_user_ids = rated['user_id'].to_numpy()
+    rated_book_ids = rated['book_id'].to_numpy()
+    rated_rows = np.minimum(np.searchsorted(user_ids, rated_user_ids), len(user_ids) - 1)
+    rated_cols = np.minimum(np.searchsorted(book_ids, rated_book_ids), len(book_ids) - 1)
+    # users and books added since training have no row or column
+    known = (user_ids[rated_rows] == rated_user_ids) & (book_ids[rated_cols] == rated_book_ids)
+    rated_rows, rated_cols = rated_rows[known], rated_cols[known]
+
+    block_rows = max(1, config.SIMILARITY_BLOCK_CELLS // len(book_ids))
+    results = []
+    for start in range(0, len(user_ids), block_rows):
+        stop = min(start + block_rows, len(user_ids))
+        scores = worker_model['user_factors'][first_row + start:first_row + stop] @ book_factors.T
+        scores += worker_model['global_mean']
+
+        in_block = (rated_rows >= start) & (rated_rows < stop)
+        scores[rated_rows[in_block] - start, rated_cols[in_block]] = -np.inf
+
+        top = np.argpartition(-scores, top_n - 1, axis=1)[:, :top_n]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+        block = pd.DataFrame({
+            'user_id': np.repeat(user_ids[start:stop], top_n),
+            'book_id': book_ids[top.ravel()],
+            'score': top_scores.ravel(),
+            'rank': np.tile(np.arange(1, top_n + 1), stop - start)
+        })
+        # users who rated almost everything run out of candidates
+        results.append(block[np.isfinite(block['score'])])
+
+    return pd.concat(results, ignore_index=True)
+
+def spill_block(directory, index, recommendations):
+    """Write one range's recommendations to a temporary .npz file"""
+    path = os.path.join(directory, f'recommendations_{index:06d}.npz')
+    np.savez(path, **{col: recommendations[col].to_numpy() for col in recommendations.columns})
+    return path
+
+def read_block(path):
+    """Read a spilled range back as a DataFrame"""
+    with np.load(path) as block:
+        return pd.DataFrame({col: block[col] for col in block.files})
+
+def user_ranges(n_users, users_per_task):
+    """Split the trained users into contiguous row ranges"""
+    return [(start, min(start + users_per_task, n_users))
+            for start in range(0, n_users, users_per_task)]
+
+def precompute_recommendations(top_n=None, workers=None, users_per_task=None):
+    """
+    Generate the top-N ALS recommendations of every trained user
+
+    User id ranges are scored across a process pool and spilled to
+    temporary files, then written to the recommendations table in one
+    transaction. The write lock is only taken for the insert and swap, so
+    live API writes are not blocked while the model scores. Earlier batch
+    rows are replaced; rows logged by live requests (rank NULL) are kept.
+
+    Args:
+        top_n (int): Recommendations per user (defaults to config.PRECOMPUTE_TOP_N)
+        workers (int): Worker processes (defaults to config.PRECOMPUTE_WORKERS)
+        users_per_task (int): Users per task (defaults to config.PRECOMPUTE_USERS_PER_TASK)
+
+    Returns:
+        int: Number of recommendations written
+    """
+    top_n = top_n or config.PRECOMPUTE_TOP_N
+    workers = workers or config.PRECOMPUTE_WORKERS
+    users_per_task = users_per_task or config.PRECOMPUTE_USERS_PER_TASK
+    start_time = time.time()
+
+    if not os.path.exists(os.path.join(config.MODEL_DIR, ALS_META_FILE)):
+        logger.warning('No ALS model found, skipping batch recommendations')
+        return 0
+
+    with open(os.path.join(config.MODEL_DIR, ALS_META_FILE)) as f:
+        meta = json.load(f)
+    ranges = user_ranges(meta['users'], users_per_task)
+    if not ranges:
+        logger.warning('ALS model has no users, skipping batch recommendations')
+        return 0
+    logger.info(f'Generating top {top_n} recommendations for {meta["users"]} users '
+                f'in {len(ranges)} tasks')
+
+    generated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')
+    create_db_tables(create_engine(config.DATABASE_URI))
+
+    rows = 0
+    with tempfile.TemporaryDirectory(prefix='precompute_') as spill_dir:
+        # score first, without holding the database write lock
+        spilled = []
+        with ProcessPoolExecutor(max_workers=workers, initializer=load_worker_model,
+                                 initargs=(config.MODEL_DIR, meta['global_mean'], config.DATABASE_URI)) as executor:
+            # results arrive in user id order and are spilled as they come
+            first_rows, last_rows = zip(*ranges)
+            for index, recommendations in enumerate(executor.map(recommend_user_range, first_rows, last_rows,
+                                                                 [top_n] * len(ranges))):
+                spilled.append(spill_block(spill_dir, index, recommendations))
+
+        with BulkLoader(Base.metadata) as loader:
+            loader.begin('recommendations')
+            loader.keep_rows('recommendations', 'rank IS NULL')
+            for path in spilled:
+                recommendations = read_block(path)
+                recommendations['source'] = 'als'
+                recommendations['generated_at'] = generated_at
+                loader.insert('recommendations', recommendations)
+                rows += len(recommendations)
+            loader.swap('recommendations')
+
+    elapsed_time = time.time() - start_time
+    logger.info(f'Saved {rows} batch recommendations in {elapsed_time:.2f} seconds')
+    return rows
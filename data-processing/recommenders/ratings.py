@@ -0,0 +1,70 @@
+# data-processing/recommenders/ratings.py
+
+"""
+Ratings module - Reads the loaded ratings as a sparse user x book matrix
+"""
+
+import logging
+import sqlite3
+from pathlib import Path
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+from etl.bulk_load import sqlite_path
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def read_ratings(chunk_size=None):
+    """Read user_id, book_id and rating from the database with compact dtypes"""
+    chunk_size = chunk_size or config.RATINGS_CHUNK_SIZE
+    conn = sqlite3.connect(sqlite_path(config.DATABASE_URI))
+    try:
+        chunks = [
+            chunk.astype(config.RATINGS_DTYPES)
+            for chunk in pd.read_sql_query('SELECT user_id, book_id, rating FROM ratings',
+                                           conn, chunksize=chunk_size)
+        ]
+    finally:
+        conn.close()
+
+    if not chunks:
+        return pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in config.RATINGS_DTYPES.items()})
+    return pd.concat(chunks, ignore_index=True)
+
+def ratings_matrix(ratings):
+    """
+    Build a CSR matrix of users x books
+
+    Args:
+        ratings (DataFrame): user_id, book_id and rating columns
+
+    Returns:
+        tuple: (csr_matrix, user_ids, book_ids) where row i belongs to user_ids[i]
+            and column j to book_ids[j]; both id arrays are sorted
+    """
+    user_ids, rows = np.unique(ratings['user_id'].to_numpy(), return_inverse=True)
+    book_ids, cols = np.unique(ratings['book_id'].to_numpy(), return_inverse=True)
+
+    matrix = sparse.csr_matrix(
+        (ratings['rating'].to_numpy(dtype=np.float32), (rows, cols)),
+        shape=(len(user_ids), len(book_ids))
+    )
+    matrix.sort_indices()
+    logger.info(f'Built ratings matrix of {len(user_ids)} users x {len(book_ids)} books '
+                f'with {matrix.nnz} ratings')
+    return matrix, user_ids, book_ids
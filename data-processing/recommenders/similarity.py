@@ -0,0 +1,165 @@
+# data-processing/recommenders/similarity.py
+
+"""
+Similarity module - Precomputes the nearest neighbours of every book
+"""
+
+import logging
+import sqlite3
+import time
+from pathlib import Path
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sqlalchemy import create_engine
+
+# add parent directory to path to import config
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import config
+
+from etl.bulk_load import BulkLoader, sqlite_path
+from etl.load import Base, create_db_tables
+
+# set up logging
+logging.basicConfig(
+    level=getattr(logging, config.LOG_LEVEL),
+    format=config.LOG_FORMAT,
+    handlers=[
+        logging.FileHandler(config.LOG_FILE),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger(__name__)
+
+# source label of the tag-based neighbours in book_similarities
+TAG_SOURCE = 'tag_tfidf'
+
+def read_book_tags(conn):
+    """Read the tag counts of every book, keyed by book_id"""
+    return pd.read_sql_query('''
+        SELECT b.book_id, bt.tag_id, bt.count
+        FROM book_tags bt
+        JOIN books b ON b.goodreads_book_id = bt.goodreads_book_id
+        WHERE bt.count > 0
+    ''', conn)
+
+def tfidf_matrix(book_tags):
+    """
+    Build an L2-normalized TF-IDF matrix of books x tags
+
+    Args:
+        book_tags (DataFrame): book_id, tag_id and count columns
+
+    Returns:
+        tuple: (csr_matrix, book_ids) where row i belongs to book_ids[i]
+    """
+    book_ids, rows = np.unique(book_tags['book_id'].to_numpy(), return_inverse=True)
+    _, cols = np.unique(book_tags['tag_id'].to_numpy(), return_inverse=True)
+
+    # dampen raw counts, then down-weight tags that are on most books
+    tf = 1.0 + np.log(book_tags['count'].to_numpy(dtype=np.float64))
+    document_frequency = np.bincount(cols)
+    idf = np.log(len(book_ids) / document_frequency)
+
+    matrix = sparse.csr_matrix((tf * idf[cols], (rows, cols)),
+                               shape=(len(book_ids), len(document_frequency)), dtype=np.float32)
+    return normalize_rows(matrix), book_ids
+
+def normalize_rows(matrix):
+    """Scale the rows of a sparse matrix to unit length, so dot products are cosines"""
+    matrix = matrix.tocsr()
+    matrix.eliminate_zeros()
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms).dot(matrix).tocsr().astype(np.float32)
+
+def top_k_neighbours(matrix, k, block_cells=None):
+    """
+    Find the k most cosine-similar rows of every row
+
+    Rows are scored in blocks so only block x n scores are held in memory.
+
+    Returns:
+        tuple: (indices, scores) arrays of shape (n, k), best first
+    """
+    block_cells = block_cells or config.SIMILARITY_BLOCK_CELLS
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    block_rows = max(1, block_cells // max(n, 1))
+    transposed = matrix.T.tocsc()
+
+    indices = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+    if k == 0:
+        return indices, scores
+
+    for start in range(0, n, block_rows):
+        stop = min(start + block_rows, n)
+        block = (matrix[start:stop] @ transposed).toarray()
+        # a book is not its own neighbour
+        block[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        top = np.argpartition(block, -k, axis=1)[:, -k:]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        indices[start:stop] = np.take_along_axis(top, order, axis=1)
+        scores[start:stop] = np.take_along_axis(top_scores, order, axis=1)
+
+    return indices, scores
+
+def neighbours_table(source, book_ids, indices, scores):
+    """Flatten neighbour arrays into book_similarities rows, dropping zero scores"""
+    n, k = indices.shape
+    table = pd.DataFrame({
+        'source': source,
+        'book_id': np.repeat(book_ids, k),
+        'rank': np.tile(np.arange(1, k + 1), n),
+        'similar_book_id': book_ids[indices.ravel()],
+        'score': scores.ravel()
+    })
+    return table[table['score'] > 0].reset_index(drop=True)
+
+def save_neighbours(source, table):
+    """Replace the rows of one source in book_similarities"""
+    create_db_tables(create_engine(config.DATABASE_URI))
+    with BulkLoader(Base.metadata) as loader:
+        loader.begin('book_similarities')
+        loader.keep_rows('book_similarities', 'source != ?', (source,))
+        loader.insert('book_similarities', table)
+        loader.swap('book_similarities')
+
+def build_tag_similarities(top_k=None):
+    """
+    Precompute the top-k tag-similar books of every book
+
+    Args:
+        top_k (int): Neighbours stored per book (defaults to config.SIMILARITY_TOP_K)
+
+    Returns:
+        int: Number of rows written
+    """
+    top_k = top_k or config.SIMILARITY_TOP_K
+    start_time = time.time()
+
+    conn = sqlite3.connect(sqlite_path(config.DATABASE_URI))
+    try:
+        book_tags = read_book_tags(conn)
+    finally:
+        conn.close()
+    logger.info(f'Read {len(book_tags)} book tags')
+
+    if book_tags.empty:
+        logger.warning('No book tags found, skipping tag similarities')
+        return 0
+
+    matrix, book_ids = tfidf_matrix(book_tags)
+    logger.info(f'Built TF-IDF matrix of {matrix.shape[0]} books x {matrix.shape[1]} tags')
+
+    indices, scores = top_k_neighbours(matrix, top_k)
+    table = neighbours_table(TAG_SOURCE, book_ids, indices, scores)
+    save_neighbours(TAG_SOURCE, table)
+
+    elapsed_time = time.time() - start_time
+    logger.info(f'Saved {len(table)} tag similarities in {elapsed_time:.2f} seconds')
+    return len(table)
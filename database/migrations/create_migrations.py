@@ -129,6 +129,122 @@ def add_added_date_to_to_read(conn):
     
     conn.commit()
 
+def add_secondary_indexes(conn):
+    """
+    Migration to index the hot lookup columns
+    Matches the indexes declared in database/models.py
+    """
+    cursor = conn.cursor()
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_ratings_user_id ON ratings (user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_ratings_book_id ON ratings (book_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_book_tags_tag_id ON book_tags (tag_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_books_goodreads_book_id ON books (goodreads_book_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_books_ratings_count ON books (ratings_count)')
+    conn.commit()
+
+def add_rank_to_recommendations(conn):
+    """
+    Migration to add rank column to recommendations table
+    Batch-generated recommendations are stored with their rank and read back in order
+    """
+    cursor = conn.cursor()
+    columns = [row[1] for row in cursor.execute('PRAGMA table_info(recommendations)')]
+    if 'rank' not in columns:
+        cursor.execute('ALTER TABLE recommendations ADD COLUMN rank INTEGER')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS ix_recommendations_user_source_rank
+    ON recommendations (user_id, source, rank)
+    ''')
+    conn.commit()
+
+def create_user_tag_profiles(conn):
+    """
+    Migration to create the user_tag_profiles table
+    Profiles are built lazily by the backend, so no backfill is needed
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_tag_profiles (
+        user_id INTEGER NOT NULL,
+        tag_weights TEXT NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (user_id)
+    )
+    ''')
+    conn.commit()
+
+def create_user_factors(conn):
+    """Migration to create the user_factors table for folded-in ALS user vectors"""
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS user_factors (
+        user_id INTEGER NOT NULL,
+        factors BLOB NOT NULL,
+        trained_at VARCHAR(32) NOT NULL,
+        updated_at DATETIME,
+        PRIMARY KEY (user_id)
+    )
+    ''')
+    conn.commit()
+
+def create_books_fts(conn):
+    """
+    Migration to create the books_fts full-text index over title, original_title and authors
+    Matches the index the ETL bulk loader rebuilds; triggers keep it in sync with books
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5(
+        title, original_title, authors,
+        content='books', content_rowid='book_id', tokenize='unicode61 remove_diacritics 2'
+    )
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN
+        INSERT INTO books_fts (rowid, title, original_title, authors)
+        VALUES (new.book_id, new.title, new.original_title, new.authors);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, original_title, authors)
+        VALUES ('delete', old.book_id, old.title, old.original_title, old.authors);
+    END
+    ''')
+    cursor.execute('''
+    CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE OF title, original_title, authors ON books BEGIN
+        INSERT INTO books_fts (books_fts, rowid, title, original_title, authors)
+        VALUES ('delete', old.book_id, old.title, old.original_title, old.authors);
+        INSERT INTO books_fts (rowid, title, original_title, authors)
+        VALUES (new.book_id, new.title, new.original_title, new.authors);
+    END
+    ''')
+    # index the existing books
+    cursor.execute("INSERT INTO books_fts (books_fts) VALUES ('rebuild')")
+    # bump the catalog version like an ETL reload, so a running backend
+    # rechecks for the index instead of keeping its cached LIKE fallback
+    version = cursor.execute('PRAGMA user_version').fetchone()[0]
+    cursor.execute(f'PRAGMA user_version = {version + 1}')
+    conn.commit()
+
+def add_keyset_indexes(conn):
+    """
+    Migration to index the sort orders of the cursor-paginated list endpoints
+    Matches the indexes declared in database/models.py
+    """
+    cursor = conn.cursor()
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_books_title ON books (title)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_books_authors ON books (authors)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_books_original_publication_year ON books (original_publication_year)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_books_average_rating ON books (average_rating)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_ratings_user_timestamp ON ratings (user_id, timestamp, book_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_ratings_book_timestamp ON ratings (book_id, timestamp, user_id)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS ix_to_read_user_added_date ON to_read (user_id, added_date, book_id)')
+    # user_activity is created by the backend, so an ETL-built database may not have it yet
+    if cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'user_activity'").fetchone():
+        cursor.execute('CREATE INDEX IF NOT EXISTS ix_user_activity_user_timestamp ON user_activity (user_id, timestamp)')
+    conn.commit()
+
 def run_migrations():
     """Run all pending migrations"""
     # get database path from config
@@ -150,7 +266,13 @@ def run_migrations():
     migrations = [
         ('add_review_to_ratings', add_review_to_ratings),
         ('add_timestamp_to_ratings', add_timestamp_to_ratings),
-        ('add_added_date_to_to_read', add_added_date_to_to_read)
+        ('add_added_date_to_to_read', add_added_date_to_to_read),
+        ('add_secondary_indexes', add_secondary_indexes),
+        ('add_rank_to_recommendations', add_rank_to_recommendations),
+        ('create_user_tag_profiles', create_user_tag_profiles),
+        ('create_user_factors', create_user_factors),
+        ('create_books_fts', create_books_fts),
+        ('add_keyset_indexes', add_keyset_indexes)
     ]
 
     # apply pending migrations
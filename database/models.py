@@ -28,19 +28,19 @@ class Book(db.Model):
     __tablename__ = 'books'
 
     book_id = db.Column(db.Integer, primary_key=True)
-    goodreads_book_id = db.Column(db.Integer)
+    goodreads_book_id = db.Column(db.Integer, index=True)   # joined by every tag lookup
     best_book_id = db.Column(db.Integer)
     work_id = db.Column(db.Integer)
     books_count = db.Column(db.Integer)
     isbn = db.Column(db.String(20))
     isbn13 = db.Column(db.Float)
-    authors = db.Column(db.String(255))
-    original_publication_year = db.Column(db.Float)
+    authors = db.Column(db.String(255), index=True)   # list sort orders are keyset-paginated
+    original_publication_year = db.Column(db.Float, index=True)
     original_title = db.Column(db.String(255))
-    title = db.Column(db.String(255), nullable=False)
+    title = db.Column(db.String(255), nullable=False, index=True)
     language_code = db.Column(db.String(10))
-    average_rating = db.Column(db.Float)
-    ratings_count = db.Column(db.Integer)
+    average_rating = db.Column(db.Float, index=True)
+    ratings_count = db.Column(db.Integer, index=True)   # default sort order
     work_ratings_count = db.Column(db.Integer)
     work_text_reviews_count = db.Column(db.Integer)
     ratings_1 = db.Column(db.Integer)
@@ -60,8 +60,8 @@ class Rating(db.Model):
     """Ratings model"""
     __tablename__ = 'ratings'
 
-    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), primary_key=True)
-    book_id = db.Column(db.Integer, db.ForeignKey('books.book_id'), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), primary_key=True, index=True)
+    book_id = db.Column(db.Integer, db.ForeignKey('books.book_id'), primary_key=True, index=True)
     rating = db.Column(db.Integer, nullable=False)
     review = db.Column(db.String(2000))
     timestamp = db.Column(db.DateTime, default=datetime.now)
@@ -70,6 +70,12 @@ class Rating(db.Model):
     user = relationship('User', back_populates='ratings')
     book = relationship('Book', back_populates='ratings')
 
+    # a user's ratings and a book's reviews are listed newest first, paginated by cursor
+    __table_args__ = (
+        db.Index('ix_ratings_user_timestamp', 'user_id', 'timestamp', 'book_id'),
+        db.Index('ix_ratings_book_timestamp', 'book_id', 'timestamp', 'user_id'),
+    )
+
 class ToRead(db.Model):
     """To Read model"""
     __tablename__ = 'to_read'
@@ -82,6 +88,10 @@ class ToRead(db.Model):
     user = relationship('User', back_populates='to_read')
     book = relationship('Book', back_populates='to_read')
 
+    __table_args__ = (
+        db.Index('ix_to_read_user_added_date', 'user_id', 'added_date', 'book_id'),
+    )
+
 class Tag(db.Model):
     """Tag model"""
     __tablename__ = 'tags'
@@ -98,13 +108,42 @@ class BookTag(db.Model):
 
     # using a composite primary key
     goodreads_book_id = db.Column(db.Integer, db.ForeignKey('books.book_id'), primary_key=True)
-    tag_id = db.Column(db.Integer, db.ForeignKey('tags.tag_id'), primary_key=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tags.tag_id'), primary_key=True, index=True)
     count = db.Column(db.Integer, default=1)
 
     # relationships
     book = relationship('Book', back_populates='book_tags')
     tag = relationship('Tag', back_populates='book_tags')
 
+class BookSimilarity(db.Model):
+    """Book Similarity model for precomputed nearest neighbours of each book"""
+    __tablename__ = 'book_similarities'
+
+    # the primary key doubles as the lookup index: (source, book_id) ordered by rank
+    source = db.Column(db.String(20), primary_key=True)   # e.g., 'tag_tfidf'
+    book_id = db.Column(db.Integer, db.ForeignKey('books.book_id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)   # 1 = most similar
+    similar_book_id = db.Column(db.Integer, db.ForeignKey('books.book_id'), nullable=False)
+    score = db.Column(db.Float)
+
+class UserTagProfile(db.Model):
+    """User Tag Profile model caching each user's tag-affinity vector"""
+    __tablename__ = 'user_tag_profiles'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    # JSON {tag_id: number of books the user liked carrying the tag}
+    tag_weights = db.Column(db.Text, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+class UserFactor(db.Model):
+    """User Factor model holding ALS user vectors re-solved after new ratings"""
+    __tablename__ = 'user_factors'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    factors = db.Column(db.LargeBinary, nullable=False)   # float32 vector
+    trained_at = db.Column(db.String(32), nullable=False)   # ALS model the vector was solved against
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
 class UserActivity(db.Model):
     """User Activity model for tracking user activities"""
     __tablename__ = 'user_activity'
@@ -116,6 +155,10 @@ class UserActivity(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.now)
     details = db.Column(db.String(255))   # additional activity details if needed
 
+    __table_args__ = (
+        db.Index('ix_user_activity_user_timestamp', 'user_id', 'timestamp'),
+    )
+
 class Recommendation(db.Model):
     """Recommendation model for storing generated recommendations"""
     __tablename__ = 'recommendations'
@@ -125,4 +168,10 @@ class Recommendation(db.Model):
     book_id = db.Column(db.Integer, db.ForeignKey('books.book_id'))
     score = db.Column(db.Float)   # recommendation score/confidence
     source = db.Column(db.String(50)) # algorithm/source of the recommendation
-    generated_at = db.Column(db.DateTime, default=datetime.now)
\ No newline at end of file
+    generated_at = db.Column(db.DateTime, default=datetime.now)
+    rank = db.Column(db.Integer)   # position in a batch-generated list, NULL for logged live results
+
+    # serving reads one user's precomputed list for a source, in rank order
+    __table_args__ = (
+        db.Index('ix_recommendations_user_source_rank', 'user_id', 'source', 'rank'),
+    )
\ No newline at end of file
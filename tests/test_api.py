@@ -3,12 +3,16 @@
 import sys
 from pathlib import Path
 import unittest
+from unittest import mock
 import json
+import threading
+import time
+from sqlalchemy import text
 from sqlalchemy.orm import sessionmaker
 
 sys.path.append(str(Path(__file__).resolve().parent.parent))
 from backend.app import create_app, db
-from database.models import User, Book, Rating, Tag, BookTag, ToRead
+from database.models import User, Book, Rating, Tag, BookTag, ToRead, BookSimilarity
 from backend.config import config
 
 class GoodbooksAPITest(unittest.TestCase):
@@ -156,5 +160,221 @@ class GoodbooksAPITest(unittest.TestCase):
             self.assertEqual(response.status_code, 200)
             self.assertTrue(data["success"])
 
+    def test_8_similar_books(self):
+        """Test similar books are served from the precomputed neighbours"""
+        db.session.add(Book(book_id=2, goodreads_book_id=2, title='Neighbour Book',
+                            authors='Other Author', average_rating=3.5, ratings_count=50))
+        db.session.add(BookSimilarity(source='tag_tfidf', book_id=1, rank=1,
+                                      similar_book_id=2, score=0.8))
+        db.session.commit()
+
+        response = self.client.get(f'{self.BASE_URL}/books/similar/1')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual([book['book_id'] for book in data['data']], [2])
+
+    def test_9_tag_affinity_profile(self):
+        """Test rating changes are applied to the cached tag-affinity vector"""
+        from backend.api.services.tag_affinity import get_tag_affinity
+
+        db.session.add(Tag(tag_id=7, tag_name='fantasy'))
+        db.session.add(BookTag(goodreads_book_id=1, tag_id=7, count=10))
+        db.session.commit()
+
+        register_data = json.loads(self.client.post(f'{self.BASE_URL}/auth/register',
+                                                    json=self.test_user).data)
+        headers = {'Authorization': f'Bearer {register_data["data"]["token"]}'}
+        user_id = register_data['data']['user_id']
+
+        # the profile is built on first use, then kept up to date by rating changes
+        self.assertEqual(get_tag_affinity(user_id), {})
+        self.client.put(f'{self.BASE_URL}/books/rate/1', json={'rating': 5}, headers=headers)
+        self.assertEqual(get_tag_affinity(user_id), {7: 1})
+        self.client.put(f'{self.BASE_URL}/books/rate/1', json={'rating': 2}, headers=headers)
+        self.assertEqual(get_tag_affinity(user_id), {})
+
+    def test_10_popular_exclude_rated(self):
+        """Test the popularity ranking skips the user's rated books"""
+        # book 1 (100 ratings) is not eligible, book 3's high average is pulled towards the mean
+        db.session.add(Book(book_id=2, goodreads_book_id=2, title='Well Rated Book',
+                            authors='Other Author', average_rating=4.2, ratings_count=50000))
+        db.session.add(Book(book_id=3, goodreads_book_id=3, title='Niche Book',
+                            authors='Other Author', average_rating=4.3, ratings_count=200))
+        db.session.add(Book(book_id=4, goodreads_book_id=4, title='Average Book',
+                            authors='Other Author', average_rating=3.9, ratings_count=20000))
+        db.session.commit()
+
+        response = self.client.get(f'{self.BASE_URL}/recommendations/popular')
+        self.assertEqual([book['book_id'] for book in json.loads(response.data)['data']], [2, 3, 4])
+
+        register_data = json.loads(self.client.post(f'{self.BASE_URL}/auth/register',
+                                                    json=self.test_user).data)
+        headers = {'Authorization': f'Bearer {register_data["data"]["token"]}'}
+        self.client.put(f'{self.BASE_URL}/books/rate/2', json={'rating': 5}, headers=headers)
+
+        response = self.client.get(f'{self.BASE_URL}/recommendations/popular?exclude_rated=true&limit=2',
+                                   headers=headers)
+        self.assertEqual([book['book_id'] for book in json.loads(response.data)['data']], [3, 4])
+
+    def test_11_rerank_candidates(self):
+        """Test the re-ranker blends normalized scores and keeps each book's main source"""
+        from backend.api.services.candidates import Candidates
+        from backend.api.services.pipeline import get_recommendation_pipeline
+
+        pipeline = get_recommendation_pipeline()
+        pipeline.weights = {'als': 1.0, 'popular': 0.4}
+        ranked = pipeline.rerank([
+            Candidates('als', [(10, 4.8), (11, 4.4), (12, 4.0)]),
+            Candidates('popular', [(12, 0), (13, -1)], stored=True),
+            Candidates('tag_based', [])
+        ], limit=3)
+
+        # book 12 is last for als but first for popular: 0.0 + 0.4
+        self.assertEqual([(book_id, source) for book_id, _, source, _ in ranked],
+                         [(10, 'als'), (11, 'als'), (12, 'popular')])
+        self.assertAlmostEqual(ranked[1][1], 0.5)
+        self.assertTrue(ranked[2][3])
+
+    def test_12_full_text_search(self):
+        """Test search runs through the full-text index kept in sync by triggers"""
+        from database.migrations.create_migrations import create_books_fts
+
+        # a running backend picks up the index once the migration creates it
+        response = self.client.get(f'{self.BASE_URL}/books/search?q=herbert dun')
+        self.assertEqual(json.loads(response.data)['data']['books'], [])
+
+        connection = db.engine.raw_connection()
+        create_books_fts(connection)
+        connection.close()
+
+        db.session.add(Book(book_id=2, goodreads_book_id=2, title='Dune Messiah',
+                            authors='Frank Herbert', average_rating=3.9, ratings_count=5000))
+        db.session.add(Book(book_id=3, goodreads_book_id=3, title='Dune',
+                            authors='Frank Herbert', average_rating=4.2, ratings_count=500000))
+        db.session.commit()
+
+        response = self.client.get(f'{self.BASE_URL}/books/search?q=herbert dun')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['book_id'] for book in data['data']['books']], [3, 2])
+
+    def test_13_autocomplete(self):
+        """Test autocomplete matches any title or author word, most rated first"""
+        db.session.add(Book(book_id=2, goodreads_book_id=2, title='Harry Potter and the Chamber of Secrets',
+                            authors='J.K. Rowling, Mary GrandPré', ratings_count=2000))
+        db.session.add(Book(book_id=3, goodreads_book_id=3, title="Harry Potter and the Sorcerer's Stone",
+                            authors='J.K. Rowling', ratings_count=4000))
+        db.session.commit()
+
+        response = self.client.get(f'{self.BASE_URL}/books/autocomplete?q=POTT')
+        data = json.loads(response.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book['book_id'] for book in data['data']], [3, 2])
+
+        response = self.client.get(f'{self.BASE_URL}/books/autocomplete?q=grandpre')
+        self.assertEqual([book['book_id'] for book in json.loads(response.data)['data']], [2])
+
+    def test_14_fuzzy_search(self):
+        """Test misspelled searches fall back to trigram matches"""
+        db.session.add(Book(book_id=2, goodreads_book_id=2, title='The Hobbit',
+                            authors='J.R.R. Tolkien', ratings_count=2000000))
+        db.session.add(Book(book_id=3, goodreads_book_id=3, title='Harry Potter and the Goblet of Fire',
+                            authors='J.K. Rowling', ratings_count=1500000))
+        db.session.commit()
+
+        for query, book_id in (('tolkein', 2), ('harry poter', 3)):
+            response = self.client.get(f'{self.BASE_URL}/books/search?q={query}')
+            data = json.loads(response.data)['data']
+            self.assertTrue(data['fuzzy'])
+            self.assertEqual(data['books'][0]['book_id'], book_id)
+
+        # no close match leaves the results unflagged
+        response = self.client.get(f'{self.BASE_URL}/books/search?q=xqzvw')
+        data = json.loads(response.data)['data']
+        self.assertFalse(data['fuzzy'])
+        self.assertEqual(data['books'], [])
+
+    def test_15_cursor_pagination(self):
+        """Test cursor pages follow the numbered pages, ties and NULL sort keys included"""
+        for book_id, ratings_count in ((2, 500), (3, 100), (4, None), (5, 500), (6, None)):
+            db.session.add(Book(book_id=book_id, goodreads_book_id=book_id, title=f'Book {book_id}',
+                                ratings_count=ratings_count))
+        db.session.commit()
+
+        response = self.client.get(f'{self.BASE_URL}/books/?per_page=10')
+        expected = [book['book_id'] for book in json.loads(response.data)['data']['books']]
+        self.assertEqual(expected, [5, 2, 3, 1, 6, 4])
+
+        book_ids, after = [], ''
+        while after is not None:
+            response = self.client.get(f'{self.BASE_URL}/books/?per_page=2&after={after}')
+            data = json.loads(response.data)['data']
+            self.assertNotIn('total', data['pagination'])
+            book_ids += [book['book_id'] for book in data['books']]
+            after = data['pagination']['next_cursor']
+        self.assertEqual(book_ids, expected)
+
+        response = self.client.get(f'{self.BASE_URL}/books/?after=&total=true')
+        self.assertEqual(json.loads(response.data)['data']['pagination']['total'], 6)
+        response = self.client.get(f'{self.BASE_URL}/books/?after=not-a-cursor')
+        self.assertEqual(response.status_code, 400)
+
+    def test_16_cached_result_counts(self):
+        """Test book totals are counted once per filter set and catalog version"""
+        for book_id in (2, 3):
+            db.session.add(Book(book_id=book_id, goodreads_book_id=book_id, title=f'Book {book_id}',
+                                average_rating=4.5, ratings_count=10))
+        db.session.commit()
+
+        response = self.client.get(f'{self.BASE_URL}/books/?min_rating=4&per_page=1')
+        self.assertEqual(json.loads(response.data)['data']['pagination']['total'], 3)
+
+        # a new book outside an ETL reload is not counted until the catalog version moves on
+        db.session.add(Book(book_id=4, goodreads_book_id=4, title='Book 4', average_rating=4.5))
+        db.session.commit()
+        response = self.client.get(f'{self.BASE_URL}/books/?min_rating=4.0&per_page=1&page=2')
+        self.assertEqual(json.loads(response.data)['data']['pagination']['total'], 3)
+
+        db.session.execute(text('PRAGMA user_version = 1'))
+        response = self.client.get(f'{self.BASE_URL}/books/?min_rating=4&per_page=1&count=lazy')
+        pagination = json.loads(response.data)['data']['pagination']
+        self.assertIsNone(pagination['total'])
+        self.assertTrue(pagination['has_next'])
+
+        # reaching the last page gives the total without counting
+        response = self.client.get(f'{self.BASE_URL}/books/?min_rating=4&per_page=3&page=2&count=lazy')
+        self.assertEqual(json.loads(response.data)['data']['pagination']['total'], 4)
+
+    def test_17_pipeline_budgets(self):
+        """Test a generator missing its budget is left out instead of waited for"""
+        from backend.api.services.candidates import Candidates
+        from backend.api.services.pipeline import RecommendationPipeline
+
+        released = threading.Event()
+        self.addCleanup(released.set)
+
+        def slow(user_id, limit, rated_book_ids):
+            released.wait(5)
+            return Candidates('als', [(10, 4.8)])
+
+        def fast(user_id, limit, rated_book_ids):
+            return Candidates('popular', [(11, 1.0), (12, 0.5)])
+
+        self.app.config['RECOMMENDATION_PIPELINE_WORKERS'] = 2
+        pipeline = RecommendationPipeline(self.app)
+        pipeline.budgets = {'als': 50, 'popular': 1000}
+        with mock.patch.dict('backend.api.services.pipeline.CANDIDATE_GENERATORS',
+                             {'als': slow, 'popular': fast}):
+            start = time.monotonic()
+            ranked = pipeline.recommend(('als', 'popular'), user_id=1, limit=3, rated_book_ids=[])
+            elapsed = time.monotonic() - start
+        released.set()
+        pipeline.executor.shutdown()
+
+        self.assertEqual([(book_id, source) for book_id, _, source, _ in ranked],
+                         [(11, 'popular'), (12, 'popular')])
+        self.assertLess(elapsed, 1)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,93 @@
+# tests/test_etl.py
+
+import sys
+import os
+import shutil
+from pathlib import Path
+import tempfile
+import unittest
+from unittest import mock
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'data-processing'))
+import config
+from etl.extract import extract_ratings_chunks, extract_processed
+from etl.transform import clean_ratings_chunks
+from etl.load import save_table_to_binary
+from etl import manifest
+
+class ETLTest(unittest.TestCase):
+    """Test case for the ETL pipeline"""
+
+    def setUp(self):
+        """Write a small ratings file"""
+        handle, self.ratings_file = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as f:
+            f.write('user_id,book_id,rating\n'
+                    '1,1,5\n'
+                    '1,2,\n'        # blank field in the first chunk
+                    '2,1,4\n'
+                    '2,2,300\n'     # would wrap to 44 as int8
+                    '2,3,260\n'     # would wrap to 4 as int8
+                    '1,1,3\n')      # duplicate of a row in an earlier chunk
+
+    def tearDown(self):
+        """Remove the ratings file"""
+        os.remove(self.ratings_file)
+
+    def test_1_bad_rows_dropped_and_counted(self):
+        """Test blank fields and out-of-range ratings are dropped and counted, not raised or wrapped"""
+        report = {}
+        with mock.patch.object(config, 'RATINGS_FILE', self.ratings_file):
+            chunks = list(clean_ratings_chunks(extract_ratings_chunks(3), report=report))
+
+        self.assertEqual(len(chunks), 2)
+        rows = [tuple(row) for chunk in chunks for row in chunk.itertuples(index=False)]
+        self.assertEqual(rows, [(1, 1, 5), (2, 1, 4)])
+        for chunk in chunks:
+            self.assertEqual(chunk.dtypes.astype(str).to_dict(), config.RATINGS_DTYPES)
+
+        self.assertEqual(report['rows_out'], 2)
+        self.assertEqual(report['dropped'], {
+            'missing_values': 1,
+            'duplicate_user_book': 1,
+            'rating_out_of_range': 2
+        })
+
+    def test_2_manifest_tracks_transform_settings_and_mode(self):
+        """Test only transform settings and the transform mode make a table stale"""
+        manifest_file = self.ratings_file + '.manifest.json'
+        self.addCleanup(lambda: os.path.exists(manifest_file) and os.remove(manifest_file))
+        with mock.patch.object(config, 'ETL_MANIFEST_FILE', manifest_file), \
+                mock.patch.dict(manifest.SOURCE_FILES, {'ratings': self.ratings_file}, clear=True):
+            tables, fingerprints = manifest.find_stale_tables(['csv'], 'classic')
+            self.assertEqual(tables, ['ratings'])
+            manifest.update_manifest(tables, fingerprints, ['csv'])
+            self.assertEqual(manifest.find_stale_tables(['csv'], 'classic')[0], [])
+
+            with mock.patch.object(config, 'PIPELINE_QUEUE_SIZE', 16):
+                self.assertEqual(manifest.find_stale_tables(['csv'], 'classic')[0], [])
+            with mock.patch.object(config, 'RATINGS_DTYPES', dict(config.RATINGS_DTYPES, rating='int16')):
+                self.assertEqual(manifest.find_stale_tables(['csv'], 'classic')[0], ['ratings'])
+            self.assertEqual(manifest.find_stale_tables(['csv'], 'single_pass')[0], ['ratings'])
+
+    def test_3_binary_append_widens_text(self):
+        """Test appended chunks with longer text widen the column instead of truncating it"""
+        binary_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, binary_dir)
+        manifest_file = os.path.join(binary_dir, 'manifest.json')
+        with mock.patch.object(config, 'BINARY_DATA_DIR', binary_dir), \
+                mock.patch.object(config, 'BINARY_MANIFEST_FILE', manifest_file):
+            save_table_to_binary('tags', pd.DataFrame({'tag_id': [1], 'tag_name': ['abc']}))
+            save_table_to_binary('tags', pd.DataFrame({'tag_id': [2], 'tag_name': ['science-fiction']}),
+                                 append=True)
+            df = extract_processed('tags', mmap=False)
+
+            with self.assertRaises(ValueError):
+                save_table_to_binary('tags', pd.DataFrame({'tag_id': [3], 'tag_name': [1.5]}), append=True)
+
+        self.assertEqual(df['tag_id'].tolist(), [1, 2])
+        self.assertEqual(df['tag_name'].tolist(), ['abc', 'science-fiction'])
+
+if __name__ == '__main__':
+    unittest.main()